@@ -1,11 +1,27 @@
-from flask import Flask, request, jsonify
+import time
+_IMPORT_START = time.perf_counter()
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import Flask, Response, g, request, jsonify
 import numpy as np
 import pandas as pd
-import joblib
-from tensorflow.keras.models import load_model
 from datetime import datetime, timedelta
 from flask_cors import CORS
+import json
 import logging
+import os
+import re
+
+from building_store import building_store, reading_log, normalize_building_name, DatasetFormatError
+from ingest_log import parse_readings
+from serialization import consumption_rows_json, consumption_columnar_json, encode_body
+from bulk_metrics import BulkMetricsCache, compute_bulk_metrics
+from feature_store import FeatureStore
+from inference_executor import BoundedExecutor, InferenceBusy, RequestSlots
+from instrumentation import metrics, RequestProfiler
+from model_runtime import FAILED
+from model_registry import ModelEntry, ModelRegistry, DEFAULT_VERSION, MODEL_REGISTRY_DIR
 
 logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
@@ -29,6 +45,39 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
     return response
 
+def route_label():
+    """The matched URL rule (not the raw path, to keep metric labels bounded)."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def stage_timer():
+    """Per-stage latency recorder for the current request (see /debug/metrics)."""
+    return metrics.stage_timer(route_label())
+
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if ENABLE_PROFILING and request.headers.get("X-Profile") == "1":
+        g.profiler = request_profiler.start()
+
+@app.after_request
+def record_request_timing(response):
+    if getattr(g, "profiler", None) is not None:
+        name = re.sub(r"[^A-Za-z0-9]+", "_", route_label()).strip("_") or "root"
+        response.headers["X-Profile-File"] = request_profiler.stop(g.profiler, name)
+        g.profiler = None
+    if hasattr(g, "request_start"):
+        metrics.request_seconds.observe(time.perf_counter() - g.request_start, route_label(), request.method,
+                                        str(response.status_code))
+    return response
+
+@app.teardown_request
+def stop_abandoned_profile(exc):
+    # after_request does not run when a view raises; release the profiler anyway
+    if getattr(g, "profiler", None) is not None:
+        request_profiler.stop(g.profiler, "failed")
+        g.profiler = None
+
 # Global constants (adjust as used during training)
 SEQUENCE_LENGTH = 72  # e.g., past 72 hours
 # File paths for model and scalers – update as needed:
@@ -36,47 +85,84 @@ MODEL_PATH = "prediction_model_files_docker/Using Federated Learning for Short-t
 FEATURE_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_feature.save"
 TARGET_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_target.save"
 HISTORICAL_CSV_PATH = "prediction_model_files_docker/community_data.csv"  # CSV containing "Use [kW]" column
-
-# Load the trained hybrid model and scalers
-model = load_model(MODEL_PATH)
-feature_scaler = joblib.load(FEATURE_SCALER_PATH)
-target_scaler = joblib.load(TARGET_SCALER_PATH)
-
-def get_historical_sequence(csv_path, sequence_length, target_scaler):
-    """
-    Load historical consumption data from a CSV file, extract the "Use [kW]" column,
-    take the last 'sequence_length' values, scale them using target_scaler,
-    and reshape to (1, sequence_length, 1).
-    """
-    df = pd.read_csv(csv_path)
-    if "Use [kW]" not in df.columns:
-        raise ValueError("CSV file must contain 'Use [kW]' column.")
-    consumption = df["Use [kW]"].values  # shape: (n,)
-    if len(consumption) < sequence_length:
-        raise ValueError(f"Not enough historical data. Required: {sequence_length}, Found: {len(consumption)}")
-    seq = consumption[-sequence_length:]
-    seq = seq.reshape(-1, 1)
-    seq_scaled = target_scaler.transform(seq)
-    return np.expand_dims(seq_scaled, axis=0)  # shape: (1, sequence_length, 1)
-
-def iterative_forecast_backend(model, initial_sequence, exo_input, forecast_horizon):
-    """
-    Iteratively forecast consumption for 'forecast_horizon' steps ahead.
-    At each step, predict the next consumption value using the current historical sequence and exogenous input,
-    update the sequence by dropping the oldest value and appending the new prediction,
-    and finally return the prediction of the final step.
-    """
-    current_sequence = initial_sequence.copy()  # shape: (1, SEQUENCE_LENGTH, 1)
-    final_prediction = None
-    for _ in range(forecast_horizon):
-        # Hybrid model expects two inputs: [historical sequence, exogenous features]
-        pred_scaled = model.predict([current_sequence, exo_input])
-        final_prediction = pred_scaled  # save current prediction
-        # Update sequence: remove oldest entry and append new prediction
-        # pred_scaled is shape (1, 1); reshape it to (1, 1, 1) for concatenation
-        pred_reshaped = np.expand_dims(pred_scaled, axis=1)  # shape: (1, 1, 1)
-        current_sequence = np.concatenate([current_sequence[:, 1:, :], pred_reshaped], axis=1)
-    return final_prediction
+HISTORY_BUILDING = "community"  # ingested readings for this building extend the forecast history
+# Per-building models live in MODEL_REGISTRY_DIR/<Building>/<version>/; at most this many stay loaded
+MAX_RESIDENT_MODELS = int(os.environ.get("MAX_RESIDENT_MODELS", "3"))
+TRAJECTORY_CACHE_SIZE = 256  # number of (history window, exogenous input) trajectories kept
+MAX_BATCH_SCENARIOS = 1024  # upper bound on scenarios accepted by /predict/batch
+BULK_METRICS_CACHE_SIZE = 128  # number of (buildings, data versions, date range) results kept
+# Micro-batching of concurrent /predict requests (set INFERENCE_MAX_BATCH=0 to disable)
+INFERENCE_BATCH_WINDOW_MS = float(os.environ.get("INFERENCE_BATCH_WINDOW_MS", "5"))
+INFERENCE_MAX_BATCH = int(os.environ.get("INFERENCE_MAX_BATCH", "64"))
+INFERENCE_TIMEOUT_S = 60.0
+# /predict requests go straight to the scheduler; beyond INFERENCE_MAX_QUEUE queued or in-flight
+# forecasts new ones are rejected with 503
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", "256"))
+# Other model work (/predict/batch, and /predict with batching disabled) runs on a bounded pool:
+# INFERENCE_WORKERS at once, at most INFERENCE_MAX_PENDING waiting requests (keep it below the
+# server's thread count so data routes always have threads)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.environ.get("INFERENCE_MAX_PENDING", "4"))
+# At most FORECAST_SLOTS request threads wait on model work (scheduler or executor) at once; by default
+# WEB_THREADS (gunicorn.conf.py) minus DATA_THREAD_RESERVE, so data routes always have threads left
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+DATA_THREAD_RESERVE = int(os.environ.get("DATA_THREAD_RESERVE", "2"))
+FORECAST_SLOTS = int(os.environ.get("FORECAST_SLOTS", str(max(1, WEB_THREADS - DATA_THREAD_RESERVE))))
+# "keras" serves MODEL_PATH with TensorFlow; "tflite" serves the bundle in TFLITE_MODEL_DIR (see export_lite.py)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "keras")
+TFLITE_MODEL_DIR = os.environ.get("TFLITE_MODEL_DIR", "prediction_model_files_tflite")
+# Requests with an "X-Profile: 1" header are profiled (all threads sampled) when ENABLE_PROFILING=1
+ENABLE_PROFILING = os.environ.get("ENABLE_PROFILING", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# "background": load the model in a warm-up thread at startup; "lazy": on the first forecast request
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "background")
+
+# Exogenous features in the same order as during training
+EXOGENOUS_FEATURES = ["Winter", "Spring", "Summer", "Fall",
+                      "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
+                      "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"]
+
+# Sampling profiles requested through the X-Profile header
+request_profiler = RequestProfiler(PROFILE_DIR)
+
+# /metrics/bulk results keyed by building data versions and date range
+bulk_metrics_cache = BulkMetricsCache(BULK_METRICS_CACHE_SIZE)
+
+# Lag and rolling features of each building's latest reading, kept in step with the building store
+feature_store = FeatureStore(building_store)
+
+# Request threads hand model work that bypasses the scheduler to this pool instead of running it themselves
+inference_executor = BoundedExecutor(INFERENCE_WORKERS, INFERENCE_MAX_PENDING)
+
+# Request threads waiting on forecasts, capped below the server's thread count
+forecast_slots = RequestSlots(FORECAST_SLOTS)
+
+# One micro-batching worker shared by every loaded model
+inference_scheduler = None
+if INFERENCE_MAX_BATCH > 0:
+    from inference_scheduler import InferenceScheduler
+
+    inference_scheduler = InferenceScheduler(None, INFERENCE_BATCH_WINDOW_MS, INFERENCE_MAX_BATCH,
+                                             max_pending=INFERENCE_MAX_QUEUE)
+
+# Trained hybrid models and scalers by building and version, each with the scaled
+# history window and trajectory cache built on it. Loaded on first use (see MODEL_LOADING).
+model_registry = ModelRegistry(
+    MODEL_REGISTRY_DIR, max_resident=MAX_RESIDENT_MODELS, history_path_for=building_store.path_for,
+    runtime_options={"sequence_length": SEQUENCE_LENGTH, "ingest_log": reading_log,
+                     "trajectory_cache_size": TRAJECTORY_CACHE_SIZE, "batch_window_ms": INFERENCE_BATCH_WINDOW_MS,
+                     "max_batch": INFERENCE_MAX_BATCH, "max_pending": INFERENCE_MAX_QUEUE},
+    inference_scheduler=inference_scheduler,
+)
+# The community aggregate model is the default and always stays loaded
+model_registry.register(ModelEntry(
+    HISTORY_BUILDING, DEFAULT_VERSION, model_dir=TFLITE_MODEL_DIR if INFERENCE_BACKEND == "tflite" else None,
+    model_path=MODEL_PATH, feature_scaler_path=FEATURE_SCALER_PATH, target_scaler_path=TARGET_SCALER_PATH,
+    history_csv_path=HISTORICAL_CSV_PATH, backend=INFERENCE_BACKEND, pinned=True,
+))
+model_runtime = model_registry.runtime(HISTORY_BUILDING, DEFAULT_VERSION)
+if MODEL_LOADING == "background":
+    model_runtime.start_warmup()
 
 def get_exogenous_input_from_request(user_inputs):
     """
@@ -85,129 +171,405 @@ def get_exogenous_input_from_request(user_inputs):
       "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
       "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"
     """
-    feature_order = ["Winter", "Spring", "Summer", "Fall", 
-                     "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
-                     "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"]
     try:
-        values = [user_inputs[key] for key in feature_order]
+        values = [user_inputs[key] for key in EXOGENOUS_FEATURES]
     except KeyError as e:
         raise ValueError(f"Missing exogenous feature: {e}")
     return np.array(values).reshape(1, -1)  # shape: (1, 11)
 
+def get_exogenous_batch_from_request(scenarios):
+    """
+    Stack a list of user_inputs dicts (see get_exogenous_input_from_request)
+    into one (N, 11) array.
+    """
+    rows = []
+    for i, user_inputs in enumerate(scenarios):
+        try:
+            rows.append([user_inputs[key] for key in EXOGENOUS_FEATURES])
+        except KeyError as e:
+            raise ValueError(f"Missing exogenous feature in scenario {i}: {e}")
+        except TypeError:
+            raise ValueError(f"Scenario {i} must be an object of exogenous features")
+    return np.array(rows, dtype=float).reshape(len(rows), len(EXOGENOUS_FEATURES))
+
+def busy_response(message):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+def load_model_runtime(data=None):
+    """
+    Return the loaded model runtime for the ?building= and ?version= of the
+    request (also accepted in the JSON body). Defaults to the community model.
+    A model that is not loaded yet (or whose last load failed) is loaded by
+    its background warm-up thread, never on the request thread; meanwhile
+    the request gets a 503 with Retry-After.
+    Returns (runtime, None) on success or (None, error_response) on failure.
+    """
+    data = data if isinstance(data, dict) else {}
+    building = request.args.get('building') or data.get('building')
+    version = request.args.get('version') or data.get('version')
+    if not building:
+        building, version = HISTORY_BUILDING, version or DEFAULT_VERSION
+    building = normalize_building_name(str(building))
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", building):
+        return None, (jsonify({"error": f"Invalid building name: {building}"}), 400)
+    if version is not None and not re.fullmatch(r"[A-Za-z0-9_-][A-Za-z0-9_.-]*", str(version)):
+        return None, (jsonify({"error": f"Invalid model version: {version}"}), 400)
+    try:
+        runtime = model_registry.runtime(building, version and str(version))
+    except KeyError as e:
+        return None, (jsonify({"error": str(e.args[0])}), 404)
+    if runtime.ready:
+        return runtime, None
+    failed = runtime.status == FAILED and runtime.error
+    runtime.start_warmup()
+    if failed:
+        return None, busy_response(f"Model unavailable: {runtime.error}")
+    return None, busy_response("Model is loading")
+
+def run_inference(work, use_executor=True):
+    """
+    Run model work (a callable without arguments) on the bounded inference
+    executor, or on the request thread with use_executor=False (for work that
+    only waits on the inference scheduler, which does its own queueing).
+    Either way the request thread waits, so it first takes one of the
+    FORECAST_SLOTS; without a free slot the request is rejected rather than
+    tying up another server thread.
+    Returns (result, None) on success or (None, error_response) when the
+    slots, executor or scheduler are saturated (503) or the forecast times
+    out (504).
+    """
+    try:
+        forecast_slots.acquire()
+    except InferenceBusy as e:
+        return None, busy_response(str(e))
+    try:
+        if use_executor:
+            return inference_executor.run(work, timeout=INFERENCE_TIMEOUT_S), None
+        return work(), None
+    except InferenceBusy as e:
+        return None, busy_response(str(e))
+    except FutureTimeoutError:
+        return None, (jsonify({"error": "Forecast timed out"}), 504)
+    finally:
+        forecast_slots.release()
+
+def format_trajectory(trajectory):
+    return [
+        {"hours_ahead": step, "predicted_consumption": value}
+        for step, value in enumerate(trajectory.tolist(), start=1)
+    ]
+
 @app.route("/predict", methods=["POST"])
 def predict():
+    timer = stage_timer()
+    payload = request.get_json(silent=True)
+    timer.mark("parse_json")
+    runtime, error_response = load_model_runtime(payload)
+    if error_response:
+        return error_response
+    # Hold our own references: an evicted runtime drops its model
+    snapshot = runtime.snapshot()
+    if snapshot is None:
+        return busy_response("Model was unloaded")
+    from forecasting import forecast_trajectory
+    timer.mark("load_model")
+
     try:
         data = request.json
         forecast_horizon = int(data["hours_ahead"])  # e.g., 5 hours ahead
+        if forecast_horizon < 1:
+            raise ValueError("hours_ahead must be at least 1")
         user_inputs = data["user_inputs"]  # exogenous features provided by the operator
+        return_trajectory = bool(data.get("return_trajectory", False))  # every hour up to hours_ahead
+        forecaster, feature_scaler, target_scaler, history_window, cache, scheduler = snapshot
         
         # Prepare exogenous input vector (shape: (1, 11)) and scale it
         exo_input = get_exogenous_input_from_request(user_inputs)
         exo_input_scaled = feature_scaler.transform(exo_input)
+        timer.mark("scale_inputs")
         
-        # Retrieve the historical consumption sequence from CSV (shape: (1, SEQUENCE_LENGTH, 1))
-        initial_sequence = get_historical_sequence(HISTORICAL_CSV_PATH, SEQUENCE_LENGTH, target_scaler)
+        # Retrieve the in-memory scaled history window (shape: (1, SEQUENCE_LENGTH, 1))
+        initial_sequence = history_window.get()
+        timer.mark("history_window")
         
-        # Use iterative forecasting to get the prediction for the final forecast step.
-        final_prediction_scaled = iterative_forecast_backend(model, initial_sequence, exo_input_scaled, forecast_horizon)
+        # Use iterative forecasting to get every step up to the forecast horizon
+        # (memoized, so shorter horizons for the same inputs are free). With the
+        # scheduler the request thread submits directly and waits, so every
+        # concurrent request can join the same batched forward passes.
+        trajectory_scaled, error_response = run_inference(lambda: forecast_trajectory(
+            forecaster, initial_sequence, exo_input_scaled, forecast_horizon,
+            cache=cache, scheduler=scheduler, timeout=INFERENCE_TIMEOUT_S), use_executor=scheduler is None)
+        if error_response:
+            return error_response
+        timer.mark("forecast")
         
-        # Inverse-transform the prediction to get the actual consumption value.
-        final_prediction = target_scaler.inverse_transform(final_prediction_scaled)
+        # Inverse-transform the predictions to get the actual consumption values.
+        trajectory = target_scaler.inverse_transform(trajectory_scaled.reshape(-1, 1))[:, 0]
+        timer.mark("inverse_transform")
         
-        return jsonify({"predicted_consumption": float(final_prediction[0][0])})
+        response = {"predicted_consumption": float(trajectory[-1])}
+        if return_trajectory:
+            response["trajectory"] = format_trajectory(trajectory)
+        response = jsonify(response)
+        timer.mark("serialize")
+        return response
     except Exception as e:
         app.logger.error(f"Error in /predict endpoint: {e}")
         return jsonify({"error": str(e)}), 400
 
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    What-if sweeps: forecast many exogenous scenarios against the same history.
+    Expects {"hours_ahead": int, "scenarios": [user_inputs, ...], "return_trajectory": bool}
+    and returns {"predictions": [{"predicted_consumption": ..., "trajectory": [...]}, ...]}
+    in scenario order.
+    """
+    timer = stage_timer()
+    payload = request.get_json(silent=True)
+    timer.mark("parse_json")
+    runtime, error_response = load_model_runtime(payload)
+    if error_response:
+        return error_response
+    # Hold our own references: an evicted runtime drops its model
+    snapshot = runtime.snapshot()
+    if snapshot is None:
+        return busy_response("Model was unloaded")
+    from forecasting import forecast_trajectories
+    timer.mark("load_model")
+
+    try:
+        data = request.json
+        forecast_horizon = int(data["hours_ahead"])
+        if forecast_horizon < 1:
+            raise ValueError("hours_ahead must be at least 1")
+        scenarios = data["scenarios"]
+        if not isinstance(scenarios, list) or not scenarios:
+            raise ValueError("scenarios must be a non-empty list")
+        if len(scenarios) > MAX_BATCH_SCENARIOS:
+            raise ValueError(f"Too many scenarios: {len(scenarios)} (maximum {MAX_BATCH_SCENARIOS})")
+        return_trajectory = bool(data.get("return_trajectory", False))
+        forecaster, feature_scaler, target_scaler, history_window, cache, _ = snapshot
+
+        # One scaler call for all scenarios (shape: (N, 11))
+        exo_inputs_scaled = feature_scaler.transform(get_exogenous_batch_from_request(scenarios))
+        timer.mark("scale_inputs")
+
+        initial_sequence = history_window.get()
+        timer.mark("history_window")
+
+        # All scenarios are rolled forward together as one (N, SEQUENCE_LENGTH, 1) batch
+        trajectories_scaled, error_response = run_inference(lambda: forecast_trajectories(
+            forecaster, initial_sequence, exo_inputs_scaled, forecast_horizon, cache=cache))
+        if error_response:
+            return error_response
+        timer.mark("forecast")
+        trajectories = target_scaler.inverse_transform(trajectories_scaled.reshape(-1, 1)).reshape(
+            trajectories_scaled.shape)
+        timer.mark("inverse_transform")
+
+        predictions = []
+        for trajectory in trajectories:
+            prediction = {"predicted_consumption": float(trajectory[-1])}
+            if return_trajectory:
+                prediction["trajectory"] = format_trajectory(trajectory)
+            predictions.append(prediction)
+        response = jsonify({"predictions": predictions})
+        timer.mark("serialize")
+        return response
+    except Exception as e:
+        app.logger.error(f"Error in /predict/batch endpoint: {e}")
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/inference/stats", methods=["GET"])
+def get_inference_stats():
+    """Forecast slots, inference executor, shared micro-batching scheduler, model residency and cache counters."""
+    caches = {}
+    for building, version, runtime in model_registry.resident():
+        cache = runtime.trajectory_cache
+        caches[f"{building}/{version}"] = {"hits": cache.hits, "misses": cache.misses} if cache else None
+    stats = {
+        "forecast_slots": forecast_slots.stats(),
+        "executor": inference_executor.stats(),
+        "scheduler": inference_scheduler.stats() if inference_scheduler else None,
+        "models": {key: value for key, value in model_registry.describe().items() if key != "resident"},
+        "trajectory_caches": caches,
+    }
+    return jsonify(stats)
+
+@app.route("/ready", methods=["GET"])
+def get_readiness():
+    """
+    Readiness check with the model status and a startup timing breakdown.
+    With MODEL_LOADING=background the process is only ready once the model
+    is loaded; with MODEL_LOADING=lazy data routes are served right away and
+    the model loads on the first forecast request.
+    """
+    model_status = model_runtime.describe()
+    ready = model_runtime.ready or (MODEL_LOADING == "lazy" and model_runtime.status != FAILED)
+    response = {
+        "status": "ready" if ready else model_status["status"],
+        "model_loading": MODEL_LOADING,
+        "model": model_status,
+        "registry": model_registry.describe(),
+        "startup": STARTUP_TIMINGS,
+    }
+    return jsonify(response), 200 if ready else 503
+
+def load_building_data(building):
+    """
+    Fetch the parsed dataset for a dashboard building name from the shared store.
+    Returns (data, None) on success or (None, error_response) on failure.
+    """
+    normalized_building = normalize_building_name(building)
+    try:
+        return building_store.get(normalized_building), None
+    except DatasetFormatError as e:
+        return None, (jsonify({"error": str(e)}), 500)
+    except FileNotFoundError:
+        app.logger.error(f"File not found: {building_store.path_for(normalized_building)}")
+        return None, (jsonify({"error": f"Data not found for building: {building}"}), 404)
+    except Exception as e:
+        app.logger.error(f"Error reading CSV file: {str(e)}")
+        return None, (jsonify({"error": f"Error reading data for building: {building}"}), 500)
+
+def date_range_bounds(start_date, end_date):
+    """
+    Convert the inclusive [start_date, end_date] calendar range of a request
+    into half-open datetime64 bounds [start, end).
+    """
+    start = pd.to_datetime(start_date).normalize()
+    end = pd.to_datetime(end_date).normalize() + pd.Timedelta(days=1)
+    return start.to_datetime64(), end.to_datetime64()
+
+def json_response(body, status=200):
+    """
+    Wrap an already-serialized JSON body in a Response, compressing it with
+    gzip or br when the client accepts it.
+    """
+    data, content_encoding = encode_body(body, request.headers.get("Accept-Encoding"))
+    response = Response(data, status=status, mimetype="application/json")
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
 @app.route("/consumption", methods=["GET"])
 def get_consumption_data():
+    timer = stage_timer()
     try:
         building = request.args.get('building')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         view_type = request.args.get('view_type', 'hourly')  # Default to hourly if not specified
+        response_format = request.args.get('format', 'rows')  # 'rows' (default) or 'columnar'
 
         app.logger.info(f"Received consumption data request for building: {building}, date range: {start_date} to {end_date}, view type: {view_type}")
 
         if not all([building, start_date, end_date]):
             return jsonify({"error": "Missing required parameters"}), 400
 
-        # Normalize building name (remove spaces and handle special cases)
-        building_name_map = {
-            "House 1": "House1",
-            "House 2": "House2",
-        }
-        normalized_building = building_name_map.get(building, building.replace(" ", ""))
-        
-        # Read the building-specific dataset
-        file_path = f"datasets/{normalized_building}_data.csv"
-        app.logger.info(f"Reading data from: {file_path}")
-        
-        try:
-            df = pd.read_csv(file_path)
-        except Exception as e:
-            app.logger.error(f"Error reading CSV file: {str(e)}")
-            return jsonify({"error": f"Error reading data for building: {building}"}), 500
-
-        # Identify the date/time column
-        time_columns = ['Time', 'timestamp', 'date', 'DateTime']
-        date_column = next((col for col in time_columns if col in df.columns), None)
-        
-        if not date_column:
-            app.logger.error(f"No valid date column found. Available columns: {df.columns.tolist()}")
-            return jsonify({"error": "No valid date/time column found in the dataset"}), 500
-
-        # Identify the energy consumption column
-        energy_columns = ['Use [kW]', 'Energy [kW]', 'Consumption [kW]', 'Power [kW]']
-        energy_column = next((col for col in energy_columns if col in df.columns), None)
-        
-        if not energy_column:
-            app.logger.error(f"No valid energy column found. Available columns: {df.columns.tolist()}")
-            return jsonify({"error": "No valid energy consumption column found in the dataset"}), 500
-
-        # Convert date column and filter by date range
-        df[date_column] = pd.to_datetime(df[date_column])
-        mask = (df[date_column].dt.date >= pd.to_datetime(start_date).date()) & \
-               (df[date_column].dt.date <= pd.to_datetime(end_date).date())
-        df_filtered = df[mask].copy()
+        # Parsed once per process and reloaded only when the CSV changes
+        data, error_response = load_building_data(building)
+        if error_response:
+            return error_response
+        timer.mark("load_data")
 
-        if df_filtered.empty:
-            app.logger.warning(f"No data found for date range: {start_date} to {end_date}")
-            return jsonify({"error": "No data available for the selected date range"}), 404
+        start, end = date_range_bounds(start_date, end_date)
 
         # Aggregate data based on view type
         if view_type == 'daily':
-            # For daily view, group by date and calculate mean consumption
-            df_filtered['date'] = df_filtered[date_column].dt.date
-            df_agg = df_filtered.groupby('date', as_index=False).agg({
-                energy_column: 'mean'
-            })
-            df_agg[date_column] = pd.to_datetime(df_agg['date'])
+            # For daily view, serve the precomputed per-day mean consumption
+            timestamps, values = data.daily_means(start, end)
         else:  # hourly view
             # For hourly view, use the original timestamps
-            df_agg = df_filtered
+            lo, hi = data.row_bounds(start, end)
+            timestamps, values = data.timestamps[lo:hi], data.energy[lo:hi]
+        timer.mark("aggregate")
 
-        # Format data for the chart
-        consumption_data = df_agg.apply(
-            lambda row: {
-                "timestamp": row[date_column].isoformat(),
-                "consumption": float(row[energy_column])
-            },
-            axis=1
-        ).tolist()
+        if len(timestamps) == 0:
+            app.logger.warning(f"No data found for date range: {start_date} to {end_date}")
+            return jsonify({"error": "No data available for the selected date range"}), 404
 
-        return jsonify(consumption_data)
+        # Format data for the chart, serializing whole columns at once
+        if response_format == 'columnar':
+            body = consumption_columnar_json(timestamps, values)
+        else:
+            body = consumption_rows_json(timestamps, values)
+        timer.mark("serialize")
+
+        response = json_response(body)
+        timer.mark("compress")
+        return response
 
     except Exception as e:
         app.logger.error(f"Error in /consumption endpoint: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def read_ingest_payload():
+    """
+    Return the readings in an /ingest request body as a list of dicts. Accepts
+    a JSON object, a JSON array of objects, or NDJSON (one object per line).
+    """
+    if request.mimetype in ("application/x-ndjson", "application/ndjson"):
+        readings = []
+        for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if line.strip():
+                try:
+                    readings.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        return readings
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        return [payload]
+    if isinstance(payload, list):
+        return payload
+    raise ValueError("Request body must be a JSON object, a JSON array or NDJSON")
+
+@app.route("/ingest", methods=["POST"])
+def ingest_readings():
+    """
+    Append meter readings (same columns as datasets/*_data.csv) for ?building=.
+    They are visible to /consumption, /metrics and the forecast history
+    without a restart.
+    """
+    building = request.args.get('building')
+    if not building:
+        return jsonify({"error": "Missing required parameter: building"}), 400
+    normalized_building = normalize_building_name(building)
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", normalized_building):
+        return jsonify({"error": f"Invalid building name: {building}"}), 400
+
+    try:
+        records = parse_readings(read_ingest_payload())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        total_records = reading_log.append(normalized_building, records)
+        # Models not loaded yet have no window; they read the log when it is built
+        for _, _, runtime in model_registry.resident():
+            history_window = runtime.history_window
+            if runtime.history_building == normalized_building and history_window is not None:
+                history_window.refresh()
+    except Exception as e:
+        app.logger.error(f"Error in /ingest endpoint: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    app.logger.info(f"Ingested {len(records)} readings for building: {building}")
+    return jsonify({"building": building, "ingested": len(records), "total_ingested": total_records}), 201
+
 @app.route("/")
 def home():
     return "Energy Consumption Prediction API is running!"
 
 @app.route("/metrics", methods=["GET"])
 def get_metrics():
+    timer = stage_timer()
     try:
         building = request.args.get('building')
         start_date = request.args.get('start_date')
@@ -218,66 +580,34 @@ def get_metrics():
         if not all([building, start_date, end_date]):
             return jsonify({"error": "Missing required parameters"}), 400
 
-        # Normalize building name (remove spaces and handle special cases)
-        building_name_map = {
-            "House 1": "House1",
-            "House 2": "House2",
-        }
-        normalized_building = building_name_map.get(building, building.replace(" ", ""))
-        
-        # Read the building-specific dataset
-        file_path = f"datasets/{normalized_building}_data.csv"
-        app.logger.info(f"Reading data from: {file_path}")
-        
-        try:
-            df = pd.read_csv(file_path)
-            app.logger.info(f"Available columns: {df.columns.tolist()}")
-        except Exception as e:
-            app.logger.error(f"Error reading CSV file: {str(e)}")
-            return jsonify({"error": f"Error reading data for building: {building}"}), 500
-
-        # Identify the date/time column (it might be 'timestamp', 'date', or 'Time')
-        time_columns = ['Time', 'timestamp', 'date', 'DateTime']  # Prioritize 'Time' as it's in our data
-        date_column = next((col for col in time_columns if col in df.columns), None)
-        
-        if not date_column:
-            app.logger.error(f"No valid date column found. Available columns: {df.columns.tolist()}")
-            return jsonify({"error": "No valid date/time column found in the dataset"}), 500
-            
-        app.logger.info(f"Using date column: {date_column}")
-
-        # Convert date column and filter by date range
-        df[date_column] = pd.to_datetime(df[date_column])
-        mask = (df[date_column].dt.date >= pd.to_datetime(start_date).date()) & \
-               (df[date_column].dt.date <= pd.to_datetime(end_date).date())
-        df_filtered = df[mask].copy()  # Use copy to avoid SettingWithCopyWarning
-
-        if df_filtered.empty:
-            app.logger.warning(f"No data found for date range: {start_date} to {end_date}")
-            return jsonify({"error": "No data available for the selected date range"}), 404
+        # Parsed once per process and reloaded only when the CSV changes
+        data, error_response = load_building_data(building)
+        if error_response:
+            return error_response
 
-        # Identify the energy consumption column
-        energy_columns = ['Use [kW]', 'Energy [kW]', 'Consumption [kW]', 'Power [kW]']
-        energy_column = next((col for col in energy_columns if col in df.columns), None)
-        
-        if not energy_column:
-            app.logger.error(f"No valid energy column found. Available columns: {df.columns.tolist()}")
-            return jsonify({"error": "No valid energy consumption column found in the dataset"}), 500
+        timer.mark("load_data")
+        app.logger.info(f"Using date column: {data.date_column}, energy column: {data.energy_column}")
+
+        # Binary-search the row range; all aggregates come from prefix sums
+        start, end = date_range_bounds(start_date, end_date)
+        lo, hi = data.row_bounds(start, end)
+        timer.mark("row_bounds")
 
-        app.logger.info(f"Using energy column: {energy_column}")
+        if hi == lo:
+            app.logger.warning(f"No data found for date range: {start_date} to {end_date}")
+            return jsonify({"error": "No data available for the selected date range"}), 404
 
         # Calculate metrics
-        total_consumption = df_filtered[energy_column].sum()
-        peak_demand = df_filtered[energy_column].max()
+        total_consumption = data.total(lo, hi)
+        peak_demand = data.peak(lo, hi)
         
         # Find peak hours (hours with highest average consumption)
-        df_filtered.loc[:, 'hour'] = df_filtered[date_column].dt.hour  # Use loc to avoid warning
-        hourly_avg = df_filtered.groupby('hour')[energy_column].mean()
-        peak_hour = hourly_avg.idxmax()
+        peak_hour = int(np.nanargmax(data.hourly_means(lo, hi)))
         peak_hour_str = f"{peak_hour:02d}:00 - {(peak_hour + 1):02d}:00"
 
         # Calculate average consumption
-        avg_consumption = df_filtered[energy_column].mean()
+        avg_consumption = total_consumption / data.count(lo, hi)
+        timer.mark("aggregate")
 
         # Prepare response
         response = {
@@ -290,12 +620,100 @@ def get_metrics():
         app.logger.info(f"Successfully calculated metrics: {response}")
         return jsonify(response)
 
-    except FileNotFoundError:
-        app.logger.error(f"File not found: datasets/{normalized_building}_data.csv")
-        return jsonify({"error": f"Data not found for building: {building}"}), 404
     except Exception as e:
         app.logger.error(f"Error processing metrics: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/metrics/bulk", methods=["GET"])
+def get_bulk_metrics():
+    """
+    /metrics for several buildings in one call, plus community totals.
+    ?buildings= is a comma-separated list of dashboard building names
+    (default: every building dataset except the community aggregate).
+    Buildings without readings in the range get an "error" entry.
+    """
+    timer = stage_timer()
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        if not all([start_date, end_date]):
+            return jsonify({"error": "Missing required parameters"}), 400
+
+        requested = request.args.get('buildings')
+        if requested:
+            buildings = [name.strip() for name in requested.split(",") if name.strip()]
+        else:
+            buildings = [name for name in building_store.buildings() if name != HISTORY_BUILDING]
+        if not buildings:
+            return jsonify({"error": "No buildings selected"}), 400
+
+        datasets = []
+        for building in buildings:
+            data, error_response = load_building_data(building)
+            if error_response:
+                return error_response
+            datasets.append(data)
+        timer.mark("load_data")
+
+        start, end = date_range_bounds(start_date, end_date)
+        key = (tuple(buildings),) + bulk_metrics_cache.make_key(datasets, start, end)
+        result = bulk_metrics_cache.get(key)
+        if result is None:
+            # One stacked (building x hour) pass for all buildings
+            building_metrics, community = compute_bulk_metrics(datasets, start, end)
+            result = {
+                "buildings": {
+                    building: metric or {"error": "No data available for the selected date range"}
+                    for building, metric in zip(buildings, building_metrics)
+                },
+                "community": community,
+            }
+            bulk_metrics_cache.put(key, result)
+        timer.mark("aggregate")
+
+        return jsonify({"start_date": start_date, "end_date": end_date, **result})
+
+    except Exception as e:
+        app.logger.error(f"Error processing bulk metrics: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/features", methods=["GET"])
+def get_features():
+    """
+    Lag (1h, 24h) and 24h rolling mean/std features of ?building='s latest
+    reading, defined as in train.py. Features without enough history are null.
+    """
+    try:
+        building = request.args.get('building')
+        if not building:
+            return jsonify({"error": "Missing required parameter: building"}), 400
+
+        # Validates the building and picks up newly ingested readings
+        _, error_response = load_building_data(building)
+        if error_response:
+            return error_response
+
+        timestamp, features = feature_store.latest(normalize_building_name(building))
+        if timestamp is None:
+            return jsonify({"error": f"No readings for building: {building}"}), 404
+
+        return jsonify({
+            "building": building,
+            "time": pd.Timestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+            "features": features,
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error in /features endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/debug/metrics", methods=["GET"])
+def get_debug_metrics():
+    """Request, per-stage and forward-pass latency histograms in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Time spent importing this module (without the model, which loads separately)
+STARTUP_TIMINGS = {"app_import_s": round(time.perf_counter() - _IMPORT_START, 4)}
+
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
@@ -0,0 +1,282 @@
+"""
+Walk-forward backtest of the hybrid forecaster over the building datasets.
+
+Every hour with a full 72-hour history and `--horizon` hours of actuals
+after it is a forecast origin. For each origin the model is rolled out
+recursively from the true history, exactly as /predict does, and compared
+with what was actually consumed; errors are reported per horizon step.
+
+    python backtest.py                              # all datasets, 24 steps
+    python backtest.py --buildings Office School --horizon 48 --stride 6
+    python backtest.py --backend tflite             # the exported TFLite bundle
+    python backtest.py --exo first                  # hold exo fixed, like /predict
+
+Origins are cut into shards that run as one batched tensor per horizon step
+(`--shard-size` origins at a time), and shards from all buildings are
+spread over a process pool, so the cost grows with the number of origins
+divided by the batch size rather than with the number of origins.
+With `--exo actual` (default) each step gets the exogenous features of the
+hour it predicts; `--exo first` uses those of the first forecast hour for
+the whole rollout, which is what the API does with a single user input.
+Origins with a missing reading in their history cannot be forecast; they
+are left out of the errors and reported as `skipped`.
+"""
+import argparse
+import glob
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from columnar import load_frame
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting.h5"
+FEATURE_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_feature.save"
+TARGET_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_target.save"
+TFLITE_MODEL_DIR = "prediction_model_files_tflite"
+DATASETS_GLOB = "datasets/*_data.csv"
+DEFAULT_OUT = "backtest_results.json"
+
+EXOGENOUS_FEATURES = ["Winter", "Spring", "Summer", "Fall",
+                      "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
+                      "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"]
+TARGET_COLUMN = "Use [kW]"
+SEQUENCE_LENGTH = 72
+EXO_MODES = ("actual", "first")
+# Actual readings closer to zero than this are left out of MAPE
+MAPE_EPSILON = 1e-6
+
+# Per-process state of a pool worker: the model and scalers are loaded once,
+# and each dataset is scaled once however many of its shards the worker runs.
+_worker = {}
+
+
+def _init_worker(backend, model_path, feature_scaler_path, target_scaler_path, lite_dir, threads):
+    if backend == "tflite":
+        from lite_forecaster import load_lite_bundle
+
+        forecaster, feature_scaler, target_scaler, _ = load_lite_bundle(lite_dir, num_threads=threads)
+    else:
+        import joblib
+        import tensorflow as tf
+
+        from forecasting import get_forecaster
+
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        forecaster = get_forecaster(tf.keras.models.load_model(model_path))
+        feature_scaler = joblib.load(feature_scaler_path)
+        target_scaler = joblib.load(target_scaler_path)
+    _worker.update(forecaster=forecaster, feature_scaler=feature_scaler, target_scaler=target_scaler, data={})
+
+
+def _worker_data(path):
+    """(scaled exo (n, F), scaled target (n,), raw target (n,)) of a dataset."""
+    data = _worker["data"].get(path)
+    if data is None:
+        df = load_frame(path)
+        exo = _worker["feature_scaler"].transform(df[EXOGENOUS_FEATURES].to_numpy(dtype=np.float64))
+        target = df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+        target_scaled = _worker["target_scaler"].transform(target.reshape(-1, 1))[:, 0]
+        data = (np.ascontiguousarray(exo, dtype=np.float32), target_scaled.astype(np.float32), target)
+        _worker["data"][path] = data
+    return data
+
+
+def backtest_shard(building, path, origins, horizon, exo_mode="actual"):
+    """
+    Forecast `horizon` steps from each origin (index of the first forecast
+    hour) in one batch and return the error sums per horizon step.
+    """
+    forecaster = _worker["forecaster"]
+    target_scaler = _worker["target_scaler"]
+    exo, target_scaled, target = _worker_data(path)
+    length = forecaster.sequence_length
+    origins = np.asarray(origins)
+    n = len(origins)
+    if origins.min() < length:
+        raise ValueError(f"Origins need {length} hours of history; the model's sequence length differs from the plan")
+
+    # Window of origin o is the scaled consumption of hours [o - L, o)
+    buffer = np.empty((n, length + horizon, 1), dtype=np.float32)
+    buffer[:, :length, 0] = sliding_window_view(target_scaled, length)[origins - length]
+    for i in range(horizon):
+        step_exo = exo[origins + i] if exo_mode == "actual" else exo[origins]
+        buffer[:, length + i, 0] = forecaster.step(buffer[:, i:i + length, :], step_exo)[:, 0]
+
+    predicted = target_scaler.inverse_transform(buffer[:, length:, 0].reshape(-1, 1)).reshape(n, horizon)
+    actual = sliding_window_view(target, horizon)[origins]
+    # A missing reading in an origin's history makes its whole rollout NaN, so
+    # non-finite predictions are left out like missing actuals
+    valid = np.isfinite(actual) & np.isfinite(predicted)
+    errors = np.where(valid, predicted - actual, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mape_valid = valid & (np.abs(actual) > MAPE_EPSILON)
+        ape = np.where(mape_valid, np.abs(errors) / np.abs(actual), 0.0)
+    return {
+        "building": building,
+        "origins": n,
+        "skipped": int((~np.isfinite(predicted).all(axis=1)).sum()),
+        "count": valid.sum(axis=0),
+        "abs_sum": np.abs(errors).sum(axis=0),
+        "sq_sum": (errors ** 2).sum(axis=0),
+        "ape_sum": ape.sum(axis=0),
+        "ape_count": mape_valid.sum(axis=0),
+    }
+
+
+def plan_shards(datasets, horizon, stride, shard_size, sequence_length=SEQUENCE_LENGTH):
+    """[(building, path, origins)] covering every origin of every dataset."""
+    shards = []
+    for building, path in datasets.items():
+        n = len(load_frame(path))
+        origins = np.arange(sequence_length, n - horizon + 1, stride)
+        if not len(origins):
+            logger.warning(f"{building}: {n} rows is too short for a {sequence_length}+{horizon} hour backtest")
+            continue
+        for start in range(0, len(origins), shard_size):
+            shards.append((building, path, origins[start:start + shard_size]))
+    return shards
+
+
+def summarize(totals):
+    """MAE, RMSE and MAPE (%) per horizon step and over all steps from summed errors."""
+
+    def metrics(count, abs_sum, sq_sum, ape_sum, ape_count):
+        return {
+            "mae": float(abs_sum / count) if count else None,
+            "rmse": float(math.sqrt(sq_sum / count)) if count else None,
+            "mape": float(100.0 * ape_sum / ape_count) if ape_count else None,
+        }
+
+    keys = ("count", "abs_sum", "sq_sum", "ape_sum", "ape_count")
+    per_step = [{"horizon": h + 1, **metrics(*(totals[key][h] for key in keys))}
+                for h in range(len(totals["count"]))]
+    return {
+        "origins": totals["origins"],
+        "skipped": totals["skipped"],
+        "overall": metrics(*(totals[key].sum() for key in keys)),
+        "per_horizon": per_step,
+    }
+
+
+def _add(totals, result):
+    if totals is None:
+        return {key: (value.copy() if isinstance(value, np.ndarray) else value)
+                for key, value in result.items() if key != "building"}
+    for key, value in result.items():
+        if key != "building":
+            totals[key] = totals[key] + value
+    return totals
+
+
+def run_backtest(datasets, horizon=24, stride=1, shard_size=4096, exo_mode="actual", workers=None,
+                 backend="keras", model_path=MODEL_PATH, feature_scaler_path=FEATURE_SCALER_PATH,
+                 target_scaler_path=TARGET_SCALER_PATH, lite_dir=TFLITE_MODEL_DIR):
+    """
+    Backtest `datasets` ({building: dataset path}) and return
+    {"buildings": {building: summary}, "all": summary}.
+    """
+    if exo_mode not in EXO_MODES:
+        raise ValueError(f"Unknown exo mode: {exo_mode}")
+    shards = plan_shards(datasets, horizon, stride, shard_size)
+    if not shards:
+        raise ValueError("No dataset is long enough to backtest")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shards)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    init_args = (backend, model_path, feature_scaler_path, target_scaler_path, lite_dir, threads)
+    logger.info(f"Backtesting {sum(len(origins) for _, _, origins in shards)} origins of {len(datasets)} datasets "
+                f"in {len(shards)} shards on {workers} worker(s)")
+
+    per_building = {}
+
+    def collect(done, result):
+        per_building[result["building"]] = _add(per_building.get(result["building"]), result)
+        logger.info(f"{done}/{len(shards)} shards done")
+
+    if workers == 1:
+        _init_worker(*init_args)
+        for done, shard in enumerate(shards, start=1):
+            collect(done, backtest_shard(*shard, horizon, exo_mode))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(backtest_shard, *shard, horizon, exo_mode) for shard in shards]
+            for done, future in enumerate(as_completed(futures), start=1):
+                collect(done, future.result())
+
+    combined = None
+    for totals in per_building.values():
+        combined = _add(combined, totals)
+    return {
+        "buildings": {building: summarize(per_building[building]) for building in sorted(per_building)},
+        "all": summarize(combined),
+    }
+
+
+def discover_datasets(pattern=DATASETS_GLOB):
+    """Return {building: dataset path} for every dataset matching the glob."""
+    return {os.path.basename(path)[:-len("_data.csv")]: path for path in sorted(glob.glob(pattern))}
+
+
+def _format(value):
+    return "       -" if value is None else f"{value:8.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the hybrid forecaster.")
+    parser.add_argument("--datasets", default=DATASETS_GLOB, help="glob of building datasets (default: %(default)s)")
+    parser.add_argument("--buildings", nargs="*", help="only backtest these buildings (e.g. Office School)")
+    parser.add_argument("--horizon", type=int, default=24, help="forecast steps per origin (default: %(default)s)")
+    parser.add_argument("--stride", type=int, default=1, help="hours between origins (default: %(default)s)")
+    parser.add_argument("--shard-size", type=int, default=4096, help="origins per batched rollout")
+    parser.add_argument("--exo", choices=EXO_MODES, default="actual",
+                        help="exogenous input per step: the predicted hour's, or the first hour's for all steps")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPUs)")
+    parser.add_argument("--backend", choices=("keras", "tflite"), default="keras")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--feature-scaler", default=FEATURE_SCALER_PATH)
+    parser.add_argument("--target-scaler", default=TARGET_SCALER_PATH)
+    parser.add_argument("--lite-dir", default=TFLITE_MODEL_DIR, help="TFLite bundle for --backend tflite")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    datasets = discover_datasets(args.datasets)
+    if args.buildings:
+        missing = set(args.buildings) - set(datasets)
+        if missing:
+            parser.error(f"No dataset for: {', '.join(sorted(missing))}")
+        datasets = {name: datasets[name] for name in args.buildings}
+    if not datasets:
+        parser.error(f"No datasets match {args.datasets}")
+
+    start = time.perf_counter()
+    report = run_backtest(datasets, args.horizon, args.stride, args.shard_size, args.exo, args.workers,
+                          args.backend, args.model, args.feature_scaler, args.target_scaler, args.lite_dir)
+    report["config"] = {
+        "horizon": args.horizon, "stride": args.stride, "exo": args.exo, "backend": args.backend,
+        "model": args.lite_dir if args.backend == "tflite" else args.model,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'building':<12} {'origins':>8} {'skipped':>8} {'MAE':>8} {'RMSE':>8} {'MAPE %':>8}")
+    for building, summary in list(report["buildings"].items()) + [("all", report["all"])]:
+        overall = summary["overall"]
+        print(f"{building:<12} {summary['origins']:>8} {summary['skipped']:>8} {_format(overall['mae'])} "
+              f"{_format(overall['rmse'])} {_format(overall['mape'])}")
+    print(f"\nPer-horizon errors written to {args.out} ({report['config']['seconds']}s)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark the multi-step forecast path before and after the tf.function rewrite.
+
+Compares the original loop (one `model.predict` call and one `np.concatenate`
+per horizon step) with `forecasting.iterative_forecast_backend`, reports the
+median latency per horizon and checks that both produce the same forecast.
+
+Run from the backend directory:
+    python benchmarks/bench_forecast.py --horizons 1 6 12 24 48 --repeats 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+from tensorflow.keras.models import load_model
+
+from forecasting import get_forecaster, iterative_forecast_backend
+
+MODEL_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting.h5"
+FEATURE_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_feature.save"
+TARGET_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_target.save"
+HISTORICAL_CSV_PATH = "prediction_model_files_docker/community_data.csv"
+SEQUENCE_LENGTH = 72
+
+# A typical operator scenario, in training feature order
+EXAMPLE_INPUTS = [0, 0, 0, 1, 17.0, 70.0, 60.0, 450, 150.0, 28.0, 60.0]
+
+
+def legacy_iterative_forecast(model, initial_sequence, exo_input, forecast_horizon):
+    """The original implementation: one Model.predict call per step."""
+    current_sequence = initial_sequence.copy()
+    final_prediction = None
+    for _ in range(forecast_horizon):
+        pred_scaled = model.predict([current_sequence, exo_input], verbose=0)
+        final_prediction = pred_scaled
+        pred_reshaped = np.expand_dims(pred_scaled, axis=1)
+        current_sequence = np.concatenate([current_sequence[:, 1:, :], pred_reshaped], axis=1)
+    return final_prediction
+
+
+def time_call(fn, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 6, 12, 24, 48])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    model = load_model(MODEL_PATH)
+    feature_scaler = joblib.load(FEATURE_SCALER_PATH)
+    target_scaler = joblib.load(TARGET_SCALER_PATH)
+
+    history = pd.read_csv(HISTORICAL_CSV_PATH)["Use [kW]"].values[-SEQUENCE_LENGTH:]
+    initial_sequence = target_scaler.transform(history.reshape(-1, 1))[np.newaxis, :, :]
+    exo_input = feature_scaler.transform(np.array(EXAMPLE_INPUTS, dtype=float).reshape(1, -1))
+
+    # Trace the tf.function once so the first horizon is not charged for it
+    forecaster = get_forecaster(model)
+    iterative_forecast_backend(forecaster, initial_sequence, exo_input, 1)
+
+    print(f"{'horizon':>8} {'predict loop [ms]':>18} {'fast path [ms]':>15} {'speedup':>8} {'max |diff|':>11}")
+    for horizon in args.horizons:
+        legacy_time, legacy = time_call(
+            lambda: legacy_iterative_forecast(model, initial_sequence, exo_input, horizon), args.repeats)
+        fast_time, fast = time_call(
+            lambda: iterative_forecast_backend(forecaster, initial_sequence, exo_input, horizon), args.repeats)
+        diff = float(np.max(np.abs(legacy - fast)))
+        print(f"{horizon:>8} {legacy_time * 1e3:>18.2f} {fast_time * 1e3:>15.2f} "
+              f"{legacy_time / fast_time:>7.1f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
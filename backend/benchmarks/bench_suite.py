@@ -0,0 +1,255 @@
+"""
+Reproducible benchmark suite for the data and serving hot paths.
+
+Generates synthetic building datasets (same columns as datasets/*_data.csv)
+of the requested sizes, times each stage the API relies on and records the
+results per commit, so slowdowns between versions show up as regressions.
+
+Run from the backend directory:
+    python benchmarks/bench_suite.py                                # 10k, 100k, 1M rows
+    python benchmarks/bench_suite.py --sizes 10000 2000000 --only parse_csv columnar_load
+    python benchmarks/bench_suite.py --fail-on-regression           # exit 1 on a regression
+
+Sizes are capped at --max-rows (default 2M): parsing and converting a CSV
+holds the whole file in memory as a DataFrame, so much larger datasets need
+more memory than the stages they measure. Synthetic datasets are written in
+chunks and each size builds a single BuildingData, so the suite itself adds
+no per-size copies on top of that.
+
+The /predict stages (and the data hot paths at a fixed size) are also
+covered by pytest-benchmark cases in tests/test_benchmarks.py.
+
+Datasets are cached in benchmarks/.data/. Each run is written to
+benchmarks/results/<timestamp>-<commit>.json and compared with --baseline
+(default: the most recent earlier result); a benchmark regresses when its
+median time grows by more than --threshold.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar
+from building_store import BuildingData, _load_building_columnar, _parse_building_csv
+from bulk_metrics import compute_bulk_metrics
+from serialization import consumption_rows_json
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+MAX_ROWS = 2_000_000
+GENERATE_CHUNK_ROWS = 500_000
+
+
+def synthetic_dataset(n_rows, seed=0):
+    """
+    Write (once) and return the path of a synthetic dataset with n_rows rows.
+    Rows are hourly up to 1M rows and one minute apart beyond that, so any
+    size stays within the datetime64[ns] range. The file is written in
+    chunks of GENERATE_CHUNK_ROWS rows.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"synthetic_{n_rows}_{seed}_data.csv")
+    if os.path.exists(path):
+        return path
+
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(hours=1) if n_rows <= 1_000_000 else pd.Timedelta(minutes=1)
+    start = pd.Timestamp("2000-01-01")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for first in range(0, n_rows, GENERATE_CHUNK_ROWS):
+            rows = min(GENERATE_CHUNK_ROWS, n_rows - first)
+            times = pd.date_range(start + first * step, periods=rows, freq=step)
+            synthetic_frame(times, rng).to_csv(f, index=False, header=first == 0)
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_frame(times, rng):
+    """Synthetic readings (datasets/*_data.csv columns) at the given times."""
+    n_rows = len(times)
+    hour = times.hour.to_numpy()
+    season = (times.month.to_numpy() % 12) // 3  # 0 winter .. 3 fall
+    frame = pd.DataFrame({"Time": times.strftime("%Y-%m-%d %H:%M:%S")})
+    for i, name in enumerate(["Winter", "Spring", "Summer", "Fall"]):
+        frame[name] = (season == i).astype(np.int64)
+    frame["Outdoor Temp (°C)"] = np.round(15 + 10 * np.sin(2 * np.pi * hour / 24) + rng.normal(0, 2, n_rows), 2)
+    frame["Humidity (%)"] = np.round(rng.uniform(30, 90, n_rows), 2)
+    frame["Cloud Cover (%)"] = np.round(rng.uniform(0, 100, n_rows), 2)
+    frame["Occupancy"] = rng.integers(0, 500, n_rows)
+    frame["Special Equipment [kW]"] = np.round(rng.uniform(50, 200, n_rows), 3)
+    frame["Lighting [kW]"] = np.round(rng.uniform(5, 40, n_rows), 3)
+    frame["HVAC [kW]"] = np.round(rng.uniform(20, 120, n_rows), 3)
+    frame["Use [kW]"] = np.round(frame["Special Equipment [kW]"] + frame["Lighting [kW]"] + frame["HVAC [kW]"]
+                                 + rng.normal(0, 5, n_rows), 3)
+    return frame
+
+
+def time_call(fn, repeats, setup=None):
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def building_data(path):
+    timestamps, columns, date_column, energy_column = _load_building_columnar(path)
+    return BuildingData("synthetic", path, None, timestamps, columns, date_column, energy_column)
+
+
+def month_range(data):
+    """A 30-day range in the middle of the dataset, like a dashboard query."""
+    middle = data.timestamps[len(data.timestamps) // 2].astype("datetime64[D]")
+    return middle.astype("datetime64[ns]"), (middle + np.timedelta64(30, "D")).astype("datetime64[ns]")
+
+
+def full_range(data):
+    return data.timestamps[0], data.timestamps[-1] + np.timedelta64(1, "s")
+
+
+def metrics_query(data, start, end):
+    lo, hi = data.row_bounds(start, end)
+    data.total(lo, hi), data.peak(lo, hi), data.count(lo, hi)
+    np.nanargmax(data.hourly_means(lo, hi))
+
+
+def benchmarks(path):
+    """{name: (callable, setup or None)} for one dataset; setup runs untimed before each repeat."""
+    columnar_path = columnar.columnar_dir(path)
+
+    def ensure_columnar():
+        if not columnar.is_fresh(path):
+            columnar.convert_csv(path)
+
+    def drop_columnar():
+        shutil.rmtree(columnar_path, ignore_errors=True)
+
+    ensure_columnar()
+    # One snapshot per size: the bulk benchmark queries it three times, like three buildings
+    data = building_data(path)
+    month_start, month_end = month_range(data)
+    start, end = full_range(data)
+    lo, hi = data.row_bounds(month_start, month_end)
+
+    return {
+        "parse_csv": (lambda: _parse_building_csv(path), None),
+        "columnar_convert": (lambda: columnar.convert_csv(path), drop_columnar),
+        "columnar_load": (lambda: _load_building_columnar(path), ensure_columnar),
+        "build_rollups": (lambda: BuildingData("synthetic", path, None, data.timestamps, data.columns,
+                                               data.date_column, data.energy_column), None),
+        "metrics_month": (lambda: metrics_query(data, month_start, month_end), None),
+        "metrics_full": (lambda: metrics_query(data, start, end), None),
+        "daily_means_full": (lambda: data.daily_means(start, end), None),
+        "consumption_rows_month": (lambda: consumption_rows_json(data.timestamps[lo:hi], data.energy[lo:hi]), None),
+        "bulk_metrics_3x_full": (lambda: compute_bulk_metrics([data] * 3, start, end), None),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=BENCH_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latest_result(exclude=None):
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(results, baseline, threshold):
+    """[(name, baseline median, median, relative change, regressed)] for benchmarks in both runs."""
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = result["median_s"] / previous["median_s"] - 1.0
+        rows.append((name, previous["median_s"], result["median_s"], change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data and serving hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="dataset rows")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS,
+                        help="largest dataset size accepted (default: %(default)s)")
+    parser.add_argument("--baseline", help="result file to compare against (default: the latest earlier one)")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default: %(default)s)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true", help="do not record this run")
+    args = parser.parse_args()
+    too_large = [size for size in args.sizes if size > args.max_rows]
+    if too_large:
+        parser.error(f"sizes {too_large} exceed --max-rows {args.max_rows}: parsing a CSV that large "
+                     f"needs several GB of memory; raise --max-rows if the machine has it")
+
+    results = {}
+    for size in args.sizes:
+        path = synthetic_dataset(size, args.seed)
+        for name, (fn, setup) in benchmarks(path).items():
+            if args.only and name not in args.only:
+                continue
+            # Large datasets: fewer repeats for the slow whole-file stages
+            repeats = max(1, args.repeats // 5) if size > 1_000_000 and name in ("parse_csv", "columnar_convert") \
+                else args.repeats
+            timings = time_call(fn, repeats, setup)
+            key = f"{name}@{size}"
+            results[key] = {"median_s": statistics.median(timings), "min_s": min(timings), "repeats": repeats}
+            print(f"{key:<36} median {results[key]['median_s'] * 1000:>10.2f} ms   min {min(timings) * 1000:>10.2f} ms")
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    saved = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        saved = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{run['commit']}.json")
+        with open(saved, "w") as f:
+            json.dump(run, f, indent=2)
+
+    baseline_path = args.baseline or latest_result(exclude=saved)
+    if baseline_path is None:
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline["results"], args.threshold)
+    print(f"\nCompared with {os.path.basename(baseline_path)} (commit {baseline.get('commit')}):")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<36} {before * 1000:>10.2f} -> {after * 1000:>10.2f} ms  {change:+7.1%}{flag}")
+    if args.fail_on_regression and any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Load test for a running server with mixed /predict and /consumption traffic.
+
+Each of --concurrency client threads sends requests back to back for
+--duration seconds; a request is a /predict with probability
+--predict-ratio and a /consumption query otherwise. Reports throughput,
+errors and p50/p90/p99/max latency per route.
+
+Start the server first, e.g.
+    gunicorn -c gunicorn.conf.py wsgi:app
+then, from the backend directory:
+    python benchmarks/load_test.py --url http://127.0.0.1:5001 --duration 30 --concurrency 16
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+# A typical operator scenario, in training feature order
+EXAMPLE_INPUTS = {
+    "Winter": 0, "Spring": 0, "Summer": 0, "Fall": 1,
+    "Outdoor Temp (°C)": 17.0, "Humidity (%)": 70.0, "Cloud Cover (%)": 60.0,
+    "Occupancy": 450, "Special Equipment [kW]": 150.0, "Lighting [kW]": 28.0, "HVAC [kW]": 60.0,
+}
+
+
+def predict_request(base_url, rng, max_hours_ahead):
+    # Vary the inputs so the trajectory cache does not answer everything
+    inputs = dict(EXAMPLE_INPUTS, **{"Outdoor Temp (°C)": round(rng.uniform(-5, 35), 1)})
+    body = json.dumps({"hours_ahead": rng.randint(1, max_hours_ahead), "user_inputs": inputs}).encode()
+    return urllib.request.Request(f"{base_url}/predict", data=body, headers={"Content-Type": "application/json"})
+
+
+def consumption_request(base_url, rng, buildings, start_date, end_date):
+    params = {"building": rng.choice(buildings), "start_date": start_date, "end_date": end_date,
+              "view_type": rng.choice(["hourly", "daily"])}
+    return urllib.request.Request(f"{base_url}/consumption?{urllib.parse.urlencode(params)}")
+
+
+def client(args, deadline, seed, results, lock):
+    rng = random.Random(seed)
+    local = []
+    while time.perf_counter() < deadline:
+        if rng.random() < args.predict_ratio:
+            route, req = "/predict", predict_request(args.url, rng, args.max_hours_ahead)
+        else:
+            route, req = "/consumption", consumption_request(args.url, rng, args.buildings, args.start_date,
+                                                             args.end_date)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=args.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = None
+        local.append((route, status, time.perf_counter() - start))
+    with lock:
+        results.extend(local)
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for route in sorted({route for route, _, _ in results}):
+        rows = [(status, latency) for r, status, latency in results if r == route]
+        latencies = np.array([latency for status, latency in rows if status == 200]) * 1000.0
+        summary[route] = {
+            "requests": len(rows),
+            "ok": len(latencies),
+            "errors": {str(status): sum(1 for s, _ in rows if s == status)
+                       for status in sorted({s for s, _ in rows if s != 200}, key=str)},
+            "throughput_rps": len(rows) / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p90_ms": float(np.percentile(latencies, 90)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            "max_ms": float(latencies.max()) if len(latencies) else None,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed /predict + /consumption load test.")
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads (default: %(default)s)")
+    parser.add_argument("--predict-ratio", type=float, default=0.2,
+                        help="fraction of requests that are /predict (default: %(default)s)")
+    parser.add_argument("--max-hours-ahead", type=int, default=24)
+    parser.add_argument("--buildings", nargs="+", default=["Hospital", "House 1", "House 2", "Industry", "Office",
+                                                            "School"])
+    parser.add_argument("--start-date", default="2023-01-01")
+    parser.add_argument("--end-date", default="2023-01-31")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=client, args=(args, deadline, args.seed + i, results, lock))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, elapsed)
+    print(f"{args.concurrency} clients, {elapsed:.1f}s, predict ratio {args.predict_ratio}")
+    print(f"{'route':<14} {'requests':>9} {'ok':>7} {'rps':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route, s in summary.items():
+        cells = [f"{s[key]:.1f}" if s[key] is not None else "-" for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms")]
+        print(f"{route:<14} {s['requests']:>9} {s['ok']:>7} {s['throughput_rps']:>8.1f} "
+              + " ".join(f"{cell:>9}" for cell in cells))
+        if s["errors"]:
+            print(f"{'':<14} errors: {s['errors']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "elapsed_s": elapsed, "routes": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+import os
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+import columnar
+from ingest_log import IngestLog, INGEST_DIR, READING_COLUMNS as INGEST_COLUMNS, TIME_COLUMN as INGEST_TIME_COLUMN
+
+logger = logging.getLogger(__name__)
+
+DATASETS_DIR = "datasets"
+
+# Candidate column names, in priority order ('Time' is what our datasets use)
+TIME_COLUMNS = ['Time', 'timestamp', 'date', 'DateTime']
+ENERGY_COLUMNS = ['Use [kW]', 'Energy [kW]', 'Consumption [kW]', 'Power [kW]']
+INGEST_ENERGY_COLUMN = 'Use [kW]'
+
+# Display names that do not map to a file name by simply removing spaces
+BUILDING_NAME_MAP = {
+    "House 1": "House1",
+    "House 2": "House2",
+}
+
+
+def normalize_building_name(building):
+    """
+    Map a building name as shown in the dashboard (e.g. "House 1") to the
+    prefix of its dataset file (e.g. "House1").
+    """
+    return BUILDING_NAME_MAP.get(building, building.replace(" ", ""))
+
+
+class DatasetFormatError(ValueError):
+    """Raised when a dataset is missing its time or energy column."""
+
+
+def _hour_of_day(timestamps):
+    return (timestamps.astype("datetime64[h]") - timestamps.astype("datetime64[D]")).astype(np.int64)
+
+
+def _day_offsets(timestamps, first_row=0):
+    """Row offsets where each calendar day starts in sorted timestamps, plus the end offset."""
+    days = timestamps.astype("datetime64[D]")
+    if not len(days):
+        return np.array([first_row])
+    return first_row + np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1, [len(days)]))
+
+
+class _AppendBuffer:
+    """
+    Growable backing array for values that are only ever appended to.
+
+    Snapshots hold read-only views of a prefix. Appending writes past the end
+    of every existing view, so older snapshots stay valid without copying,
+    and capacity grows geometrically, so appends cost amortized O(values
+    added). Extending a prefix that another snapshot has already extended
+    copies it first.
+    """
+
+    def __init__(self, values, dtype=None):
+        values = np.asarray(values, dtype=dtype)
+        self._data = np.empty(_grown(len(values)), dtype=values.dtype)
+        self._data[:len(values)] = values
+        self.length = len(values)
+
+    def view(self):
+        view = self._data[:self.length]
+        view.setflags(write=False)
+        return view
+
+    def extend(self, length, values):
+        """Append `values` after the first `length` elements; returns the buffer holding the result."""
+        buffer = self if length == self.length else _AppendBuffer(self._data[:length])
+        total = length + len(values)
+        if total > len(buffer._data):
+            data = np.empty(_grown(total), dtype=buffer._data.dtype)
+            data[:length] = buffer._data[:length]
+            buffer._data = data
+        buffer._data[length:total] = values
+        buffer.length = total
+        return buffer
+
+
+def _grown(n):
+    return n + n // 2 + 1024
+
+
+class BuildingData:
+    """
+    Parsed, immutable snapshot of one building dataset.
+
+    The rows are sorted by time and stored as typed columns: `timestamps` is a
+    datetime64[ns] array and `columns` maps every other CSV header to a NumPy
+    array. When the dataset comes from a columnar copy these arrays are
+    read-only memory maps shared by all processes. `frame` builds a DataFrame
+    view indexed by a sorted DatetimeIndex on demand.
+
+    Daily and hour-of-day rollups of the energy column are precomputed as
+    prefix sums when the snapshot is built, so any date range is answered with
+    binary searches plus work proportional to the output size. Hour-of-day
+    sums are kept per hour bucket (the bucket's row numbers and prefix sums
+    over them), which costs O(n) memory in total rather than O(24 n).
+
+    `append` derives the next snapshot when readings arrive after the last
+    one, rolling up only the new rows.
+    """
+
+    def __init__(self, building, path, version, timestamps, columns, date_column, energy_column):
+        self.building = building
+        self.path = path
+        self.version = version  # (source mtime_ns, ingested record count)
+        self.timestamps = timestamps
+        self.columns = columns
+        self.date_column = date_column
+        self.energy_column = energy_column
+        self.energy = columns[energy_column]
+        self._frame = None
+        self._buffers = None  # name -> _AppendBuffer, created by the first append
+        self._build_rollups()
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            index = pd.DatetimeIndex(self.timestamps, name=self.date_column)
+            self._frame = pd.DataFrame(self.columns, index=index)
+        return self._frame
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _build_rollups(self):
+        # Missing readings are skipped, like pandas sum()/mean() do
+        valid = ~np.isnan(self.energy)
+        energy = np.where(valid, self.energy, 0.0)
+
+        # Prefix sums over rows: sum of rows [lo, hi) = cumsum[hi] - cumsum[lo]
+        self._cumsum = np.concatenate(([0.0], np.cumsum(energy)))
+        self._cumcount = np.concatenate(([0], np.cumsum(valid, dtype=np.int64)))
+
+        # Hour-of-day buckets: ascending row numbers of each hour and prefix sums over them
+        hours = _hour_of_day(self.timestamps).astype(np.uint8)
+        order = np.argsort(hours, kind="stable")
+        bounds = np.searchsorted(hours[order], np.arange(25))
+        self._hour_rows, self._hour_cumsum, self._hour_cumcount = [], [], []
+        for hour in range(24):
+            rows = order[bounds[hour]:bounds[hour + 1]]
+            self._hour_rows.append(rows)
+            self._hour_cumsum.append(np.concatenate(([0.0], np.cumsum(energy[rows]))))
+            self._hour_cumcount.append(np.concatenate(([0], np.cumsum(valid[rows], dtype=np.int64))))
+
+        # Daily means: rows are sorted, so each calendar day is a contiguous run
+        self._set_days(_day_offsets(self.timestamps))
+
+    def _set_days(self, offsets, keep_days=0):
+        """Daily means for the days starting at `offsets`, after the first `keep_days` existing ones."""
+        day_sums = np.diff(self._cumsum[offsets])
+        day_counts = np.diff(self._cumcount[offsets])
+        day_starts = self.timestamps[offsets[:-1]].astype("datetime64[D]").astype("datetime64[ns]")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            day_means = day_sums / day_counts
+        if keep_days:
+            self._day_offsets = np.concatenate((self._day_offsets[:keep_days], offsets))
+            self.day_starts = np.concatenate((self.day_starts[:keep_days], day_starts))
+            self.day_means = np.concatenate((self.day_means[:keep_days], day_means))
+        else:
+            self._day_offsets, self.day_starts, self.day_means = offsets, day_starts, day_means
+
+    def append(self, version, timestamps, columns):
+        """
+        Return a new snapshot with rows appended. `timestamps` must be sorted,
+        unique and later than the last existing one; `columns` has the same
+        keys as this snapshot's. Columns and rollups grow through shared
+        _AppendBuffers and only the new rows (plus the last, possibly partial,
+        day) are rolled up, so this costs O(rows added). This snapshot is not
+        modified.
+        """
+        n = len(self)
+        if len(timestamps) and n and timestamps[0] <= self.timestamps[-1]:
+            raise ValueError("Appended readings must be later than the last existing one")
+        buffers = self._buffers or {}
+        new_buffers = {}
+
+        def grow(name, current, values, dtype=None):
+            buffer = buffers.get(name) or _AppendBuffer(current, dtype)
+            buffer = buffer.extend(len(current), values)
+            new_buffers[name] = buffer
+            return buffer.view()
+
+        energy = np.asarray(columns[self.energy_column], dtype=np.float64)
+        valid = ~np.isnan(energy)
+        filled = np.where(valid, energy, 0.0)
+
+        data = BuildingData.__new__(BuildingData)
+        data.building, data.path, data.version = self.building, self.path, version
+        data.date_column, data.energy_column = self.date_column, self.energy_column
+        data._frame = None
+        data.timestamps = grow("time", self.timestamps, np.asarray(timestamps, dtype="datetime64[ns]"))
+        data.columns = {column: grow(("column", column), values, columns[column], np.float64)
+                        for column, values in self.columns.items()}
+        data.energy = data.columns[self.energy_column]
+        # Prefix sums continue sequentially, so they match a full rebuild exactly
+        data._cumsum = grow("cumsum", self._cumsum, np.cumsum(np.concatenate(([self._cumsum[-1]], filled)))[1:])
+        data._cumcount = grow("cumcount", self._cumcount, self._cumcount[-1] + np.cumsum(valid, dtype=np.int64))
+
+        hours = _hour_of_day(data.timestamps[n:])
+        data._hour_rows, data._hour_cumsum, data._hour_cumcount = [], [], []
+        for hour in range(24):
+            in_hour = hours == hour
+            cumsum, cumcount = self._hour_cumsum[hour], self._hour_cumcount[hour]
+            data._hour_rows.append(grow(("hour_rows", hour), self._hour_rows[hour], n + np.flatnonzero(in_hour)))
+            data._hour_cumsum.append(grow(("hour_cumsum", hour), cumsum,
+                                          np.cumsum(np.concatenate(([cumsum[-1]], filled[in_hour])))[1:]))
+            data._hour_cumcount.append(grow(("hour_cumcount", hour), cumcount,
+                                            cumcount[-1] + np.cumsum(valid[in_hour], dtype=np.int64)))
+        data._buffers = new_buffers
+
+        # Re-roll the last existing day, which the new rows may continue
+        keep_days = max(len(self._day_offsets) - 2, 0)
+        first_row = int(self._day_offsets[keep_days]) if n else 0
+        data._day_offsets, data.day_starts, data.day_means = self._day_offsets, self.day_starts, self.day_means
+        data._set_days(_day_offsets(data.timestamps[first_row:], first_row), keep_days)
+        return data
+
+    def row_bounds(self, start, end):
+        """
+        Binary-search the sorted timestamps and return the row positions
+        [lo, hi) of readings with start <= timestamp < end.
+        """
+        lo = int(np.searchsorted(self.timestamps, start, side="left"))
+        hi = int(np.searchsorted(self.timestamps, end, side="left"))
+        return lo, max(lo, hi)
+
+    def daily_means(self, start, end):
+        """
+        Return (day_starts, mean consumption) for the calendar days that
+        start within [start, end).
+        """
+        lo = int(np.searchsorted(self.day_starts, start, side="left"))
+        hi = int(np.searchsorted(self.day_starts, end, side="left"))
+        return self.day_starts[lo:hi], self.day_means[lo:hi]
+
+    def total(self, lo, hi):
+        return self._cumsum[hi] - self._cumsum[lo]
+
+    def count(self, lo, hi):
+        return int(self._cumcount[hi] - self._cumcount[lo])
+
+    def peak(self, lo, hi):
+        return np.nanmax(self.energy[lo:hi])
+
+    def hourly_means(self, lo, hi):
+        """
+        Mean consumption per hour of day (length 24, NaN for hours without
+        readings) over rows [lo, hi).
+        """
+        sums = np.empty(24)
+        counts = np.empty(24, dtype=np.int64)
+        for hour in range(24):
+            a, b = np.searchsorted(self._hour_rows[hour], (lo, hi))
+            sums[hour] = self._hour_cumsum[hour][b] - self._hour_cumsum[hour][a]
+            counts[hour] = self._hour_cumcount[hour][b] - self._hour_cumcount[hour][a]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _detect_columns(names):
+    date_column = next((col for col in TIME_COLUMNS if col in names), None)
+    if not date_column:
+        logger.error(f"No valid date column found. Available columns: {list(names)}")
+        raise DatasetFormatError("No valid date/time column found in the dataset")
+
+    energy_column = next((col for col in ENERGY_COLUMNS if col in names), None)
+    if not energy_column:
+        logger.error(f"No valid energy column found. Available columns: {list(names)}")
+        raise DatasetFormatError("No valid energy consumption column found in the dataset")
+    return date_column, energy_column
+
+
+def _parse_building_csv(path):
+    """
+    Parse a building CSV once: detect the time and energy columns, convert the
+    time column to datetime64 and sort the rows by it.
+    Returns (timestamps, columns, date_column, energy_column).
+    """
+    df = pd.read_csv(path)
+    logger.info(f"Loaded {path} with columns: {df.columns.tolist()}")
+    date_column, energy_column = _detect_columns(df.columns)
+
+    timestamps = pd.to_datetime(df.pop(date_column)).values.astype("datetime64[ns]")
+    if not (timestamps[1:] >= timestamps[:-1]).all():
+        order = np.argsort(timestamps, kind="mergesort")
+        timestamps = timestamps[order]
+        df = df.iloc[order]
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    columns[energy_column] = columns[energy_column].astype(np.float64)
+    return timestamps, columns, date_column, energy_column
+
+
+def _load_building_columnar(path):
+    """
+    Memory-map the columnar copy of a building CSV (see columnar.py).
+    Returns (timestamps, columns, date_column, energy_column).
+    """
+    timestamps, columns, meta = columnar.load_columns(columnar.columnar_dir(path))
+    logger.info(f"Mapped columnar copy of {path} with columns: {meta['columns']}")
+    if timestamps is None:
+        _detect_columns([])
+    date_column = meta["time_column"]
+    _, energy_column = _detect_columns([date_column] + meta["columns"])
+    if columns[energy_column].dtype != np.float64:
+        columns[energy_column] = columns[energy_column].astype(np.float64)
+    return timestamps, columns, date_column, energy_column
+
+
+def _reading_columns(records, columns, energy_column):
+    """
+    Ingested records as (timestamps, columns) with the dataset's columns;
+    columns that readings do not carry are NaN.
+    """
+    timestamps = records[INGEST_TIME_COLUMN].astype("datetime64[ns]")
+    values = {}
+    for column in columns:
+        source = INGEST_ENERGY_COLUMN if column == energy_column else column
+        if source in INGEST_COLUMNS:
+            values[column] = records[source].astype(np.float64)
+        else:
+            values[column] = np.full(len(records), np.nan)
+    return timestamps, values
+
+
+def _sort_unique(timestamps, columns):
+    """Sort rows by time, keeping the last row (in input order) for each timestamp."""
+    order = np.argsort(timestamps, kind="mergesort")
+    timestamps = timestamps[order]
+    # Stable sort keeps arrival order within a timestamp, so keep the last one
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = timestamps[1:] != timestamps[:-1]
+    index = order[keep]
+    return timestamps[keep], {column: values[index] for column, values in columns.items()}
+
+
+def _merge_readings(timestamps, columns, records, energy_column):
+    """
+    Merge ingested records into a parsed dataset. A reading for a timestamp
+    that already exists replaces the earlier value.
+    Returns new (timestamps, columns); the inputs are not modified.
+    """
+    if not len(records):
+        return timestamps, columns
+    new_timestamps, new_columns = _reading_columns(records, columns, energy_column)
+    merged_timestamps = np.concatenate([timestamps, new_timestamps])
+    merged = {column: np.concatenate([np.asarray(values, dtype=np.float64), new_columns[column]])
+              for column, values in columns.items()}
+    return _sort_unique(merged_timestamps, merged)
+
+
+def _append_readings(data, version, records):
+    """
+    Snapshot of `data` with newly ingested records appended, or None when a
+    record is not later than the last existing reading (out-of-order and
+    replacing readings need the full merge).
+    """
+    timestamps, columns = _sort_unique(*_reading_columns(records, data.columns, data.energy_column))
+    if len(data) and len(timestamps) and timestamps[0] <= data.timestamps[-1]:
+        return None
+    return data.append(version, timestamps, columns)
+
+
+class BuildingDataStore:
+    """
+    Process-wide cache of parsed building datasets.
+
+    Each `datasets/<Building>_data.csv` file is loaded on first use, from its
+    memory-mapped columnar copy when that is up to date and by parsing the CSV
+    otherwise; later lookups only stat the file and reload it when its mtime
+    changes. Readings appended to the building's IngestLog are merged in as
+    they arrive, reading only the new records. Snapshots are replaced
+    atomically, so readers never see a half-loaded dataset.
+    """
+
+    def __init__(self, datasets_dir=DATASETS_DIR, ingest_log=None):
+        self.datasets_dir = datasets_dir
+        self.ingest_log = ingest_log
+        self._entries = {}
+        self._sources = {}   # building -> (mtime_ns, timestamps, columns, date_column, energy_column)
+        self._readings = {}  # building -> batches of ingested records read so far
+        self._lock = threading.Lock()
+
+    def path_for(self, normalized_building):
+        return os.path.join(self.datasets_dir, f"{normalized_building}_data.csv")
+
+    def buildings(self):
+        """Normalized names of the buildings with a dataset file, sorted."""
+        suffix = "_data.csv"
+        try:
+            names = os.listdir(self.datasets_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(suffix)] for name in names if name.endswith(suffix))
+
+    def _version(self, normalized_building):
+        path = self.path_for(normalized_building)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            # A columnar copy may exist without its CSV
+            try:
+                mtime_ns = os.stat(os.path.join(columnar.columnar_dir(path), "meta.json")).st_mtime_ns
+            except FileNotFoundError:
+                mtime_ns = None
+        record_count = self.ingest_log.record_count(normalized_building) if self.ingest_log else 0
+        if mtime_ns is None and record_count == 0:
+            raise FileNotFoundError(path)
+        return mtime_ns, record_count
+
+    def get(self, normalized_building):
+        """
+        Return the BuildingData for a normalized building name, reloading the
+        CSV if it changed on disk and merging newly ingested readings.
+        Raises FileNotFoundError if there is neither a CSV nor ingested data.
+        """
+        version = self._version(normalized_building)
+
+        entry = self._entries.get(normalized_building)
+        if entry is not None and entry.version == version:
+            return entry
+
+        with self._lock:
+            # Another thread may have reloaded it while we were waiting
+            entry = self._entries.get(normalized_building)
+            if entry is None or entry.version != version:
+                entry = self._build(normalized_building, version)
+                self._entries[normalized_building] = entry
+            return entry
+
+    def _build(self, normalized_building, version):
+        mtime_ns, record_count = version
+        path = self.path_for(normalized_building)
+
+        if mtime_ns is None:
+            # Building only known from ingested readings
+            timestamps = np.empty(0, dtype="datetime64[ns]")
+            columns = {column: np.empty(0) for column in INGEST_COLUMNS}
+            date_column, energy_column = INGEST_TIME_COLUMN, INGEST_ENERGY_COLUMN
+        else:
+            source = self._sources.get(normalized_building)
+            if source is None or source[0] != mtime_ns:
+                # Prefer the memory-mapped columnar copy over parsing the CSV
+                if columnar.is_fresh(path):
+                    source = (mtime_ns,) + _load_building_columnar(path)
+                elif columnar.is_orphaned(path):
+                    logger.warning(f"{path} is missing; serving its columnar copy, which may be stale")
+                    source = (mtime_ns,) + _load_building_columnar(path)
+                else:
+                    logger.info(f"Reading data from: {path}")
+                    source = (mtime_ns,) + _parse_building_csv(path)
+                self._sources[normalized_building] = source
+            _, timestamps, columns, date_column, energy_column = source
+
+        if record_count:
+            batches = self._readings.setdefault(normalized_building, [])
+            seen = sum(len(batch) for batch in batches)
+            if record_count > seen:
+                new = self.ingest_log.read(normalized_building, start=seen)
+                batches.append(new)
+                # Readings that arrive in time order extend the current snapshot
+                entry = self._entries.get(normalized_building)
+                if entry is not None and entry.version == (mtime_ns, seen):
+                    appended = _append_readings(entry, version, new)
+                    if appended is not None:
+                        return appended
+            batches[:] = [np.concatenate(batches)]
+            timestamps, columns = _merge_readings(timestamps, columns, batches[0], energy_column)
+
+        return BuildingData(normalized_building, path, version, timestamps, columns, date_column, energy_column)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sources.clear()
+            self._readings.clear()
+
+
+reading_log = IngestLog(INGEST_DIR)
+building_store = BuildingDataStore(ingest_log=reading_log)
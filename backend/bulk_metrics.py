@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+HOUR = np.timedelta64(1, "h")
+
+
+def _peak_hour_label(hourly_means):
+    if np.isnan(hourly_means).all():
+        return None
+    peak_hour = int(np.nanargmax(hourly_means))
+    return f"{peak_hour:02d}:00 - {(peak_hour + 1):02d}:00"
+
+
+def compute_bulk_metrics(datasets, start, end):
+    """
+    /metrics for several buildings at once, plus community totals.
+
+    `datasets` is a list of BuildingData. The readings of every building in
+    [start, end) are scattered onto one stacked (building x hour) grid of
+    sums, counts and maxima in a single pass, and all metrics are reductions
+    of that grid along the hour axis (per building) or the building axis
+    (community load per hour). Returns ([per-building metrics or None when
+    the building has no readings in the range], community metrics or None).
+    """
+    bounds = [data.row_bounds(start, end) for data in datasets]
+    timestamps = [data.timestamps[lo:hi].astype("datetime64[h]") for data, (lo, hi) in zip(datasets, bounds)]
+    energy = [data.energy[lo:hi] for data, (lo, hi) in zip(datasets, bounds)]
+    non_empty = [t for t in timestamps if len(t)]
+    if not non_empty:
+        return [None] * len(datasets), None
+
+    # The grid only spans hours that actually have readings
+    grid_start = min(t[0] for t in non_empty)
+    n_hours = int((max(t[-1] for t in non_empty) - grid_start) / HOUR) + 1
+    n_buildings = len(datasets)
+
+    hours = np.concatenate(timestamps)
+    values = np.concatenate(energy)
+    rows = np.repeat(np.arange(n_buildings), [len(t) for t in timestamps])
+    cells = rows * n_hours + ((hours - grid_start) / HOUR).astype(np.int64)
+    valid = ~np.isnan(values)
+    cells, values = cells[valid], values[valid]
+
+    size = n_buildings * n_hours
+    sums = np.bincount(cells, weights=values, minlength=size).reshape(n_buildings, n_hours)
+    counts = np.bincount(cells, minlength=size).reshape(n_buildings, n_hours)
+    maxima = np.full(size, -np.inf)
+    np.maximum.at(maxima, cells, values)
+    maxima = maxima.reshape(n_buildings, n_hours)
+
+    # Hour of day of every grid column, as a (n_hours, 24) indicator matrix
+    first_hour = int((grid_start - grid_start.astype("datetime64[D]")) / HOUR)
+    hour_of_day = (first_hour + np.arange(n_hours)) % 24
+    indicator = np.zeros((n_hours, 24))
+    indicator[np.arange(n_hours), hour_of_day] = 1.0
+
+    totals = sums.sum(axis=1)
+    reading_counts = counts.sum(axis=1)
+    peaks = maxima.max(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hourly_means = (sums @ indicator) / (counts @ indicator)
+        averages = totals / reading_counts
+
+    results = []
+    for i in range(n_buildings):
+        if reading_counts[i] == 0:
+            results.append(None)
+            continue
+        results.append({
+            "total_consumption": float(totals[i]),
+            "peak_demand": float(peaks[i]),
+            "peak_hour": _peak_hour_label(hourly_means[i]),
+            "average_consumption": float(averages[i]),
+        })
+
+    # Community: the summed load of all buildings per hour
+    community_load = sums.sum(axis=0)
+    covered = counts.sum(axis=0) > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        community_hourly_means = (community_load[covered] @ indicator[covered]) / indicator[covered].sum(axis=0)
+    community = {
+        "buildings": int((reading_counts > 0).sum()),
+        "total_consumption": float(totals.sum()),
+        "peak_demand": float(community_load[covered].max()),
+        "peak_hour": _peak_hour_label(community_hourly_means),
+        "average_consumption": float(community_load[covered].mean()),
+        "sum_of_building_peaks": float(peaks[reading_counts > 0].sum()),
+    }
+    return results, community
+
+
+class BulkMetricsCache:
+    """
+    Thread-safe LRU cache of /metrics/bulk results. Keys include every
+    building's data version, so new files or ingested readings are never
+    served stale and old entries simply age out.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(datasets, start, end):
+        return tuple((data.building, data.version) for data in datasets), str(start), str(end)
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,220 @@
+"""
+Memory-mappable columnar copies of the CSV datasets.
+
+`python columnar.py datasets/*.csv` converts each CSV into a sibling directory
+(`datasets/Hospital_data.csv` -> `datasets/Hospital_data.columnar/`) holding
+one `.npy` file per numeric column, the time column as datetime64[ns] and a
+`meta.json` describing the columns and the source file they came from.
+
+Loading memory-maps the `.npy` files read-only, so there is no text parsing at
+startup and every process that opens the same dataset shares the same page
+cache pages instead of holding a private copy.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+TIME_COLUMNS = ['Time', 'timestamp', 'date', 'DateTime']
+DEFAULT_INPUTS = ["datasets/*_data.csv", "prediction_model_files_docker/community_data.csv"]
+
+
+def columnar_dir(csv_path):
+    """Directory holding the columnar copy of a CSV file."""
+    root, _ = os.path.splitext(csv_path)
+    return root + ".columnar"
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_csv(csv_path, time_column=None):
+    """
+    Parse a CSV the way columnar copies store it: the time column as
+    datetime64[ns] with rows sorted by it, and the numeric columns (others
+    are skipped). Returns (time_column or None, timestamps or None, {column: array}).
+    """
+    df = pd.read_csv(csv_path)
+    if time_column is None:
+        time_column = next((col for col in TIME_COLUMNS if col in df.columns), None)
+
+    timestamps = None
+    if time_column is not None:
+        timestamps = pd.to_datetime(df.pop(time_column)).values.astype("datetime64[ns]")
+        if not (timestamps[1:] >= timestamps[:-1]).all():
+            order = np.argsort(timestamps, kind="mergesort")
+            timestamps = timestamps[order]
+            df = df.iloc[order]
+    columns = {}
+    for column in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            logger.warning(f"Skipping non-numeric column {column!r} in {csv_path}")
+            continue
+        columns[column] = np.ascontiguousarray(df[column].to_numpy())
+    return time_column, timestamps, columns
+
+
+def convert_csv(csv_path, time_column=None):
+    """
+    Parse a CSV once and write its columnar copy. Rows are sorted by time.
+    Non-numeric columns other than the time column are skipped.
+    Returns the output directory.
+    """
+    time_column, timestamps, values = _read_csv(csv_path, time_column)
+    columns = list(values)
+    files = [f"col_{i:03d}.npy" for i in range(len(columns))]
+    arrays = dict(zip(files, values.values()))
+    rows = len(timestamps) if timestamps is not None else len(next(iter(values.values()), []))
+
+    stat = os.stat(csv_path)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "rows": rows,
+        "time_column": time_column,
+        "time_file": "time.npy" if time_column is not None else None,
+        "columns": columns,
+        "files": files,
+        "source": {
+            "path": os.path.basename(csv_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _file_digest(csv_path),
+        },
+    }
+
+    # Write next to the final location and swap it in, so readers see either
+    # the old or the new copy. Files already mapped by readers stay valid.
+    out_dir = columnar_dir(csv_path)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    if timestamps is not None:
+        np.save(os.path.join(tmp_dir, "time.npy"), timestamps)
+    for file_name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, file_name), values)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _current_meta(csv_path):
+    """meta.json of csv_path's columnar copy, or None if there is no readable copy in this format."""
+    try:
+        meta = read_meta(columnar_dir(csv_path))
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get("format_version") == FORMAT_VERSION else None
+
+
+def is_fresh(csv_path):
+    """
+    True if a columnar copy of csv_path exists and was made from the current
+    file. A copy whose CSV is gone cannot be checked and is not fresh; see
+    `is_orphaned`.
+    """
+    meta = _current_meta(csv_path)
+    if meta is None:
+        return False
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return False
+    source = meta["source"]
+    if stat.st_size != source["size"]:
+        return False
+    # A touched but unchanged file is still fresh
+    return stat.st_mtime_ns == source["mtime_ns"] or _file_digest(csv_path) == source["sha256"]
+
+
+def is_orphaned(csv_path):
+    """
+    True if csv_path is gone but a columnar copy of it remains. Callers may
+    still serve the copy, but should say so: it can no longer be checked
+    against its source.
+    """
+    return not os.path.exists(csv_path) and _current_meta(csv_path) is not None
+
+
+def load_columns(directory, mmap=True):
+    """
+    Load a columnar copy. Returns (timestamps or None, {column: array}, meta);
+    with mmap=True the arrays are read-only memory maps.
+    """
+    meta = read_meta(directory)
+    mode = "r" if mmap else None
+    timestamps = None
+    if meta["time_file"]:
+        timestamps = np.load(os.path.join(directory, meta["time_file"]), mmap_mode=mode)
+    columns = {
+        column: np.load(os.path.join(directory, file_name), mmap_mode=mode)
+        for column, file_name in zip(meta["columns"], meta["files"])
+    }
+    return timestamps, columns, meta
+
+
+def load_frame(csv_path):
+    """
+    Load a dataset as a DataFrame like pd.read_csv(csv_path), but with the
+    time column first and parsed to datetime64[ns], rows sorted by time and
+    only the numeric columns. Uses the columnar copy when it is up to date
+    and parses the CSV into the same shape and dtypes otherwise. A columnar
+    copy whose CSV is gone is used with a warning.
+    """
+    if is_fresh(csv_path) or is_orphaned(csv_path):
+        if not os.path.exists(csv_path):
+            logger.warning(f"{csv_path} is missing; loading its columnar copy, which may be stale")
+        timestamps, columns, meta = load_columns(columnar_dir(csv_path))
+        time_column = meta["time_column"]
+    else:
+        time_column, timestamps, columns = _read_csv(csv_path)
+    data = {}
+    if timestamps is not None:
+        data[time_column] = timestamps
+    data.update(columns)
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert dataset CSVs into memory-mappable columnar copies.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS,
+                        help="CSV files or glob patterns (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="convert even if the columnar copy is up to date")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in (glob.glob(pattern) or [pattern])})
+    for path in paths:
+        if not args.force and is_fresh(path):
+            print(f"Up to date: {path}")
+            continue
+        out_dir = convert_csv(path)
+        print(f"Converted {path} -> {out_dir}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,204 @@
+"""
+Export the hybrid forecaster and its scalers to a TFLite bundle and check it
+against the Keras model.
+
+    python export_lite.py                       # float32
+    python export_lite.py --quantize dynamic    # int8 weights, float activations
+    python export_lite.py --quantize int8       # int8 weights and activations
+    python export_lite.py --check-only          # re-run the parity check
+
+The bundle directory holds model.tflite, scalers.json (the feature and
+target scalers as per-column affine maps) and meta.json. Serve it with
+INFERENCE_BACKEND=tflite. The parity check compares one-step predictions
+and 24-step rollouts on windows of community_data.csv in scaled units
+(fractions of the target range for the MinMax target scaler) and exits
+non-zero if they differ by more than the tolerance.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from lite_forecaster import LITE_META_FILE, LITE_MODEL_FILE, LITE_SCALERS_FILE, AffineScaler, load_lite_bundle
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting.h5"
+FEATURE_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_feature.save"
+TARGET_SCALER_PATH = "prediction_model_files_docker/Using Federated Learning for Short-term Residential Load Forecasting_target.save"
+HISTORICAL_CSV_PATH = "prediction_model_files_docker/community_data.csv"
+DEFAULT_OUT_DIR = "prediction_model_files_tflite"
+
+EXOGENOUS_FEATURES = ["Winter", "Spring", "Summer", "Fall",
+                      "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
+                      "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"]
+TARGET_COLUMN = "Use [kW]"
+
+# Maximum absolute difference (scaled units) accepted by the parity check
+PARITY_TOLERANCE = {"none": 1e-4, "dynamic": 2e-2, "int8": 5e-2}
+PARITY_HORIZON = 24
+
+
+def scaled_samples(csv_path, feature_scaler, target_scaler, sequence_length, n_windows, seed=0):
+    """
+    Random (windows (n, L, 1), exo (n, F)) samples from a dataset: the scaled
+    consumption of L consecutive hours and the scaled features of the next hour.
+    """
+    df = pd.read_csv(csv_path)
+    target = target_scaler.transform(df[[TARGET_COLUMN]].to_numpy(dtype=np.float64)).astype(np.float32)[:, 0]
+    exo = feature_scaler.transform(df[EXOGENOUS_FEATURES].to_numpy(dtype=np.float64)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    starts = rng.choice(len(df) - sequence_length, size=min(n_windows, len(df) - sequence_length), replace=False)
+    windows = np.stack([target[s:s + sequence_length] for s in starts])[:, :, None]
+    return windows, exo[starts + sequence_length]
+
+
+def convert(model, quantize="none", representative=None):
+    """Convert a Keras hybrid model to TFLite bytes with a dynamic batch dimension."""
+    import tensorflow as tf
+
+    sequence_length = model.inputs[0].shape[1]
+    n_features = model.inputs[1].shape[-1]
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([None, sequence_length, 1], tf.float32, name="lstm_input"),
+        tf.TensorSpec([None, n_features], tf.float32, name="exo_input"),
+    ])
+    def serve(sequence, exo):
+        return model([sequence, exo], training=False)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], model)
+    if quantize in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        windows, exo = representative
+
+        def representative_dataset():
+            for i in range(len(windows)):
+                yield [windows[i:i + 1], exo[i:i + 1]]
+
+        converter.representative_dataset = representative_dataset
+        # Ops without an int8 kernel stay in float; inputs and outputs stay float32
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+    return converter.convert()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_bundle(out_dir, quantize="none", model_path=MODEL_PATH, feature_scaler_path=FEATURE_SCALER_PATH,
+                  target_scaler_path=TARGET_SCALER_PATH, csv_path=HISTORICAL_CSV_PATH, calibration_windows=500):
+    import joblib
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path)
+    feature_scaler = joblib.load(feature_scaler_path)
+    target_scaler = joblib.load(target_scaler_path)
+    sequence_length = model.inputs[0].shape[1]
+
+    representative = None
+    if quantize == "int8":
+        representative = scaled_samples(csv_path, feature_scaler, target_scaler, sequence_length,
+                                        calibration_windows, seed=1)
+    tflite_model = convert(model, quantize, representative)
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, LITE_MODEL_FILE), "wb") as f:
+        f.write(tflite_model)
+    with open(os.path.join(out_dir, LITE_SCALERS_FILE), "w") as f:
+        json.dump({"feature": AffineScaler.from_sklearn(feature_scaler).to_dict(),
+                   "target": AffineScaler.from_sklearn(target_scaler).to_dict()}, f)
+    with open(os.path.join(out_dir, LITE_META_FILE), "w") as f:
+        json.dump({
+            "source_model": model_path,
+            "source_sha256": file_sha256(model_path),
+            "quantize": quantize,
+            "sequence_length": sequence_length,
+            "exogenous_features": EXOGENOUS_FEATURES,
+            "target_column": TARGET_COLUMN,
+        }, f, indent=2)
+    logger.info(f"Wrote {out_dir}/{LITE_MODEL_FILE} ({len(tflite_model) / 1024:.0f} KiB, quantize={quantize})")
+
+
+def parity_check(out_dir, model_path=MODEL_PATH, feature_scaler_path=FEATURE_SCALER_PATH,
+                 target_scaler_path=TARGET_SCALER_PATH, csv_path=HISTORICAL_CSV_PATH, n_windows=256,
+                 horizon=PARITY_HORIZON, tolerance=None):
+    """Compare the bundle with the Keras model; returns a report dict with "passed"."""
+    import joblib
+    from tensorflow.keras.models import load_model
+    from forecasting import get_forecaster
+
+    keras_forecaster = get_forecaster(load_model(model_path))
+    feature_scaler = joblib.load(feature_scaler_path)
+    target_scaler = joblib.load(target_scaler_path)
+    lite_forecaster, lite_feature_scaler, lite_target_scaler, meta = load_lite_bundle(out_dir)
+    if tolerance is None:
+        tolerance = PARITY_TOLERANCE.get(meta.get("quantize", "none"), PARITY_TOLERANCE["none"])
+
+    windows, exo = scaled_samples(csv_path, feature_scaler, target_scaler, keras_forecaster.sequence_length,
+                                  n_windows)
+    step_error = np.abs(keras_forecaster.step(windows, exo) - lite_forecaster.step(windows, exo))
+    rollout_error = np.abs(keras_forecaster.rollout(windows, exo, horizon)
+                           - lite_forecaster.rollout(windows, exo, horizon))
+
+    # The exported scalers must reproduce sklearn's
+    raw = pd.read_csv(csv_path, nrows=1000)
+    scaler_error = max(
+        np.max(np.abs(feature_scaler.transform(raw[EXOGENOUS_FEATURES].to_numpy(dtype=np.float64))
+                      - lite_feature_scaler.transform(raw[EXOGENOUS_FEATURES].to_numpy(dtype=np.float64)))),
+        np.max(np.abs(target_scaler.transform(raw[[TARGET_COLUMN]].to_numpy(dtype=np.float64))
+                      - lite_target_scaler.transform(raw[[TARGET_COLUMN]].to_numpy(dtype=np.float64)))),
+    )
+
+    report = {
+        "quantize": meta.get("quantize"),
+        "windows": len(windows),
+        "horizon": horizon,
+        "tolerance": tolerance,
+        "step_max_abs_error": float(step_error.max()),
+        "step_mean_abs_error": float(step_error.mean()),
+        "rollout_max_abs_error": float(rollout_error.max()),
+        "rollout_mean_abs_error": float(rollout_error.mean()),
+        "scaler_max_abs_error": float(scaler_error),
+    }
+    report["passed"] = bool(report["step_max_abs_error"] <= tolerance
+                            and report["rollout_max_abs_error"] <= tolerance
+                            and report["scaler_max_abs_error"] <= 1e-9)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the hybrid forecaster to a TFLite bundle.")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="bundle directory (default: %(default)s)")
+    parser.add_argument("--quantize", choices=sorted(PARITY_TOLERANCE), default="none")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--feature-scaler", default=FEATURE_SCALER_PATH)
+    parser.add_argument("--target-scaler", default=TARGET_SCALER_PATH)
+    parser.add_argument("--csv", default=HISTORICAL_CSV_PATH, help="windows for calibration and the parity check")
+    parser.add_argument("--windows", type=int, default=256, help="windows used by the parity check")
+    parser.add_argument("--tolerance", type=float, help="override the parity tolerance (scaled units)")
+    parser.add_argument("--check-only", action="store_true", help="only run the parity check on an existing bundle")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_bundle(args.out, args.quantize, args.model, args.feature_scaler, args.target_scaler, args.csv)
+    report = parity_check(args.out, args.model, args.feature_scaler, args.target_scaler, args.csv, args.windows,
+                          tolerance=args.tolerance)
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,179 @@
+import math
+import threading
+
+import numpy as np
+
+TARGET_COLUMN = "Use [kW]"
+# Same names (and definitions) as the columns train.py engineers with shift/rolling
+FEATURE_COLUMNS = ["Use_lag1", "Use_lag24", "Use_rolling_mean_24", "Use_rolling_std_24"]
+LAGS = (1, 24)
+ROLLING_WINDOW = 24
+# Running sums are recomputed from the buffer this often to stop rounding drift
+RESYNC_EVERY = 10_000
+
+
+class RollingFeatures:
+    """
+    Lag and rolling-window features of one consumption series, updated in
+    O(1) per reading.
+
+    The last max(LAGS) + 1 readings are kept in a ring buffer next to a
+    running sum and sum of squares of the last ROLLING_WINDOW readings. The
+    feature row of a reading matches what pandas computes in train.py for
+    that row: `shift(1)`, `shift(24)`, and `rolling(24).mean()`/`.std()`
+    (sample std, window ending at and including the reading). Rows without
+    enough history, or whose window contains a missing reading, get NaN.
+    """
+
+    def __init__(self, lags=LAGS, window=ROLLING_WINDOW):
+        self.lags = tuple(lags)
+        self.window = window
+        self._capacity = max(max(self.lags), window - 1) + 1
+        self._buffer = [math.nan] * self._capacity
+        self._head = -1  # buffer position of the latest reading
+        self._seen = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._missing = 0  # NaN readings inside the rolling window
+        self._since_resync = 0
+
+    @classmethod
+    def from_history(cls, values, **kwargs):
+        """State after the given readings (oldest first); only the tail is used."""
+        features = cls(**kwargs)
+        values = np.asarray(values, dtype=float).reshape(-1)
+        for value in values[-features._capacity:]:
+            features.push(value)
+        features._seen = len(values)
+        return features
+
+    def copy(self):
+        other = RollingFeatures.__new__(RollingFeatures)
+        other.__dict__.update(self.__dict__)
+        other._buffer = list(self._buffer)
+        return other
+
+    def _value(self, back):
+        """The reading `back` steps before the latest one (NaN if not seen yet)."""
+        if back >= self._seen:
+            return math.nan
+        return self._buffer[(self._head - back) % self._capacity]
+
+    def push(self, value):
+        """Add the next reading."""
+        value = float(value)
+        leaving = self._value(self.window - 1) if self._seen >= self.window else None
+        self._head = (self._head + 1) % self._capacity
+        self._buffer[self._head] = value
+        self._seen += 1
+
+        if math.isnan(value):
+            self._missing += 1
+        else:
+            self._sum += value
+            self._sumsq += value * value
+        if leaving is not None:
+            if math.isnan(leaving):
+                self._missing -= 1
+            else:
+                self._sum -= leaving
+                self._sumsq -= leaving * leaving
+
+        self._since_resync += 1
+        if self._since_resync >= RESYNC_EVERY:
+            self._resync()
+
+    def _resync(self):
+        window = [self._value(back) for back in range(min(self.window, self._seen))]
+        present = [value for value in window if not math.isnan(value)]
+        self._sum = math.fsum(present)
+        self._sumsq = math.fsum(value * value for value in present)
+        self._missing = len(window) - len(present)
+        self._since_resync = 0
+
+    def current(self):
+        """Feature row of the latest reading: the lags, then rolling mean and std."""
+        row = [self._value(lag) for lag in self.lags]
+        n = self.window
+        if self._seen < n or self._missing:
+            return row + [math.nan, math.nan]
+        mean = self._sum / n
+        variance = max((self._sumsq - self._sum * mean) / (n - 1), 0.0)
+        return row + [mean, math.sqrt(variance)]
+
+    def extend(self, values):
+        """Push readings in order and return their feature rows, shape (len(values), 4)."""
+        values = np.asarray(values, dtype=float).reshape(-1)
+        rows = np.empty((len(values), len(self.lags) + 2))
+        for i, value in enumerate(values.tolist()):
+            self.push(value)
+            rows[i] = self.current()
+        return rows
+
+    def project(self, values):
+        """
+        Feature rows for future readings (e.g. a forecast trajectory) without
+        changing this state; O(1) per step.
+        """
+        return self.copy().extend(values)
+
+
+def lag_rolling_features(values):
+    """Feature rows (FEATURE_COLUMNS) for a whole series, for building training sets."""
+    return RollingFeatures().extend(values)
+
+
+class FeatureStore:
+    """
+    Latest lag and rolling features per building, kept in step with the
+    BuildingDataStore.
+
+    Each building's RollingFeatures is seeded from the tail of its dataset
+    (the last max(LAGS) + 1 readings) and rebuilt the same way whenever the
+    dataset version changes, i.e. a reading was ingested or the CSV replaced.
+    An ingested reading can replace an existing one inside the window, so the
+    tail is re-read rather than only pushing new rows; either way only the
+    last few readings are touched and lookups stay constant-time however long
+    the history is.
+    """
+
+    def __init__(self, building_store):
+        self.building_store = building_store
+        self._entries = {}  # building -> (dataset version, RollingFeatures)
+        self._lock = threading.Lock()
+
+    def _state(self, normalized_building):
+        data = self.building_store.get(normalized_building)
+        entry = self._entries.get(normalized_building)
+        if entry is not None and entry[0] == data.version:
+            return data, entry[1]
+        with self._lock:
+            entry = self._entries.get(normalized_building)
+            if entry is None or entry[0] != data.version:
+                energy = data.columns.get(TARGET_COLUMN, data.energy)
+                entry = (data.version, RollingFeatures.from_history(energy))
+                self._entries[normalized_building] = entry
+            return data, entry[1]
+
+    def latest(self, normalized_building):
+        """
+        (timestamp, {feature: value}) for the building's latest reading; None
+        values where there is not enough history.
+        Raises FileNotFoundError like BuildingDataStore.get.
+        """
+        data, state = self._state(normalized_building)
+        timestamp = data.timestamps[-1] if len(data) else None
+        return timestamp, _as_dict(state.current())
+
+    def project(self, normalized_building, values):
+        """Feature rows for hypothetical readings following the latest one."""
+        _, state = self._state(normalized_building)
+        return state.project(values)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _as_dict(row):
+    return {name: (None if math.isnan(value) else float(value)) for name, value in zip(FEATURE_COLUMNS, row)}
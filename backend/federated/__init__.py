@@ -0,0 +1,8 @@
+"""
+Federated training of the hybrid (LSTM + exogenous) load forecaster.
+
+Every `datasets/<Building>_data.csv` file is one client. Clients train locally
+in a process pool and only model weights (and min/max statistics for the
+shared scalers) leave a client. Run `python -m federated --help` from the
+backend directory.
+"""
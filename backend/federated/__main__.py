@@ -0,0 +1,49 @@
+import argparse
+import logging
+
+from federated.clients import discover_clients, DATASETS_GLOB
+from federated.fedavg import run_fedavg
+from model_registry import publish_model
+
+DEFAULT_OUT_DIR = "prediction_model_files_federated"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m federated",
+        description="Train the hybrid forecaster with FedAvg, one client per building dataset.",
+    )
+    parser.add_argument("--datasets", default=DATASETS_GLOB, help="glob of client datasets (default: %(default)s)")
+    parser.add_argument("--clients", nargs="*", help="only use these clients (e.g. Hospital House1)")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--workers", type=int, help="parallel client processes (default: min(clients, CPUs))")
+    parser.add_argument("--init-model", help="start from this .h5 model instead of random weights")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compression", default="none",
+                        help="client update encoding: none, delta, fp16, int8 or topk:<fraction> (default: %(default)s)")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR,
+                        help="output directory for the model, scalers, checkpoints and metrics (default: %(default)s)")
+    parser.add_argument("--registry",
+                        help="also publish the model to this model registry (e.g. model_registry), one version per client")
+    parser.add_argument("--version", help="registry version name (default: the current time, YYYYMMDD-HHMMSS)")
+    args = parser.parse_args()
+
+    clients = discover_clients(args.datasets)
+    if args.clients:
+        clients = {name: path for name, path in clients.items() if name in args.clients}
+    if not clients:
+        parser.error("no client datasets found")
+
+    run_fedavg(clients, args.out, rounds=args.rounds, local_epochs=args.local_epochs, batch_size=args.batch_size,
+               learning_rate=args.learning_rate, workers=args.workers, init_model=args.init_model, seed=args.seed,
+               compression=args.compression)
+    if args.registry:
+        publish_model(args.out, args.registry, clients, args.version)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
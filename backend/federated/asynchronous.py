@@ -0,0 +1,310 @@
+"""
+Asynchronous federated aggregation and a local client simulator.
+
+In synchronous FedAvg every round waits for the slowest building. Here the
+server applies client updates as they arrive instead:
+
+    fedasync    every update is mixed into the global model right away,
+                w <- w + alpha * s(staleness) * (w_client - w)
+    fedbuff     updates are buffered and every `buffer_size` of them the
+                sample-weighted mean of s(staleness) * delta is applied
+
+where staleness is the number of global versions published since the
+client fetched its starting weights and s(t) = (1 + t) ** -staleness_exponent.
+
+`simulate` runs each building as an asyncio task that trains in the shared
+process pool and then waits a configurable latency before its update
+reaches the server, so wall-clock time to a target loss can be compared
+with synchronous rounds (mode "sync") under the same client delays.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import numpy as np
+
+from federated.clients import client_statistics
+from federated.compression import make_compressor
+from federated.fedavg import (aggregate, client_seed, evaluate_client, export_model, fit_global_scalers,
+                              initial_weights, local_update, make_pool)
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sync", "fedasync", "fedbuff")
+
+
+class ClientProfile:
+    """
+    Simulated conditions of one client: a fixed network latency, an
+    exponentially distributed extra delay with mean `jitter`, and a compute
+    `slowdown` factor (3.0 makes local training take three times as long).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, slowdown=1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.slowdown = slowdown
+
+    def delay(self, compute_seconds, rng):
+        extra = rng.expovariate(1.0 / self.jitter) if self.jitter > 0 else 0.0
+        return self.latency + extra + max(0.0, self.slowdown - 1.0) * compute_seconds
+
+
+class AsyncServer:
+    """Global model state and the staleness-weighted FedAsync/FedBuff update rules."""
+
+    def __init__(self, weights, compressor, mode="fedasync", alpha=0.6, staleness_exponent=0.5, buffer_size=3,
+                 server_learning_rate=1.0):
+        if mode not in ("fedasync", "fedbuff"):
+            raise ValueError(f"Unknown asynchronous mode: {mode}")
+        self.weights = weights
+        self.version = 0
+        self.compressor = compressor
+        self.mode = mode
+        self.alpha = alpha
+        self.staleness_exponent = staleness_exponent
+        self.buffer_size = buffer_size
+        self.server_learning_rate = server_learning_rate
+        self._buffer = []
+        self.staleness = []
+
+    def staleness_weight(self, staleness):
+        return (1.0 + staleness) ** -self.staleness_exponent
+
+    def client_delta(self, update, base_weights):
+        """The client's change relative to the weights it started from."""
+        decoded = self.compressor.decode(update["payload"])
+        if self.compressor.sends_delta:
+            return decoded
+        return [w - b for w, b in zip(decoded, base_weights)]
+
+    def receive(self, update, base_weights, base_version):
+        """Apply (or buffer) a client update; returns True if a new global version was published."""
+        staleness = self.version - base_version
+        self.staleness.append(staleness)
+        scale = self.staleness_weight(staleness)
+        delta = self.client_delta(update, base_weights)
+
+        if self.mode == "fedasync":
+            # w_client = base + delta; mix it into the current global weights
+            mix = self.alpha * scale
+            self.weights = [(w + mix * (b + d - w)).astype(w.dtype)
+                            for w, b, d in zip(self.weights, base_weights, delta)]
+        else:
+            self._buffer.append((update["n"], scale, delta))
+            if len(self._buffer) < self.buffer_size:
+                return False
+            n = np.array([entry[0] for entry in self._buffer], dtype=np.float64)
+            coefficients = self.server_learning_rate * n / n.sum() * [entry[1] for entry in self._buffer]
+            self.weights = [
+                (w + np.tensordot(coefficients, np.stack(tensors), axes=1)).astype(w.dtype)
+                for w, tensors in zip(self.weights, zip(*(entry[2] for entry in self._buffer)))
+            ]
+            self._buffer = []
+        self.version += 1
+        return True
+
+
+class _Run:
+    """Bookkeeping shared by the simulated clients of one run."""
+
+    def __init__(self, clients, out_dir, pool, eval_pool, feature_scaler, target_scaler, target_loss, max_seconds,
+                 max_updates, seed=0):
+        self.clients = clients
+        self.client_index = {name: index for index, name in enumerate(clients)}
+        self.seed = seed
+        self.pool = pool
+        self.eval_pool = eval_pool
+        self.feature_scaler = feature_scaler
+        self.target_scaler = target_scaler
+        self.target_loss = target_loss
+        self.max_seconds = max_seconds
+        self.max_updates = max_updates
+        self.metrics_path = os.path.join(out_dir, "metrics.jsonl")
+        self.records = []
+        self.updates = 0
+        self.done = asyncio.Event()
+        self.error = None
+        self.start = time.perf_counter()
+        self._evaluations = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    async def train(self, name, step, weights, local_epochs, batch_size, learning_rate, compression, residual):
+        """Train `name` in the pool; `step` (its round or update count) and the run seed seed the update."""
+        future = self.pool.submit(local_update, name, self.clients[name], weights, self.feature_scaler,
+                                  self.target_scaler, local_epochs, batch_size, learning_rate, compression, residual,
+                                  client_seed(self.seed, self.client_index[name], step))
+        return await asyncio.wrap_future(future)
+
+    def evaluate(self, weights, version, **fields):
+        """
+        Evaluate a published global model in the background. The record is
+        stamped with the time the weights were published, so evaluation cost
+        does not count towards time-to-target.
+        """
+        fields["client_updates"] = self.updates
+        task = asyncio.ensure_future(self._evaluate(weights, version, self.elapsed(), fields))
+        self._evaluations.add(task)
+        task.add_done_callback(self._evaluations.discard)
+
+    async def _evaluate(self, weights, version, published, fields):
+        futures = [asyncio.wrap_future(self.eval_pool.submit(evaluate_client, name, path, weights,
+                                                             self.feature_scaler, self.target_scaler))
+                   for name, path in self.clients.items()]
+        results = await asyncio.gather(*futures)
+        n = np.array([result["n"] for result in results], dtype=np.float64)
+        record = {
+            "version": version,
+            "seconds": published,
+            "val_loss": float(np.dot(n, [result["loss"] for result in results]) / n.sum()),
+            "val_mae": float(np.dot(n, [result["mae"] for result in results]) / n.sum()),
+            **fields,
+        }
+        self.records.append(record)
+        with open(self.metrics_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        logger.info(f"v{version} t={published:.1f}s updates={fields['client_updates']}: val_loss={record['val_loss']:.5f}")
+        if self.target_loss is not None and record["val_loss"] <= self.target_loss:
+            self.done.set()
+
+    def client_finished(self, task):
+        """Done-callback of a client task: a client that fails ends the run instead of leaving it waiting."""
+        if not task.cancelled() and task.exception() is not None:
+            if self.error is None:
+                self.error = task.exception()
+            self.done.set()
+
+    def check_limits(self):
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            self.done.set()
+        if self.max_updates is not None and self.updates >= self.max_updates:
+            self.done.set()
+
+    async def finish(self):
+        if self._evaluations:
+            await asyncio.gather(*self._evaluations)
+
+
+async def _run_sync(run, weights, compressor, profiles, rngs, train_args):
+    residuals = {name: None for name in run.clients}
+
+    async def client_round(name, base, step):
+        update = await run.train(name, step, base, *train_args, compressor.name, residuals[name])
+        await asyncio.sleep(profiles[name].delay(update["seconds"], rngs[name]))
+        return update
+
+    version = 0
+    while not run.done.is_set():
+        base = weights
+        updates = await asyncio.gather(*(client_round(name, base, version + 1) for name in run.clients))
+        for update in updates:
+            residuals[update["client"]] = update["residual"]
+        weights = aggregate(base, updates, compressor)
+        version += 1
+        run.updates += len(updates)
+        run.evaluate(weights, version, bytes_uploaded=int(sum(u["bytes"] for u in updates)))
+        run.check_limits()
+    return weights
+
+
+async def _run_async(run, server, profiles, rngs, train_args):
+    evaluate_every = len(run.clients)  # one evaluation per round-equivalent of client updates
+    pending_bytes = [0]
+
+    async def client_loop(name):
+        residual = None
+        step = 0
+        while not run.done.is_set():
+            step += 1
+            base_weights, base_version = server.weights, server.version
+            update = await run.train(name, step, base_weights, *train_args, server.compressor.name, residual)
+            residual = update["residual"]
+            await asyncio.sleep(profiles[name].delay(update["seconds"], rngs[name]))
+            if run.done.is_set():
+                break
+            server.receive(update, base_weights, base_version)
+            run.updates += 1
+            pending_bytes[0] += update["bytes"]
+            if run.updates % evaluate_every == 0:
+                recent = server.staleness[-evaluate_every:]
+                run.evaluate(server.weights, server.version, bytes_uploaded=pending_bytes[0],
+                             mean_staleness=float(np.mean(recent)), max_staleness=int(max(recent)))
+                pending_bytes[0] = 0
+            run.check_limits()
+
+    tasks = [asyncio.ensure_future(client_loop(name)) for name in run.clients]
+    for task in tasks:
+        task.add_done_callback(run.client_finished)
+    await run.done.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if run.error is not None:
+        raise run.error
+    return server.weights
+
+
+def simulate(clients, out_dir, mode="fedasync", profiles=None, local_epochs=1, batch_size=32, learning_rate=1e-3,
+             compression="none", alpha=0.6, staleness_exponent=0.5, buffer_size=3, server_learning_rate=1.0,
+             target_loss=None, max_seconds=600.0, max_updates=None, workers=None, init_model=None, seed=0):
+    """
+    Run one simulated federated training over `clients` ({name: dataset path})
+    until the global validation loss reaches `target_loss` or a time/update
+    limit is hit. `profiles` maps client names to ClientProfile (missing
+    clients have no extra delay). Evaluations go to out_dir/metrics.jsonl
+    with the wall-clock seconds at which each global version was published,
+    and the final model and scalers are exported to out_dir.
+    Returns the list of evaluation records.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+    profiles = profiles or {}
+    profiles = {name: profiles.get(name, ClientProfile()) for name in clients}
+    rngs = {name: random.Random(f"{seed}-{name}") for name in clients}
+    workers = workers or min(len(clients), os.cpu_count() or 1)
+    os.makedirs(out_dir, exist_ok=True)
+    open(os.path.join(out_dir, "metrics.jsonl"), "w").close()
+
+    compressor = make_compressor(compression)
+    train_args = (local_epochs, batch_size, learning_rate)
+
+    with make_pool(workers) as pool, make_pool(1) as eval_pool:
+        statistics = list(pool.map(client_statistics, clients.values()))
+        feature_scaler, target_scaler = fit_global_scalers(statistics)
+        weights = initial_weights(init_model, seed)
+        # Start every worker's TF runtime before the clock starts
+        list(pool.map(_warm_up, range(workers)))
+        list(eval_pool.map(_warm_up, range(1)))
+
+        async def main():
+            run = _Run(clients, out_dir, pool, eval_pool, feature_scaler, target_scaler, target_loss, max_seconds,
+                       max_updates, seed)
+            if mode == "sync":
+                final = await _run_sync(run, weights, compressor, profiles, rngs, train_args)
+            else:
+                server = AsyncServer(weights, compressor, mode, alpha, staleness_exponent, buffer_size,
+                                     server_learning_rate)
+                final = await _run_async(run, server, profiles, rngs, train_args)
+            await run.finish()
+            return final, run.records
+
+        final_weights, records = asyncio.run(main())
+
+    export_model(final_weights, feature_scaler, target_scaler, out_dir)
+    return sorted(records, key=lambda record: record["seconds"])
+
+
+def _warm_up(_):
+    import tensorflow  # noqa: F401
+
+    return os.getpid()
+
+
+def time_to_target(records, target_loss):
+    """Seconds until the first evaluation at or below target_loss, or None."""
+    return next((record["seconds"] for record in records if record["val_loss"] <= target_loss), None)
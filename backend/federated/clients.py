@@ -0,0 +1,73 @@
+import glob
+import os
+
+import numpy as np
+
+from columnar import load_frame
+from windowing import sliding_windows
+
+DATASETS_GLOB = "datasets/*_data.csv"
+# The community aggregate is what the served model forecasts; it is not a client
+EXCLUDED_CLIENTS = {"community"}
+
+# Exogenous features in the same order as during training (see app.py)
+EXOGENOUS_FEATURES = ["Winter", "Spring", "Summer", "Fall",
+                      "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
+                      "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]"]
+TARGET_COLUMN = "Use [kW]"
+VALIDATION_FRACTION = 0.2
+
+
+def discover_clients(pattern=DATASETS_GLOB):
+    """Return {client name: dataset path} for every building dataset."""
+    clients = {}
+    for path in sorted(glob.glob(pattern)):
+        name = os.path.basename(path)[:-len("_data.csv")]
+        if name not in EXCLUDED_CLIENTS:
+            clients[name] = path
+    return clients
+
+
+def load_raw(path):
+    """Return (exogenous features (n, 11), target (n,)) of a client dataset in time order."""
+    df = load_frame(path)
+    return df[EXOGENOUS_FEATURES].to_numpy(dtype=np.float64), df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+
+
+def client_statistics(path):
+    """
+    The only raw-data summary a client shares: its sample count and per-column
+    minima/maxima, from which the server fits the shared MinMax scalers.
+    """
+    exo, target = load_raw(path)
+    return {
+        "n": len(target),
+        "exo_min": exo.min(axis=0), "exo_max": exo.max(axis=0),
+        "target_min": target.min(), "target_max": target.max(),
+    }
+
+
+class ClientData:
+    """
+    Scaled training and validation samples of one client.
+
+    Sample i uses the scaled consumption of hours [i, i + sequence_length) as
+    the history window, and the exogenous features and consumption of hour
+    i + sequence_length as input and target. Windows are zero-copy views; the
+    last VALIDATION_FRACTION of samples (in time order) is held out.
+    """
+
+    def __init__(self, path, feature_scaler, target_scaler, sequence_length):
+        exo, target = load_raw(path)
+        exo_scaled = feature_scaler.transform(exo).astype(np.float32)
+        target_scaled = target_scaler.transform(target.reshape(-1, 1)).astype(np.float32)
+
+        windows = sliding_windows(target_scaled, sequence_length)  # (n - L, L, 1)
+        exo_next = exo_scaled[sequence_length:]
+        y_next = target_scaled[sequence_length:, 0]
+
+        split = int(len(windows) * (1 - VALIDATION_FRACTION))
+        self.train = ([windows[:split], exo_next[:split]], y_next[:split])
+        self.val = ([windows[split:], exo_next[split:]], y_next[split:])
+        self.n_train = split
+        self.n_val = len(windows) - split
@@ -0,0 +1,87 @@
+"""
+Compare client update compression schemes against uncompressed FedAvg.
+
+    python -m federated.compare --schemes none fp16 int8 topk:0.01 --rounds 20
+
+Every scheme is trained from the same initial weights and seed into
+<out>/<scheme>/; a summary of upload volume and convergence is printed and
+written to <out>/summary.json.
+"""
+import argparse
+import json
+import logging
+import os
+
+from federated.clients import discover_clients, DATASETS_GLOB
+from federated.fedavg import run_fedavg
+
+DEFAULT_SCHEMES = ["none", "delta", "fp16", "int8", "topk:0.1", "topk:0.01"]
+DEFAULT_OUT_DIR = "federated_compression_runs"
+
+
+def read_metrics(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records, target_loss):
+    """Upload volume and convergence of one run; target_loss is taken from the baseline."""
+    uploaded = sum(r["bytes_uploaded"] for r in records)
+    uncompressed = sum(r["bytes_uncompressed"] for r in records)
+    reached = next((r["round"] for r in records if r["val_loss"] <= target_loss), None)
+    return {
+        "rounds": len(records),
+        "final_val_loss": records[-1]["val_loss"],
+        "best_val_loss": min(r["val_loss"] for r in records),
+        "final_val_mae": records[-1]["val_mae"],
+        "bytes_per_round": uploaded / len(records),
+        "bytes_total": uploaded,
+        "compression_ratio": uncompressed / uploaded if uploaded else None,
+        "rounds_to_target": reached,
+        "bytes_to_target": sum(r["bytes_uploaded"] for r in records[:reached]) if reached else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m federated.compare", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schemes", nargs="+", default=DEFAULT_SCHEMES)
+    parser.add_argument("--datasets", default=DATASETS_GLOB)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-tolerance", type=float, default=0.05,
+                        help="a run reaches the target once its val_loss is within this fraction of the "
+                             "uncompressed run's final val_loss (default: %(default)s)")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+
+    clients = discover_clients(args.datasets)
+    if not clients:
+        parser.error("no client datasets found")
+    schemes = args.schemes if "none" in args.schemes else ["none"] + args.schemes
+
+    runs = {}
+    for scheme in schemes:
+        out_dir = os.path.join(args.out, scheme.replace(":", "_"))
+        run_fedavg(clients, out_dir, rounds=args.rounds, local_epochs=args.local_epochs,
+                   batch_size=args.batch_size, learning_rate=args.learning_rate, workers=args.workers,
+                   seed=args.seed, compression=scheme)
+        runs[scheme] = read_metrics(os.path.join(out_dir, "metrics.jsonl"))
+
+    target_loss = runs["none"][-1]["val_loss"] * (1 + args.target_tolerance)
+    summary = {scheme: summarize(records, target_loss) for scheme, records in runs.items()}
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump({"target_val_loss": target_loss, "schemes": summary}, f, indent=2)
+
+    print(f"{'scheme':<12} {'MB/round':>10} {'ratio':>7} {'final loss':>11} {'best loss':>10} {'rounds->target':>15}")
+    for scheme, s in summary.items():
+        print(f"{scheme:<12} {s['bytes_per_round'] / 1e6:>10.3f} {s['compression_ratio']:>7.1f} "
+              f"{s['final_val_loss']:>11.5f} {s['best_val_loss']:>10.5f} {str(s['rounds_to_target'] or '-'):>15}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
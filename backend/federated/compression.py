@@ -0,0 +1,170 @@
+"""
+Compression of the client -> server updates in federated rounds.
+
+Clients send the difference between their locally trained weights and the
+global weights they started from (delta encoding); the schemes below decide
+how that delta is put on the wire:
+
+    none        full float32 weights, i.e. plain FedAvg (the baseline)
+    delta       float32 deltas, deflated losslessly
+    fp16        deltas cast to float16
+    int8        deltas quantized to int8 with one float32 scale per tensor
+    topk:<f>    only the largest fraction f of each delta tensor (by magnitude)
+                as int32 indices + float32 values, with error feedback: what a
+                client did not send is added to its next delta
+
+Use `make_compressor("topk:0.01")` to build one from its spec string.
+"""
+import abc
+import zlib
+
+import numpy as np
+
+
+class UpdateCompressor(abc.ABC):
+    """
+    Base class. `encode` runs on the client and returns (payload, residual);
+    the residual is client-side state fed back into the next round's `encode`.
+    `decode` runs on the server and returns the list of delta tensors.
+    """
+
+    name = None
+    sends_delta = True
+
+    @abc.abstractmethod
+    def encode(self, delta, residual=None):
+        """Encode one client update; returns (payload, residual)."""
+
+    @abc.abstractmethod
+    def decode(self, payload):
+        """Decode a payload back into the list of tensors."""
+
+    @staticmethod
+    def payload_nbytes(payload):
+        """Bytes on the wire for a payload (a list of per-tensor tuples)."""
+        total = 0
+        for part in payload:
+            for item in part:
+                if isinstance(item, np.ndarray):
+                    total += item.nbytes
+                elif isinstance(item, (bytes, bytearray)):
+                    total += len(item)
+        return total
+
+
+class NoCompression(UpdateCompressor):
+    """Send the full float32 weights (uncompressed FedAvg)."""
+
+    name = "none"
+    sends_delta = False
+
+    def encode(self, weights, residual=None):
+        return [(np.asarray(w, dtype=np.float32),) for w in weights], None
+
+    def decode(self, payload):
+        return [part[0] for part in payload]
+
+
+class DeflateDeltaCompression(UpdateCompressor):
+    """Lossless: float32 deltas compressed with zlib."""
+
+    name = "delta"
+
+    def encode(self, delta, residual=None):
+        payload = []
+        for d in delta:
+            d = np.ascontiguousarray(d, dtype=np.float32)
+            payload.append((zlib.compress(d.tobytes(), 6), d.shape))
+        return payload, None
+
+    def decode(self, payload):
+        return [np.frombuffer(zlib.decompress(data), dtype=np.float32).reshape(shape) for data, shape in payload]
+
+
+class Float16Compression(UpdateCompressor):
+    name = "fp16"
+
+    def encode(self, delta, residual=None):
+        return [(np.asarray(d, dtype=np.float16),) for d in delta], None
+
+    def decode(self, payload):
+        return [part[0].astype(np.float32) for part in payload]
+
+
+class Int8Compression(UpdateCompressor):
+    """Symmetric per-tensor int8 quantization: d ~= scale * q, q in [-127, 127]."""
+
+    name = "int8"
+
+    def encode(self, delta, residual=None):
+        payload = []
+        for d in delta:
+            d = np.asarray(d, dtype=np.float32)
+            max_abs = float(np.max(np.abs(d))) if d.size else 0.0
+            scale = max_abs / 127.0 if max_abs > 0 else 1.0
+            q = np.clip(np.rint(d / scale), -127, 127).astype(np.int8)
+            payload.append((q, np.float32(scale)))
+        return payload, None
+
+    def decode(self, payload):
+        return [q.astype(np.float32) * np.float32(scale) for q, scale in payload]
+
+
+class TopKCompression(UpdateCompressor):
+    """
+    Top-k sparsification with error feedback. Each tensor keeps its
+    ceil(fraction * size) largest-magnitude entries; the rest is carried over
+    in the client's residual so no part of the update is lost, only delayed.
+    """
+
+    name = "topk"
+
+    def __init__(self, fraction=0.01):
+        if not 0 < fraction <= 1:
+            raise ValueError("top-k fraction must be in (0, 1]")
+        self.fraction = fraction
+        self.name = f"topk:{fraction:g}"
+
+    def encode(self, delta, residual=None):
+        payload, new_residual = [], []
+        for i, d in enumerate(delta):
+            d = np.asarray(d, dtype=np.float32)
+            if residual is not None:
+                d = d + residual[i]
+            flat = d.reshape(-1)
+            k = max(1, int(np.ceil(self.fraction * flat.size)))
+            if k < flat.size:
+                indices = np.argpartition(np.abs(flat), flat.size - k)[flat.size - k:]
+            else:
+                indices = np.arange(flat.size)
+            indices = indices.astype(np.int32)
+            values = flat[indices]
+            remainder = flat.copy()
+            remainder[indices] = 0.0
+            payload.append((indices, values, d.shape))
+            new_residual.append(remainder.reshape(d.shape))
+        return payload, new_residual
+
+    def decode(self, payload):
+        tensors = []
+        for indices, values, shape in payload:
+            flat = np.zeros(int(np.prod(shape)), dtype=np.float32)
+            flat[indices] = values
+            tensors.append(flat.reshape(shape))
+        return tensors
+
+
+def make_compressor(spec):
+    """Build a compressor from its spec: none, delta, fp16, int8 or topk:<fraction>."""
+    name, _, argument = (spec or "none").partition(":")
+    if name == "none":
+        return NoCompression()
+    if name == "delta":
+        return DeflateDeltaCompression()
+    if name == "fp16":
+        return Float16Compression()
+    if name == "int8":
+        return Int8Compression()
+    if name == "topk":
+        return TopKCompression(float(argument) if argument else 0.01)
+    raise ValueError(f"Unknown compression scheme: {spec}")
@@ -0,0 +1,247 @@
+import json
+import multiprocessing
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from federated.clients import ClientData, client_statistics
+from federated.compression import make_compressor
+from federated.model import SEQUENCE_LENGTH
+
+logger = logging.getLogger(__name__)
+
+# Same file names app.py loads (MODEL_PATH, FEATURE_SCALER_PATH, TARGET_SCALER_PATH)
+MODEL_NAME = "Using Federated Learning for Short-term Residential Load Forecasting"
+
+# Per-process state of a pool worker: the Keras model is built once and its
+# weights are overwritten by every task, and client data is loaded once.
+_worker = {}
+
+
+def _init_worker(threads):
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _worker["clients"] = {}
+
+
+def client_seed(seed, client_index, step):
+    """
+    Seed of one local update, from the run seed, the client's index and the
+    round (or the client's update count). Tasks carry their own seed, so
+    results do not depend on which pool worker runs them.
+    """
+    return int(np.random.SeedSequence([seed, client_index, step]).generate_state(1)[0])
+
+
+def _worker_model():
+    model = _worker.get("model")
+    if model is None:
+        from federated.model import build_hybrid_model
+
+        model = build_hybrid_model()
+        _worker["model"] = model
+    return model
+
+
+def _worker_client(name, path, feature_scaler, target_scaler):
+    client = _worker["clients"].get(name)
+    if client is None:
+        client = ClientData(path, feature_scaler, target_scaler, SEQUENCE_LENGTH)
+        _worker["clients"][name] = client
+    return client
+
+
+def local_update(name, path, weights, feature_scaler, target_scaler, local_epochs, batch_size,
+                 learning_rate=1e-3, compression="none", residual=None, seed=None):
+    """
+    Client side of a round: start from the global weights, train for
+    local_epochs on the client's own data and return the update encoded with
+    the `compression` scheme (see federated/compression.py), the client's new
+    error-feedback residual and the encoded size in bytes.
+    The optimizer state is reset every round, as in FedAvg. `seed` (see
+    client_seed) fixes the shuffling and dropout of this update.
+    """
+    import tensorflow as tf
+    from tensorflow.keras.optimizers import Adam
+
+    if seed is not None:
+        tf.keras.utils.set_random_seed(seed)
+    client = _worker_client(name, path, feature_scaler, target_scaler)
+    model = _worker_model()
+    model.set_weights(weights)
+    # Recompiling gives the client a fresh optimizer
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss="mse", metrics=["mae"])
+    start = time.perf_counter()
+    history = model.fit(*client.train, epochs=local_epochs, batch_size=batch_size, shuffle=True, verbose=0)
+    seconds = time.perf_counter() - start
+
+    compressor = make_compressor(compression)
+    new_weights = model.get_weights()
+    if compressor.sends_delta:
+        new_weights = [new - old for new, old in zip(new_weights, weights)]
+    payload, residual = compressor.encode(new_weights, residual)
+    return {
+        "client": name,
+        "payload": payload,
+        "residual": residual,
+        "bytes": compressor.payload_nbytes(payload),
+        "n": client.n_train,
+        "loss": float(history.history["loss"][-1]),
+        "seconds": seconds,
+    }
+
+
+def evaluate_client(name, path, weights, feature_scaler, target_scaler, batch_size=256):
+    """Client side evaluation of the global weights on the client's held-out data."""
+    client = _worker_client(name, path, feature_scaler, target_scaler)
+    model = _worker_model()
+    model.set_weights(weights)
+    loss, mae = model.evaluate(*client.val, batch_size=batch_size, verbose=0)
+    return {"client": name, "n": client.n_val, "loss": float(loss), "mae": float(mae)}
+
+
+def fit_global_scalers(statistics):
+    """
+    Fit the shared feature and target MinMax scalers from per-client minima
+    and maxima only; the result equals fitting on the pooled data.
+    """
+    feature_scaler = MinMaxScaler()
+    target_scaler = MinMaxScaler()
+    for stats in statistics:
+        feature_scaler.partial_fit(np.vstack([stats["exo_min"], stats["exo_max"]]))
+        target_scaler.partial_fit(np.array([[stats["target_min"]], [stats["target_max"]]]))
+    return feature_scaler, target_scaler
+
+
+def weighted_average(weight_lists, sample_counts):
+    """FedAvg aggregation: average each weight tensor, weighted by client sample count."""
+    coefficients = np.asarray(sample_counts, dtype=np.float64)
+    coefficients /= coefficients.sum()
+    return [
+        np.tensordot(coefficients, np.stack(tensors), axes=1).astype(tensors[0].dtype)
+        for tensors in zip(*weight_lists)
+    ]
+
+
+def aggregate(weights, updates, compressor):
+    """
+    Server side of a round: decode the client updates and return the new
+    global weights, the sample-weighted average of the clients' weights.
+    """
+    decoded = [compressor.decode(u["payload"]) for u in updates]
+    average = weighted_average(decoded, [u["n"] for u in updates])
+    if not compressor.sends_delta:
+        return average
+    return [(w + d).astype(w.dtype) for w, d in zip(weights, average)]
+
+
+def export_model(weights, feature_scaler, target_scaler, out_dir):
+    """Write the global model and scalers in the layout app.py loads."""
+    from federated.model import build_hybrid_model
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = build_hybrid_model()
+    model.set_weights(weights)
+    model.save(os.path.join(out_dir, f"{MODEL_NAME}.h5"))
+    joblib.dump(feature_scaler, os.path.join(out_dir, f"{MODEL_NAME}_feature.save"))
+    joblib.dump(target_scaler, os.path.join(out_dir, f"{MODEL_NAME}_target.save"))
+
+
+def initial_weights(init_model=None, seed=0):
+    import tensorflow as tf
+    from federated.model import build_hybrid_model
+
+    tf.keras.utils.set_random_seed(seed)
+    if init_model:
+        return tf.keras.models.load_model(init_model).get_weights()
+    return build_hybrid_model().get_weights()
+
+
+def make_pool(workers):
+    """Process pool for client work; TF threads are split evenly across workers."""
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+
+
+def evaluate_global(pool, clients, weights, feature_scaler, target_scaler):
+    """Sample-weighted validation loss and MAE of the global model over all clients."""
+    futures = [pool.submit(evaluate_client, name, path, weights, feature_scaler, target_scaler)
+               for name, path in clients.items()]
+    results = [future.result() for future in futures]
+    n = np.array([result["n"] for result in results], dtype=np.float64)
+    return {
+        "val_loss": float(np.dot(n, [result["loss"] for result in results]) / n.sum()),
+        "val_mae": float(np.dot(n, [result["mae"] for result in results]) / n.sum()),
+        "clients": {result["client"]: {"loss": result["loss"], "mae": result["mae"]} for result in results},
+    }
+
+
+def run_fedavg(clients, out_dir, rounds=10, local_epochs=1, batch_size=32, learning_rate=1e-3, workers=None,
+               init_model=None, seed=0, compression="none"):
+    """
+    Synchronous FedAvg over `clients` ({name: dataset path}). Each round every
+    client trains locally in parallel, the server averages the returned
+    weights by sample count and the global model is evaluated on every
+    client's held-out data. Client uploads are encoded with `compression`
+    and their size is recorded per round. Per-round metrics go to
+    out_dir/metrics.jsonl, weights to out_dir/checkpoints/ and the final model
+    and scalers to out_dir. Returns the final global weights.
+    """
+    compressor = make_compressor(compression)
+    # Error-feedback residuals stay with their client between rounds
+    residuals = {name: None for name in clients}
+    workers = workers or min(len(clients), os.cpu_count() or 1)
+    os.makedirs(os.path.join(out_dir, "checkpoints"), exist_ok=True)
+    metrics_path = os.path.join(out_dir, "metrics.jsonl")
+    open(metrics_path, "w").close()
+
+    with make_pool(workers) as pool:
+        statistics = list(pool.map(client_statistics, clients.values()))
+        feature_scaler, target_scaler = fit_global_scalers(statistics)
+        weights = initial_weights(init_model, seed)
+
+        for round_number in range(1, rounds + 1):
+            start = time.perf_counter()
+            futures = [
+                pool.submit(local_update, name, path, weights, feature_scaler, target_scaler,
+                            local_epochs, batch_size, learning_rate, compressor.name, residuals[name],
+                            client_seed(seed, index, round_number))
+                for index, (name, path) in enumerate(clients.items())
+            ]
+            updates = [future.result() for future in futures]
+            for update in updates:
+                residuals[update["client"]] = update["residual"]
+            weights = aggregate(weights, updates, compressor)
+
+            evaluation = evaluate_global(pool, clients, weights, feature_scaler, target_scaler)
+            n = np.array([u["n"] for u in updates], dtype=np.float64)
+            record = {
+                "round": round_number,
+                "train_loss": float(np.dot(n, [u["loss"] for u in updates]) / n.sum()),
+                **evaluation,
+                "compression": compressor.name,
+                "bytes_uploaded": int(sum(u["bytes"] for u in updates)),
+                "bytes_uncompressed": int(sum(w.nbytes for w in weights)) * len(updates),
+                "seconds": time.perf_counter() - start,
+            }
+            with open(metrics_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            np.savez(os.path.join(out_dir, "checkpoints", f"round_{round_number:03d}.npz"), *weights)
+            logger.info(f"Round {round_number}/{rounds}: train_loss={record['train_loss']:.5f} "
+                        f"val_loss={record['val_loss']:.5f} val_mae={record['val_mae']:.5f} "
+                        f"uploaded={record['bytes_uploaded'] / 1e6:.2f}MB ({record['seconds']:.1f}s)")
+
+    export_model(weights, feature_scaler, target_scaler, out_dir)
+    return weights
@@ -0,0 +1,34 @@
+SEQUENCE_LENGTH = 72
+N_EXOGENOUS = 11
+
+
+def build_hybrid_model(sequence_length=SEQUENCE_LENGTH, n_exogenous=N_EXOGENOUS, learning_rate=1e-3):
+    """
+    The hybrid forecaster served by app.py: an LSTM over the scaled
+    consumption history and a small MLP over the exogenous features, merged
+    into a single-value regression head. Inputs are [lstm_input, exo_input].
+    TensorFlow is imported here so the federated package (aggregation,
+    scalers, client data) imports without it.
+    """
+    from tensorflow.keras import Model
+    from tensorflow.keras.layers import Concatenate, Dense, Dropout, Input, LSTM
+    from tensorflow.keras.optimizers import Adam
+
+    lstm_input = Input(shape=(sequence_length, 1), name="lstm_input")
+    exo_input = Input(shape=(n_exogenous,), name="exo_input")
+
+    history = LSTM(64, name="lstm_layer")(lstm_input)
+    history = Dropout(0.2, name="lstm_dropout")(history)
+
+    exo = Dense(32, activation="relu", name="exo_dense1")(exo_input)
+    exo = Dropout(0.2, name="exo_dropout")(exo)
+    exo = Dense(16, activation="relu", name="exo_dense2")(exo)
+
+    merged = Concatenate(name="concatenate")([history, exo])
+    merged = Dense(32, activation="relu", name="merged_dense")(merged)
+    merged = Dropout(0.2, name="merged_dropout")(merged)
+    output = Dense(1, name="output")(merged)
+
+    model = Model(inputs=[lstm_input, exo_input], outputs=output)
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss="mse", metrics=["mae"])
+    return model
@@ -0,0 +1,101 @@
+"""
+Simulate federated training with slow and fast clients and compare
+wall-clock time to a target loss across aggregation modes.
+
+    python -m federated.simulate --modes sync fedasync fedbuff \
+        --slowdown Industry=4 Hospital=3 --latency House1=0.5 --target-loss 0.002
+
+Each mode runs from the same initial weights into <out>/<mode>/; a summary
+is printed and written to <out>/summary.json.
+"""
+import argparse
+import json
+import logging
+import os
+
+from federated.asynchronous import MODES, ClientProfile, simulate, time_to_target
+from federated.clients import discover_clients, DATASETS_GLOB
+
+DEFAULT_OUT_DIR = "federated_simulation_runs"
+
+
+def parse_assignments(values, option):
+    """Parse ["Industry=4", ...] into {"Industry": 4.0}."""
+    result = {}
+    for value in values or []:
+        name, sep, number = value.partition("=")
+        try:
+            result[name] = float(number)
+        except ValueError:
+            sep = ""
+        if not sep or not name:
+            raise argparse.ArgumentTypeError(f"{option} expects NAME=NUMBER, got {value!r}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m federated.simulate", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--datasets", default=DATASETS_GLOB)
+    parser.add_argument("--latency", nargs="*", metavar="NAME=SECONDS", help="fixed upload delay per client")
+    parser.add_argument("--jitter", nargs="*", metavar="NAME=SECONDS", help="mean of an exponential extra delay")
+    parser.add_argument("--slowdown", nargs="*", metavar="NAME=FACTOR", help="compute slowdown per client")
+    parser.add_argument("--target-loss", type=float, help="stop once the global val_loss reaches this value")
+    parser.add_argument("--max-seconds", type=float, default=600.0)
+    parser.add_argument("--max-updates", type=int, help="stop after this many client updates")
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--compression", default="none")
+    parser.add_argument("--alpha", type=float, default=0.6, help="FedAsync mixing weight (default: %(default)s)")
+    parser.add_argument("--staleness-exponent", type=float, default=0.5)
+    parser.add_argument("--buffer-size", type=int, default=3, help="FedBuff updates per aggregation")
+    parser.add_argument("--server-learning-rate", type=float, default=1.0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+
+    clients = discover_clients(args.datasets)
+    if not clients:
+        parser.error("no client datasets found")
+    try:
+        latency = parse_assignments(args.latency, "--latency")
+        jitter = parse_assignments(args.jitter, "--jitter")
+        slowdown = parse_assignments(args.slowdown, "--slowdown")
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    profiles = {name: ClientProfile(latency.get(name, 0.0), jitter.get(name, 0.0), slowdown.get(name, 1.0))
+                for name in clients}
+
+    summary = {}
+    for mode in args.modes:
+        records = simulate(clients, os.path.join(args.out, mode), mode=mode, profiles=profiles,
+                           local_epochs=args.local_epochs, batch_size=args.batch_size,
+                           learning_rate=args.learning_rate, compression=args.compression, alpha=args.alpha,
+                           staleness_exponent=args.staleness_exponent, buffer_size=args.buffer_size,
+                           server_learning_rate=args.server_learning_rate, target_loss=args.target_loss,
+                           max_seconds=args.max_seconds, max_updates=args.max_updates, workers=args.workers,
+                           seed=args.seed)
+        summary[mode] = {
+            "evaluations": len(records),
+            "client_updates": records[-1]["client_updates"] if records else 0,
+            "final_val_loss": records[-1]["val_loss"] if records else None,
+            "best_val_loss": min((r["val_loss"] for r in records), default=None),
+            "seconds_to_target": time_to_target(records, args.target_loss) if args.target_loss else None,
+        }
+
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump({"target_val_loss": args.target_loss, "modes": summary}, f, indent=2)
+
+    print(f"{'mode':<10} {'updates':>8} {'final loss':>11} {'best loss':>10} {'s->target':>10}")
+    for mode, s in summary.items():
+        final = f"{s['final_val_loss']:.5f}" if s["final_val_loss"] is not None else "-"
+        best = f"{s['best_val_loss']:.5f}" if s["best_val_loss"] is not None else "-"
+        reached = f"{s['seconds_to_target']:.1f}" if s["seconds_to_target"] is not None else "-"
+        print(f"{mode:<10} {s['client_updates']:>8} {final:>11} {best:>10} {reached:>10}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
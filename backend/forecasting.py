@@ -0,0 +1,238 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Forecaster:
+    """
+    Fast inference path for the hybrid (LSTM + exogenous) model.
+
+    `Model.predict` builds a tf.data pipeline and runs callbacks on every call,
+    which dominates the cost of a single-row forecast step. Instead we trace
+    one tf.function with fixed input signatures around `model(..., training=False)`
+    and reuse the graph for every step and every batch size.
+    """
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        # The hybrid model takes [historical sequence, exogenous features]
+        sequence_length = model.inputs[0].shape[1]
+        n_features = model.inputs[1].shape[-1]
+        self.sequence_length = sequence_length
+        self.n_features = n_features
+
+        @tf.function(
+            input_signature=[
+                tf.TensorSpec([None, sequence_length, 1], tf.float32),
+                tf.TensorSpec([None, n_features], tf.float32),
+            ]
+        )
+        def _step(sequence, exo):
+            return model([sequence, exo], training=False)
+
+        self._step = _step
+
+    def step(self, sequences, exo):
+        """
+        Run one forward pass. `sequences` has shape (N, sequence_length, 1) and
+        `exo` shape (N, n_features); returns the scaled predictions, shape (N, 1).
+        """
+        import tensorflow as tf
+
+        return self._step(
+            tf.convert_to_tensor(sequences, dtype=tf.float32),
+            tf.convert_to_tensor(exo, dtype=tf.float32),
+        ).numpy()
+
+    def rollout(self, initial_sequences, exo, forecast_horizon):
+        """
+        Forecast `forecast_horizon` steps for a batch of N series and return the
+        scaled trajectories, shape (N, forecast_horizon). `initial_sequences`
+        may also be a single window that is broadcast across the batch.
+
+        The window lives in one preallocated buffer of length
+        sequence_length + forecast_horizon: step i reads the contiguous slice
+        [i, i + sequence_length) and writes its prediction right after it, so
+        no array is reallocated inside the loop.
+        """
+        import tensorflow as tf
+
+        initial_sequences = np.asarray(initial_sequences, dtype=np.float32)
+        exo = tf.convert_to_tensor(exo, dtype=tf.float32)
+        # A single history window (1, sequence_length, 1) is shared by all N rows of exo
+        n = max(initial_sequences.shape[0], int(exo.shape[0]))
+        length = self.sequence_length
+
+        buffer = np.empty((n, length + forecast_horizon, 1), dtype=np.float32)
+        buffer[:, :length, :] = initial_sequences
+        for i in range(forecast_horizon):
+            pred = self._step(tf.convert_to_tensor(buffer[:, i:i + length, :]), exo)
+            buffer[:, length + i, 0] = pred.numpy()[:, 0]
+        return buffer[:, length:, 0].copy()
+
+
+def get_forecaster(model):
+    """
+    Return a Forecaster for a loaded Keras model. Objects that already
+    provide step/rollout (a Forecaster, or e.g. lite_forecaster.LiteForecaster)
+    are returned as is.
+
+    Wrapping traces a new graph, so callers keep the Forecaster for as long
+    as they use the model (ModelRuntime holds it next to the model). It is
+    deliberately not cached here: a module-level cache would keep every
+    model it has seen alive.
+    """
+    if hasattr(model, "rollout"):
+        return model
+    return Forecaster(model)
+
+
+def iterative_forecast_backend(model, initial_sequence, exo_input, forecast_horizon):
+    """
+    Iteratively forecast consumption for 'forecast_horizon' steps ahead.
+    At each step, predict the next consumption value using the current historical sequence and exogenous input,
+    update the sequence by dropping the oldest value and appending the new prediction,
+    and finally return the prediction of the final step, shape (1, 1).
+    Pass a Forecaster (see get_forecaster) when calling this repeatedly.
+    """
+    trajectory = get_forecaster(model).rollout(initial_sequence, exo_input, forecast_horizon)
+    return trajectory[:, -1:]
+
+
+class TrajectoryCache:
+    """
+    Thread-safe LRU cache of scaled forecast trajectories.
+
+    Entries are keyed by the exogenous feature vector and a fingerprint of the
+    history window; each entry keeps the longest trajectory computed so far for
+    that key. Because the forecast is deterministic, a shorter horizon is a
+    prefix of a longer one, so after horizon 24 has been computed any horizon
+    up to 24 is a cache hit, and a longer one only runs the missing steps.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(initial_sequence, exo_input):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(initial_sequence, dtype=np.float32).tobytes())
+        digest.update(np.ascontiguousarray(exo_input, dtype=np.float32).tobytes())
+        return digest.digest()
+
+    def get(self, key, horizon=None):
+        """
+        Return the longest cached trajectory for key, or None. With a
+        `horizon`, the lookup counts as a hit if the entry covers that many
+        steps and as a miss otherwise.
+        """
+        with self._lock:
+            trajectory = self._entries.get(key)
+            if trajectory is not None:
+                self._entries.move_to_end(key)
+            if horizon is not None:
+                if trajectory is not None and len(trajectory) >= horizon:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return trajectory
+
+    def put(self, key, trajectory):
+        trajectory = np.array(trajectory, dtype=np.float32)
+        trajectory.setflags(write=False)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or len(trajectory) > len(current):
+                self._entries[key] = trajectory
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _rollout_single(forecaster, initial_sequence, exo_input, forecast_horizon, scheduler=None, timeout=None):
+    if scheduler is not None:
+        return scheduler.forecast(initial_sequence, exo_input, forecast_horizon, timeout=timeout,
+                                  forecaster=forecaster)
+    return forecaster.rollout(initial_sequence, exo_input, forecast_horizon)[0]
+
+
+def forecast_trajectory(model, initial_sequence, exo_input, forecast_horizon, cache=None, scheduler=None,
+                        timeout=None):
+    """
+    Forecast every step up to 'forecast_horizon' for a single series and return
+    the scaled trajectory, shape (forecast_horizon,). `model` is a Forecaster
+    (or a Keras model, wrapped for this call).
+
+    With a TrajectoryCache, a previously computed trajectory for the same
+    history window and exogenous input is reused: shorter horizons are sliced
+    from it and longer ones continue the rollout from its last step.
+    With an InferenceScheduler, the steps that do run are coalesced with
+    concurrent requests into batched forward passes.
+    """
+    forecaster = get_forecaster(model)
+    if cache is None:
+        return _rollout_single(forecaster, initial_sequence, exo_input, forecast_horizon, scheduler, timeout)
+
+    key = cache.make_key(initial_sequence, exo_input)
+    cached = cache.get(key, forecast_horizon)
+    if cached is not None and len(cached) >= forecast_horizon:
+        return cached[:forecast_horizon]
+
+    if cached is None:
+        trajectory = _rollout_single(forecaster, initial_sequence, exo_input, forecast_horizon, scheduler, timeout)
+    else:
+        # Resume from the cached steps: the window is the last
+        # sequence_length values of history followed by the cached predictions
+        sequence_length = forecaster.sequence_length
+        history = np.concatenate([np.asarray(initial_sequence, dtype=np.float32).reshape(-1), cached])
+        window = history[-sequence_length:].reshape(1, -1, 1)
+        remaining = _rollout_single(forecaster, window, exo_input, forecast_horizon - len(cached), scheduler, timeout)
+        trajectory = np.concatenate([cached, remaining])
+    cache.put(key, trajectory)
+    return trajectory
+
+
+def forecast_trajectories(model, initial_sequence, exo_inputs, forecast_horizon, cache=None):
+    """
+    Forecast N scenarios that share one history window but differ in their
+    exogenous inputs (shape (N, n_features)). All scenarios are rolled forward
+    together as one (N, sequence_length, 1) batch per step; returns the scaled
+    trajectories, shape (N, forecast_horizon). `model` is a Forecaster (or a
+    Keras model, wrapped for this call).
+
+    With a TrajectoryCache, scenarios already cached for at least
+    'forecast_horizon' steps are served from it and only the rest are run.
+    """
+    exo_inputs = np.asarray(exo_inputs, dtype=np.float32)
+    forecaster = get_forecaster(model)
+    if cache is None:
+        return forecaster.rollout(initial_sequence, exo_inputs, forecast_horizon)
+
+    trajectories = np.empty((len(exo_inputs), forecast_horizon), dtype=np.float32)
+    keys = [cache.make_key(initial_sequence, exo) for exo in exo_inputs]
+    missing = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key, forecast_horizon)
+        if cached is not None and len(cached) >= forecast_horizon:
+            trajectories[i] = cached[:forecast_horizon]
+        else:
+            missing.append(i)
+
+    if missing:
+        computed = forecaster.rollout(initial_sequence, exo_inputs[missing], forecast_horizon)
+        trajectories[missing] = computed
+        for i, trajectory in zip(missing, computed):
+            cache.put(keys[i], trajectory)
+    return trajectories
@@ -0,0 +1,25 @@
+"""
+gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`, overridable
+through the environment.
+
+Each worker process loads its own copy of the model (the app is not
+preloaded: TensorFlow does not survive a fork) and serves requests on
+WEB_THREADS threads. /predict request threads wait on the micro-batching
+scheduler and other model work runs on the app's bounded inference
+executor (INFERENCE_WORKERS / INFERENCE_MAX_PENDING). Either way at most
+FORECAST_SLOTS request threads wait on forecasts; the app reads WEB_THREADS
+too and defaults FORECAST_SLOTS to WEB_THREADS - DATA_THREAD_RESERVE (2),
+so /consumption and /metrics always have threads left and further
+forecasts get a 503 with Retry-After.
+"""
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("WEB_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "8"))
+timeout = int(os.environ.get("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = False
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
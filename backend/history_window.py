@@ -0,0 +1,185 @@
+import io
+import os
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+from building_store import _sort_unique
+
+logger = logging.getLogger(__name__)
+
+TARGET_COLUMN = "Use [kW]"
+TIME_COLUMN = "Time"
+
+
+class HistoryWindow:
+    """
+    The last `sequence_length` consumption readings, already scaled with the
+    target scaler and kept in memory for the forecast hot path.
+
+    The source CSV is read once. After that a background thread stats it every
+    `check_interval` seconds: if rows were appended only the new tail is
+    parsed and merged into the window, and any other change triggers a full
+    reload. Readings ingested for `building` into an IngestLog are merged in
+    the same way. New readings can also be pushed directly with `append`.
+    `get` never touches the file system.
+
+    Readings are merged by timestamp with the rule BuildingDataStore uses:
+    rows are ordered by time and a later reading for an existing timestamp
+    replaces it, so out-of-order and duplicate ingests give the same window
+    as the tail of the building's dataset.
+    """
+
+    def __init__(self, csv_path, sequence_length, target_scaler, column=TARGET_COLUMN, check_interval=5.0,
+                 ingest_log=None, building=None, time_column=TIME_COLUMN):
+        self.csv_path = csv_path
+        self.sequence_length = sequence_length
+        self.target_scaler = target_scaler
+        self.column = column
+        self.time_column = time_column
+        self.check_interval = check_interval
+        self.ingest_log = ingest_log
+        self.building = building
+        self._log_records = 0  # ingested records consumed so far
+        self._lock = threading.Lock()
+        self._window = None
+        self._times = None  # timestamps of the readings in the window, ascending
+        self._raw = None    # the window's readings before scaling
+        self._header = None
+        self._stat = None  # (st_ino, st_mtime_ns) of the last read
+        self._offset = 0   # bytes of the CSV consumed so far
+        self._watcher = None
+        self._stopped = threading.Event()
+
+    def get(self):
+        """Return the scaled window, shape (1, sequence_length, 1). Read-only."""
+        window = self._window
+        if window is None:
+            with self._lock:
+                if self._window is None:
+                    self._load_full()
+                window = self._window
+            self._start_watcher()
+        return window.reshape(1, -1, 1)
+
+    def append(self, times, values):
+        """Merge raw (unscaled) readings taken at `times` into the window."""
+        values = np.asarray(values, dtype=float).reshape(-1)
+        if not len(values):
+            return
+        with self._lock:
+            if self._window is None:
+                self._load_full()
+            self._merge(pd.to_datetime(times), values)
+
+    def _merge(self, times, values):
+        """
+        Merge readings into the window by timestamp, keeping the last reading
+        per timestamp. Readings older than the window can only land before
+        its first row, so the last `sequence_length` merged rows are exactly
+        the tail of the full history.
+        """
+        times = np.asarray(times, dtype="datetime64[ns]")
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnat(times)
+        if self._times is not None:
+            times = np.concatenate([self._times, times[present]])
+            values = np.concatenate([self._raw, values[present]])
+        else:
+            times, values = times[present], values[present]
+        times, columns = _sort_unique(times, {self.column: values})
+        times, values = times[-self.sequence_length:], columns[self.column][-self.sequence_length:]
+        window = self.target_scaler.transform(values.reshape(-1, 1))[:, 0]
+        window.setflags(write=False)
+        self._times, self._raw, self._window = times, values, window
+
+    def _read_times(self, df):
+        if self.time_column not in df.columns:
+            raise ValueError(f"CSV file must contain '{self.time_column}' column.")
+        return pd.to_datetime(df[self.time_column], errors="coerce").values
+
+    def _load_full(self):
+        stat = os.stat(self.csv_path)
+        with open(self.csv_path, "rb") as f:
+            raw = f.read()
+        df = pd.read_csv(io.BytesIO(raw))
+        if self.column not in df.columns:
+            raise ValueError(f"CSV file must contain '{self.column}' column.")
+        times = self._read_times(df)
+        consumption = df[self.column].values  # shape: (n,)
+        log_records = 0
+        if self.ingest_log is not None:
+            records = self.ingest_log.read(self.building)
+            log_records = len(records)
+            times = np.concatenate([times, records[TIME_COLUMN].astype("datetime64[ns]")])
+            consumption = np.concatenate([consumption, records[self.column]])
+
+        self._times = self._raw = None
+        self._merge(times, consumption)
+        if len(self._raw) < self.sequence_length:
+            found = len(self._raw)
+            self._times = self._raw = self._window = None
+            raise ValueError(f"Not enough historical data. Required: {self.sequence_length}, Found: {found}")
+        self._header = df.columns.tolist()
+        self._stat = (stat.st_ino, stat.st_mtime_ns)
+        self._offset = len(raw)
+        self._log_records = log_records
+        logger.info(f"Loaded history window from {self.csv_path}")
+
+    def refresh(self):
+        """
+        Bring the window up to date with the CSV and the ingest log. Appended
+        rows and records are parsed and merged incrementally; truncation,
+        replacement or in-place edits of the CSV cause a full reload.
+        """
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._window is None:
+                return
+            if self._stat != (stat.st_ino, stat.st_mtime_ns):
+                self._refresh_csv(stat)
+            if self.ingest_log is not None:
+                records = self.ingest_log.read(self.building, start=self._log_records)
+                if len(records):
+                    self._merge(records[TIME_COLUMN].astype("datetime64[ns]"), records[self.column])
+                    self._log_records += len(records)
+
+    def _refresh_csv(self, stat):
+        if stat.st_ino != self._stat[0] or stat.st_size <= self._offset:
+            self._load_full()
+            return
+        with open(self.csv_path, "rb") as f:
+            f.seek(self._offset)
+            tail = f.read(stat.st_size - self._offset)
+        # Only consume complete lines; a partially written row is picked up next time
+        end = tail.rfind(b"\n") + 1
+        if end == 0:
+            return
+        rows = pd.read_csv(io.BytesIO(tail[:end]), header=None, names=self._header)
+        if len(rows):
+            self._merge(self._read_times(rows), rows[self.column].values)
+        self._offset += end
+        self._stat = (stat.st_ino, stat.st_mtime_ns)
+
+    def _start_watcher(self):
+        if self._watcher is not None or not self.check_interval:
+            return
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="history-window-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while not self._stopped.wait(self.check_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh history window from {self.csv_path}: {e}")
+
+    def stop(self):
+        self._stopped.set()
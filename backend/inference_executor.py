@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferenceBusy(RuntimeError):
+    """Raised when the inference executor already has its maximum of pending tasks."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for model work with a cap on running plus queued tasks.
+
+    Request threads hand forecasts to it and wait for the result, so at most
+    `max_workers` forecasts use the model at once and at most `max_pending`
+    request threads are ever parked on model work. Beyond that `submit`
+    fails fast with InferenceBusy instead of queueing, which keeps the
+    remaining server threads free for data routes such as /consumption.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    def _release(self, _future):
+        with self._stats_lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise InferenceBusy(f"Inference queue is full ({self.max_pending} pending)")
+        with self._stats_lock:
+            self.pending += 1
+            self.submitted += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """Run fn in the pool and wait for its result (concurrent.futures.TimeoutError after timeout)."""
+        return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+            }
+
+
+class RequestSlots:
+    """
+    Non-blocking cap on request threads parked on model work, whether they
+    wait on the executor or on the micro-batching scheduler. With the server
+    running a fixed number of threads, keeping this below that number leaves
+    threads for data routes however many forecasts arrive; requests beyond
+    it are rejected with InferenceBusy instead of waiting for a thread.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.rejected = 0
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise InferenceBusy(f"All {self.limit} forecast slots are busy")
+        with self._stats_lock:
+            self.in_use += 1
+
+    def release(self):
+        with self._stats_lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._stats_lock:
+            return {"limit": self.limit, "in_use": self.in_use, "rejected": self.rejected}
@@ -0,0 +1,284 @@
+import logging
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from inference_executor import InferenceBusy
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _ForecastJob:
+    """One pending forecast: its own sliding window buffer plus its exogenous input."""
+
+    __slots__ = ("forecaster", "buffer", "exo", "horizon", "step", "future", "submitted_at")
+
+    def __init__(self, forecaster, initial_sequence, exo, horizon, sequence_length):
+        self.forecaster = forecaster
+        self.buffer = np.empty(sequence_length + horizon, dtype=np.float32)
+        self.buffer[:sequence_length] = np.asarray(initial_sequence, dtype=np.float32).reshape(-1)
+        self.exo = np.asarray(exo, dtype=np.float32).reshape(-1)
+        self.horizon = horizon
+        self.step = 0
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Background worker that coalesces concurrent forecast requests into batched
+    forward passes of the hybrid model.
+
+    Requests are queued by `submit`. When the worker is idle it waits for the
+    first request, then keeps collecting for up to `batch_window_ms` (or until
+    `max_batch` requests are in flight). Every forward pass then advances all
+    in-flight requests by one horizon step at once; requests are independent,
+    so those at different steps share the same batch. A request leaves the
+    batch as soon as it reaches its horizon and newly queued requests join at
+    the next step, so a long forecast never holds up a short one.
+
+    One scheduler can serve several models: each job carries its forecaster
+    (the scheduler's own by default) and every pass runs one forward pass per
+    model present in the batch.
+
+    Backpressure: with `max_pending`, `submit` raises InferenceBusy once that
+    many requests are queued or in flight. Callers that give up on a request
+    cancel its future and it leaves the batch at the next step.
+
+    `stop` ends the worker thread; requests still queued or in flight fail
+    and later submits raise InferenceBusy.
+    """
+
+    def __init__(self, forecaster=None, batch_window_ms=5.0, max_batch=64, max_pending=None):
+        self.forecaster = forecaster
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Per-forecaster (sequence batch, exo batch) input buffers, dropped with the model
+        self._batch_buffers = weakref.WeakKeyDictionary()
+        self._pending = 0  # submitted requests whose future is not done yet
+        self._rejected = 0
+        self._stopped = False
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._requests = 0
+        self._batches = 0
+        self._batch_size_total = 0
+        self._batch_size_max = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._in_flight = 0
+
+    def _ensure_worker(self):
+        # Started lazily so that forking servers start it in each worker process
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                    self._thread.start()
+
+    def submit(self, initial_sequence, exo, forecast_horizon, forecaster=None):
+        """
+        Queue a forecast and return a Future resolving to its scaled trajectory,
+        shape (forecast_horizon,). Raises InferenceBusy when `max_pending`
+        requests are already pending.
+        """
+        forecaster = forecaster or self.forecaster
+        if forecaster is None:
+            raise ValueError("No forecaster given and the scheduler has no default")
+        job = _ForecastJob(forecaster, initial_sequence, exo, forecast_horizon, forecaster.sequence_length)
+        job.future.add_done_callback(self._job_done)
+        with self._stats_lock:
+            if self._stopped:
+                raise InferenceBusy("Inference scheduler is stopped")
+            if self.max_pending and self._pending >= self.max_pending:
+                self._rejected += 1
+                raise InferenceBusy(f"Inference queue is full ({self.max_pending} pending)")
+            self._pending += 1
+            # Queued under the lock, so a job is either ahead of stop()'s sentinel or rejected
+            self._queue.put(job)
+        self._ensure_worker()
+        return job.future
+
+    def _job_done(self, _future):
+        with self._stats_lock:
+            self._pending -= 1
+
+    def forecast(self, initial_sequence, exo, forecast_horizon, timeout=None, forecaster=None):
+        """Blocking wrapper around submit(); the request is cancelled if it times out."""
+        future = self.submit(initial_sequence, exo, forecast_horizon, forecaster)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _buffers_for(self, forecaster):
+        buffers = self._batch_buffers.get(forecaster)
+        if buffers is None:
+            buffers = (np.empty((self.max_batch, forecaster.sequence_length, 1), dtype=np.float32),
+                       np.empty((self.max_batch, forecaster.n_features), dtype=np.float32))
+            self._batch_buffers[forecaster] = buffers
+        return buffers
+
+    def _advance(self, forecaster, jobs):
+        """Run one forward pass for the jobs of one model; returns those not yet finished."""
+        seq_batch, exo_batch = self._buffers_for(forecaster)
+        length = forecaster.sequence_length
+        n = len(jobs)
+        for i, job in enumerate(jobs):
+            seq_batch[i, :, 0] = job.buffer[job.step:job.step + length]
+            exo_batch[i] = job.exo
+
+        try:
+            started = time.perf_counter()
+            preds = forecaster.step(seq_batch[:n], exo_batch[:n])[:, 0]
+            metrics.inference_seconds.observe(time.perf_counter() - started, type(forecaster).__name__)
+        except Exception as e:
+            for job in jobs:
+                _fail(job, e)
+            return []
+
+        still_active = []
+        for job, pred in zip(jobs, preds):
+            job.buffer[length + job.step] = pred
+            job.step += 1
+            if job.step == job.horizon:
+                try:
+                    job.future.set_result(job.buffer[length:].copy())
+                except InvalidStateError:
+                    pass  # cancelled by the caller
+            else:
+                still_active.append(job)
+        return still_active
+
+    def _collect(self, active):
+        """Add queued jobs to the active batch, waiting up to the window if idle."""
+        if not active:
+            job = self._queue.get()
+            if job is None:  # stop() sentinel
+                return
+            active.append(job)
+            deadline = time.perf_counter() + self.batch_window
+            while len(active) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    return
+                active.append(job)
+        # Jobs that arrived while we were busy join without any extra waiting
+        while len(active) < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return
+            active.append(job)
+
+    def _run(self):
+        active = []
+        while not self._stopped:
+            try:
+                active = self._run_once(active)
+            except Exception as e:
+                # Never leave callers waiting on a batch the worker gave up on
+                logger.error(f"Inference scheduler failed a batch of {len(active)} requests: {e}")
+                for job in active:
+                    _fail(job, e)
+                active = []
+            with self._stats_lock:
+                self._in_flight = len(active)
+        error = InferenceBusy("Inference scheduler is stopped")
+        for job in active:
+            _fail(job, error)
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                _fail(job, error)
+        with self._stats_lock:
+            self._in_flight = 0
+
+    def stop(self):
+        """End the worker thread (without waiting for it); pending requests fail with InferenceBusy."""
+        with self._stats_lock:
+            self._stopped = True
+        self._queue.put(None)
+
+    def _run_once(self, active):
+        """Collect queued jobs and advance the batch by one step; returns the jobs still running."""
+        before = len(active)
+        self._collect(active)
+        started = time.perf_counter()
+        with self._stats_lock:
+            for job in active[before:]:
+                wait = started - job.submitted_at
+                self._requests += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+        # Requests whose caller gave up (timed out) take no more forward passes
+        active = [job for job in active if not job.future.cancelled()]
+        n = len(active)
+        if not n:
+            return active
+
+        with self._stats_lock:
+            self._batches += 1
+            self._batch_size_total += n
+            self._batch_size_max = max(self._batch_size_max, n)
+            self._in_flight = n
+
+        groups = {}
+        for job in active:
+            groups.setdefault(id(job.forecaster), []).append(job)
+        still_active = []
+        for jobs in groups.values():
+            still_active.extend(self._advance(jobs[0].forecaster, jobs))
+        return still_active
+
+    def stats(self):
+        """Queue depth, batch size and queue wait time counters."""
+        with self._stats_lock:
+            batches = self._batches
+            requests = self._requests
+            return {
+                "queue_depth": self._queue.qsize(),
+                "in_flight": self._in_flight,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self._rejected,
+                "requests": requests,
+                "batches": batches,
+                "avg_batch_size": self._batch_size_total / batches if batches else 0.0,
+                "max_batch_size": self._batch_size_max,
+                "avg_wait_ms": 1000.0 * self._wait_total / requests if requests else 0.0,
+                "max_wait_ms": 1000.0 * self._wait_max,
+                "batch_window_ms": 1000.0 * self.batch_window,
+                "max_batch": self.max_batch,
+            }
+
+
+def _fail(job, error):
+    try:
+        job.future.set_exception(error)
+    except InvalidStateError:
+        pass  # already resolved or cancelled
@@ -0,0 +1,178 @@
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; only in-process locking then
+    fcntl = None
+
+INGEST_DIR = "ingest_log"
+TIME_COLUMN = "Time"
+
+# Same columns as the datasets/*_data.csv files, after the time column
+READING_COLUMNS = ["Winter", "Spring", "Summer", "Fall",
+                   "Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)",
+                   "Occupancy", "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]", "Use [kW]"]
+REQUIRED_COLUMNS = ["Use [kW]"]
+
+# Fixed-width little-endian records: int64 nanoseconds since the epoch + float64 per column
+RECORD_DTYPE = np.dtype([(TIME_COLUMN, "<i8")] + [(column, "<f8") for column in READING_COLUMNS])
+CHUNK_RECORDS = 65536  # records per chunk file (~6.8 MB)
+
+_CHUNK_PATTERN = re.compile(r"^chunk-(\d{6})\.bin$")
+
+
+def parse_readings(readings):
+    """
+    Validate a list of reading dicts (keys as in the *_data.csv header) and
+    pack them into a RECORD_DTYPE array. Missing optional columns become NaN.
+    """
+    if not readings:
+        raise ValueError("No readings provided")
+    if not all(isinstance(reading, dict) for reading in readings):
+        raise ValueError("Each reading must be a JSON object")
+    df = pd.DataFrame.from_records(readings)
+    for column in [TIME_COLUMN] + REQUIRED_COLUMNS:
+        if column not in df.columns or df[column].isna().any():
+            raise ValueError(f"Every reading must have a '{column}' value")
+    unknown = set(df.columns) - set(READING_COLUMNS) - {TIME_COLUMN}
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+    try:
+        times = pd.to_datetime(df[TIME_COLUMN])
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid '{TIME_COLUMN}' value: {e}")
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records[TIME_COLUMN] = times.values.astype("datetime64[ns]").astype(np.int64)
+    for column in READING_COLUMNS:
+        if column in df.columns:
+            try:
+                records[column] = pd.to_numeric(df[column]).astype(np.float64).values
+            except (ValueError, TypeError):
+                raise ValueError(f"Column '{column}' must be numeric")
+        else:
+            records[column] = np.nan
+    return records
+
+
+class IngestLog:
+    """
+    Append-only, chunked binary log of meter readings, one directory per building.
+
+    Each chunk file (`<dir>/<Building>/chunk-000000.bin`, ...) is a flat array
+    of RECORD_DTYPE records that can be memory-mapped as is. Writers append
+    whole records under a per-building lock (and an flock where available, so
+    several server processes can share a log); readers take no locks and only
+    look at complete records, so a concurrent write never blocks or corrupts
+    a read.
+
+    Record counts are cached per building as the records in all but the last
+    chunk plus the path of the last chunk, so `record_count` (called on every
+    data request) costs two stats instead of one per chunk. The chunk list is
+    re-scanned only when the building directory's mtime changes, i.e. when a
+    chunk is created, by this process or another one.
+    """
+
+    def __init__(self, root_dir=INGEST_DIR, chunk_records=CHUNK_RECORDS):
+        self.root_dir = root_dir
+        self.chunk_records = chunk_records
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._counts = {}  # building -> (directory mtime_ns, last chunk path, records before it)
+
+    def _building_dir(self, building):
+        return os.path.join(self.root_dir, building)
+
+    def _lock_for(self, building):
+        with self._locks_guard:
+            return self._locks.setdefault(building, threading.Lock())
+
+    def _chunks(self, building):
+        """Sorted [(path, size_in_bytes)] of a building's chunk files."""
+        try:
+            entries = list(os.scandir(self._building_dir(building)))
+        except FileNotFoundError:
+            return []
+        chunks = [(entry.path, entry.stat().st_size) for entry in entries if _CHUNK_PATTERN.match(entry.name)]
+        return sorted(chunks)
+
+    def _scan_count(self, building, directory_mtime_ns):
+        chunks = self._chunks(building)
+        if not chunks:
+            self._counts[building] = (directory_mtime_ns, None, 0)
+            return 0
+        before = sum(size // RECORD_DTYPE.itemsize for _, size in chunks[:-1])
+        self._counts[building] = (directory_mtime_ns, chunks[-1][0], before)
+        return before + chunks[-1][1] // RECORD_DTYPE.itemsize
+
+    def record_count(self, building):
+        try:
+            directory_mtime_ns = os.stat(self._building_dir(building)).st_mtime_ns
+        except FileNotFoundError:
+            self._counts.pop(building, None)
+            return 0
+        cached = self._counts.get(building)
+        if cached is None or cached[0] != directory_mtime_ns:
+            return self._scan_count(building, directory_mtime_ns)
+        _, last_chunk, before = cached
+        if last_chunk is None:
+            return 0
+        try:
+            return before + os.stat(last_chunk).st_size // RECORD_DTYPE.itemsize
+        except FileNotFoundError:
+            return self._scan_count(building, directory_mtime_ns)
+
+    def append(self, building, records):
+        """Append RECORD_DTYPE records and return the building's new record count."""
+        records = np.ascontiguousarray(records, dtype=RECORD_DTYPE)
+        directory = self._building_dir(building)
+        os.makedirs(directory, exist_ok=True)
+
+        with self._lock_for(building):
+            lock_file = open(os.path.join(directory, ".lock"), "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                chunks = self._chunks(building)
+                index = len(chunks) - 1 if chunks else 0
+                if chunks and chunks[-1][1] // RECORD_DTYPE.itemsize >= self.chunk_records:
+                    index += 1
+                before = sum(size // RECORD_DTYPE.itemsize for _, size in chunks[:index])
+                path = os.path.join(directory, f"chunk-{index:06d}.bin")
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+                try:
+                    data = memoryview(records.tobytes())
+                    while data:
+                        data = data[os.write(fd, data):]
+                    count = before + os.fstat(fd).st_size // RECORD_DTYPE.itemsize
+                finally:
+                    os.close(fd)
+                self._counts[building] = (os.stat(directory).st_mtime_ns, path, before)
+            finally:
+                lock_file.close()  # also releases the flock
+        return count
+
+    def read(self, building, start=0):
+        """
+        Return the building's records from index `start` onwards. Chunks are
+        memory-mapped, so only the pages that are touched are read.
+        """
+        parts = []
+        offset = 0
+        for path, size in self._chunks(building):
+            count = size // RECORD_DTYPE.itemsize
+            if offset + count > start and count:
+                records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+                parts.append(records[max(0, start - offset):])
+            offset += count
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
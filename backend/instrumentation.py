@@ -0,0 +1,180 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label set."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-1]!r}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """The process's latency histograms, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "api_request_duration_seconds", "Request latency by route, method and status.",
+            ("route", "method", "status"))
+        self.stage_seconds = Histogram(
+            "api_stage_duration_seconds", "Time spent in each stage of a request.", ("route", "stage"))
+        self.inference_seconds = Histogram(
+            "inference_forward_pass_seconds", "Duration of one batched forward pass of a forecast model.",
+            ("forecaster",))
+
+    def stage_timer(self, route):
+        return StageTimer(self, route)
+
+    def render(self):
+        histograms = (self.request_seconds, self.stage_seconds, self.inference_seconds)
+        return "\n".join(histogram.render() for histogram in histograms) + "\n"
+
+    def clear(self):
+        for histogram in (self.request_seconds, self.stage_seconds, self.inference_seconds):
+            histogram.clear()
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one request without nesting: each
+    `mark(stage)` records the time since the previous mark (or since the
+    timer was created) as that stage.
+    """
+
+    def __init__(self, registry, route):
+        self.registry = registry
+        self.route = route
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.registry.stage_seconds.observe(now - self._last, self.route, stage)
+        self._last = now
+
+
+metrics = MetricsRegistry()
+
+
+class _SamplingCapture:
+    """Background thread that samples the stacks of every other thread until stopped."""
+
+    def __init__(self, interval, request_ident):
+        self.interval = interval
+        self.request_ident = request_ident
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                thread = "request" if ident == self.request_ident else names.get(ident, str(ident))
+                stack.append(thread)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class RequestProfiler:
+    """
+    Sampling profiler for single requests. While a capture runs, a background
+    thread records the stack of every thread every `interval` seconds, so
+    work the request hands to the inference scheduler or executor threads is
+    included (cProfile only sees the thread that enabled it). The request's
+    own thread is labelled "request", the others by thread name.
+
+    Only one request is profiled at a time; `start` returns None when another
+    capture is running. Captures are written to `profile_dir` in the
+    collapsed-stack format ("thread;outer;...;inner count" per line) that
+    flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, profile_dir, interval=0.002):
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start sampling on behalf of the calling (request) thread."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        capture = _SamplingCapture(self.interval, threading.get_ident())
+        capture.start()
+        return capture
+
+    def stop(self, capture, name):
+        """Stop a capture and return the path of the written profile."""
+        try:
+            stacks = capture.stop()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir,
+                                f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            return path
+        finally:
+            self._lock.release()
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:  # fall back to the interpreter bundled with full TensorFlow
+    Interpreter = None
+
+LITE_MODEL_FILE = "model.tflite"
+LITE_SCALERS_FILE = "scalers.json"
+LITE_META_FILE = "meta.json"
+
+
+class AffineScaler:
+    """
+    Minimal stand-in for a fitted sklearn MinMaxScaler/StandardScaler:
+    transform(X) = X * a + b per column, so serving needs neither sklearn nor joblib.
+    """
+
+    def __init__(self, a, b):
+        self.a = np.asarray(a, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        if hasattr(scaler, "min_"):  # MinMaxScaler: X * scale_ + min_
+            return cls(scaler.scale_, scaler.min_)
+        if hasattr(scaler, "mean_"):  # StandardScaler: (X - mean_) / scale_
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones_like(scaler.mean_)
+            return cls(1.0 / scale, -scaler.mean_ / scale)
+        raise TypeError(f"Unsupported scaler: {type(scaler).__name__}")
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.a + self.b
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.b) / self.a
+
+    def to_dict(self):
+        return {"a": self.a.tolist(), "b": self.b.tolist()}
+
+
+class LiteForecaster:
+    """
+    The hybrid model exported with `export_lite.py`, run by the TFLite
+    interpreter. Offers the same `step`/`rollout` interface as
+    forecasting.Forecaster, so the forecasting helpers and the inference
+    scheduler accept it in place of a Keras model.
+
+    The interpreter is not thread-safe, so calls are serialized; input
+    tensors are only resized when the batch size changes.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        if Interpreter is not None:
+            interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        else:
+            import tensorflow as tf
+
+            interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self._interpreter = interpreter
+        self._lock = threading.Lock()
+        inputs = sorted(interpreter.get_input_details(), key=lambda detail: len(detail["shape"]), reverse=True)
+        # The history window is the 3-D input, the exogenous features the 2-D one
+        self._sequence_input = inputs[0]["index"]
+        self._exo_input = inputs[1]["index"]
+        self._output = interpreter.get_output_details()[0]["index"]
+        self.sequence_length = int(inputs[0]["shape"][1])
+        self.n_features = int(inputs[1]["shape"][-1])
+        self._batch_size = None
+
+    def _resize(self, n):
+        if n != self._batch_size:
+            self._interpreter.resize_tensor_input(self._sequence_input, [n, self.sequence_length, 1])
+            self._interpreter.resize_tensor_input(self._exo_input, [n, self.n_features])
+            self._interpreter.allocate_tensors()
+            self._batch_size = n
+
+    def _invoke(self, sequences, exo):
+        self._resize(len(sequences))
+        self._interpreter.set_tensor(self._sequence_input, sequences)
+        self._interpreter.set_tensor(self._exo_input, exo)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output).copy()
+
+    def step(self, sequences, exo):
+        """One forward pass: (N, sequence_length, 1) and (N, n_features) -> (N, 1)."""
+        with self._lock:
+            return self._invoke(np.ascontiguousarray(sequences, dtype=np.float32),
+                                np.ascontiguousarray(exo, dtype=np.float32))
+
+    def rollout(self, initial_sequences, exo, forecast_horizon):
+        """Same contract as Forecaster.rollout: returns (N, forecast_horizon) scaled trajectories."""
+        initial_sequences = np.asarray(initial_sequences, dtype=np.float32)
+        exo = np.ascontiguousarray(exo, dtype=np.float32)
+        n = max(initial_sequences.shape[0], exo.shape[0])
+        exo = np.ascontiguousarray(np.broadcast_to(exo, (n, self.n_features)))
+        length = self.sequence_length
+
+        buffer = np.empty((n, length + forecast_horizon, 1), dtype=np.float32)
+        buffer[:, :length, :] = initial_sequences
+        with self._lock:
+            for i in range(forecast_horizon):
+                pred = self._invoke(np.ascontiguousarray(buffer[:, i:i + length, :]), exo)
+                buffer[:, length + i, 0] = pred[:, 0]
+        return buffer[:, length:, 0].copy()
+
+
+def load_lite_bundle(bundle_dir, num_threads=None):
+    """Return (LiteForecaster, feature AffineScaler, target AffineScaler, meta) from an exported bundle."""
+    with open(os.path.join(bundle_dir, LITE_SCALERS_FILE)) as f:
+        scalers = json.load(f)
+    with open(os.path.join(bundle_dir, LITE_META_FILE)) as f:
+        meta = json.load(f)
+    forecaster = LiteForecaster(os.path.join(bundle_dir, LITE_MODEL_FILE), num_threads=num_threads)
+    feature_scaler = AffineScaler(**scalers["feature"])
+    target_scaler = AffineScaler(**scalers["target"])
+    return forecaster, feature_scaler, target_scaler, meta
@@ -0,0 +1,193 @@
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from lite_forecaster import LITE_MODEL_FILE
+from model_runtime import ModelRuntime
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_DIR = "model_registry"
+# File names of a Keras model version, as published by `python -m federated --registry`
+MODEL_FILE_STEM = "Using Federated Learning for Short-term Residential Load Forecasting"
+DEFAULT_VERSION = "default"
+
+
+class ModelEntry:
+    """Where one (building, version) model lives and which history it forecasts from."""
+
+    def __init__(self, building, version, model_dir=None, model_path=None, feature_scaler_path=None,
+                 target_scaler_path=None, history_csv_path=None, backend="keras", pinned=False):
+        self.building = building
+        self.version = version
+        self.backend = backend
+        self.pinned = pinned
+        self.lite_bundle_dir = model_dir if backend == "tflite" else None
+        self.model_path = model_path or (model_dir and os.path.join(model_dir, f"{MODEL_FILE_STEM}.h5"))
+        self.feature_scaler_path = feature_scaler_path or (
+            model_dir and os.path.join(model_dir, f"{MODEL_FILE_STEM}_feature.save"))
+        self.target_scaler_path = target_scaler_path or (
+            model_dir and os.path.join(model_dir, f"{MODEL_FILE_STEM}_target.save"))
+        self.history_csv_path = history_csv_path
+
+    @classmethod
+    def from_directory(cls, building, version, model_dir, history_csv_path):
+        backend = "tflite" if os.path.exists(os.path.join(model_dir, LITE_MODEL_FILE)) else "keras"
+        return cls(building, version, model_dir=model_dir, history_csv_path=history_csv_path, backend=backend)
+
+
+def version_sort_key(version):
+    """Natural order for version names: "v9" < "v10", "2026-1" < "2026-12"."""
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r"(\d+)", version) if part]
+
+
+def publish_model(model_dir, registry_dir, buildings, version=None):
+    """
+    Copy a Keras model and its scalers (MODEL_FILE_STEM files, as exported by
+    `python -m federated`) into a registry as `<registry_dir>/<Building>/<version>/`
+    for every building. The version defaults to the current time
+    (YYYYMMDD-HHMMSS), so later exports become each building's latest
+    version. Each version directory is written under a temporary name and
+    renamed into place, so a server never sees a partial copy.
+    Returns the version.
+    """
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    files = [f"{MODEL_FILE_STEM}.h5", f"{MODEL_FILE_STEM}_feature.save", f"{MODEL_FILE_STEM}_target.save"]
+    for building in buildings:
+        target = os.path.join(registry_dir, building, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version already exists: {target}")
+        staging = os.path.join(registry_dir, building, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in files:
+            shutil.copy2(os.path.join(model_dir, name), os.path.join(staging, name))
+        os.replace(staging, target)
+        logger.info(f"Published {building} model version {version} to {target}")
+    return version
+
+
+class ModelRegistry:
+    """
+    Forecast models keyed by (building, version), loaded on first use.
+
+    Versions are directories `<root_dir>/<Building>/<version>/` holding either
+    a Keras model with its scalers (what `python -m federated --registry`
+    publishes, see `publish_model`) or a TFLite bundle (see export_lite.py).
+    The latest version is the last one in natural order, so "v10" comes after
+    "v9". Entries can also be added with `register`, which is how the
+    community model is served from its existing files.
+
+    At most `max_resident` models stay loaded; the least recently used one is
+    dropped when another is loaded. Pinned entries (the default model) are
+    never dropped and do not count towards the limit. All models share one
+    inference scheduler, so concurrent forecasts for different buildings are
+    batched by a single worker.
+    """
+
+    def __init__(self, root_dir=MODEL_REGISTRY_DIR, max_resident=3, history_path_for=None, runtime_options=None,
+                 inference_scheduler=None):
+        self.root_dir = root_dir
+        self.max_resident = max_resident
+        self.history_path_for = history_path_for
+        self.runtime_options = runtime_options or {}
+        self.inference_scheduler = inference_scheduler
+        self._registered = {}
+        self._resident = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def register(self, entry):
+        self._registered[(entry.building, entry.version)] = entry
+
+    def versions(self, building):
+        """Known versions of a building's model, oldest first (natural order, see version_sort_key)."""
+        versions = {version for (name, version) in self._registered if name == building}
+        try:
+            # Dot-directories are versions still being published
+            versions.update(entry.name for entry in os.scandir(os.path.join(self.root_dir, building))
+                            if entry.is_dir() and not entry.name.startswith("."))
+        except FileNotFoundError:
+            pass
+        return sorted(versions, key=version_sort_key)
+
+    def buildings(self):
+        names = {name for (name, _) in self._registered}
+        try:
+            names.update(entry.name for entry in os.scandir(self.root_dir)
+                         if entry.is_dir() and not entry.name.startswith("."))
+        except FileNotFoundError:
+            pass
+        return sorted(names)
+
+    def _entry(self, building, version):
+        entry = self._registered.get((building, version))
+        if entry is not None:
+            return entry
+        model_dir = os.path.join(self.root_dir, building, version)
+        if not os.path.isdir(model_dir):
+            raise KeyError(f"No model for building {building!r} version {version!r}")
+        history = self.history_path_for(building) if self.history_path_for else None
+        return ModelEntry.from_directory(building, version, model_dir, history)
+
+    def resolve(self, building, version=None):
+        """Return the (building, version) key, picking the latest version if none is given."""
+        if version is None:
+            versions = self.versions(building)
+            if not versions:
+                raise KeyError(f"No model for building {building!r}")
+            version = versions[-1]
+        return building, version
+
+    def runtime(self, building, version=None):
+        """The ModelRuntime for a model, made resident (but not necessarily loaded yet)."""
+        key = self.resolve(building, version)
+        evicted = []
+        with self._lock:
+            runtime = self._resident.get(key)
+            if runtime is not None:
+                self._resident.move_to_end(key)
+                return runtime
+            entry = self._entry(*key)
+            runtime = ModelRuntime(entry.model_path, entry.feature_scaler_path, entry.target_scaler_path,
+                                   entry.history_csv_path, history_building=entry.building,
+                                   backend=entry.backend, lite_bundle_dir=entry.lite_bundle_dir,
+                                   inference_scheduler=self.inference_scheduler, **self.runtime_options)
+            self._resident[key] = runtime
+            if entry.pinned:
+                self._pinned.add(key)
+            self.loads += 1
+            unpinned = [k for k in self._resident if k not in self._pinned]
+            while len(unpinned) > self.max_resident:
+                oldest = unpinned.pop(0)
+                evicted.append((oldest, self._resident.pop(oldest)))
+                self.evictions += 1
+        for evicted_key, evicted_runtime in evicted:
+            logger.info(f"Evicting model {evicted_key[0]}/{evicted_key[1]}")
+            evicted_runtime.close()
+        return runtime
+
+    def get(self, building, version=None):
+        """The loaded ModelRuntime for a model; loads it if needed."""
+        return self.runtime(building, version).load()
+
+    def resident(self):
+        """[(building, version, runtime)] of the resident models, least recently used first."""
+        with self._lock:
+            return [(building, version, runtime) for (building, version), runtime in self._resident.items()]
+
+    def describe(self):
+        return {
+            "max_resident": self.max_resident,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "resident": [{"building": building, "version": version, **runtime.describe()}
+                         for building, version, runtime in self.resident()],
+        }
@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# "keras" serves the .h5 model through TensorFlow; "tflite" serves a bundle
+# written by export_lite.py (model, scalers and metadata) through the TFLite interpreter
+BACKENDS = ("keras", "tflite")
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Consistent view of a loaded runtime, so a request keeps working if the runtime is closed meanwhile
+RuntimeSnapshot = namedtuple("RuntimeSnapshot", ["forecaster", "feature_scaler", "target_scaler", "history_window",
+                                                 "trajectory_cache", "inference_scheduler"])
+
+
+class ModelRuntime:
+    """
+    The forecasting model (a Keras model, or a LiteForecaster with the
+    tflite backend), its scalers and everything derived from them: the
+    scaled history window, the trajectory cache and the micro-batching
+    inference scheduler (its own, or one shared with other runtimes).
+
+    Nothing is loaded (and TensorFlow is not imported) until `load` is first
+    called, normally by the background thread started with `start_warmup`
+    (the API starts it at startup or on the first request for the model and
+    never loads on a request thread), so processes that only serve data
+    routes start quickly. Loading happens once; concurrent callers wait for
+    it. A failed load is retried on the next call.
+    """
+
+    def __init__(self, model_path, feature_scaler_path, target_scaler_path, history_csv_path, sequence_length,
+                 history_building=None, ingest_log=None, trajectory_cache_size=256, batch_window_ms=5.0,
+                 max_batch=64, max_pending=None, backend="keras", lite_bundle_dir=None, inference_scheduler=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+        self.backend = backend
+        self.lite_bundle_dir = lite_bundle_dir
+        self.model_path = model_path
+        self.feature_scaler_path = feature_scaler_path
+        self.target_scaler_path = target_scaler_path
+        self.history_csv_path = history_csv_path
+        self.sequence_length = sequence_length
+        self.history_building = history_building
+        self.ingest_log = ingest_log
+        self.trajectory_cache_size = trajectory_cache_size
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.shared_scheduler = inference_scheduler
+
+        self.status = NOT_LOADED
+        self.error = None
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread = None
+
+        self.model = None
+        self.forecaster = None
+        self.feature_scaler = None
+        self.target_scaler = None
+        self.history_window = None
+        self.trajectory_cache = None
+        self.inference_scheduler = None
+
+    @property
+    def ready(self):
+        return self.status == READY
+
+    def load(self):
+        """Load the model and scalers if that has not happened yet and return self."""
+        if self.status != READY:
+            with self._lock:
+                if self.status != READY:
+                    self._load()
+        return self
+
+    def _load(self):
+        self.status = LOADING
+        self.error = None
+        timings = {}
+        start = time.perf_counter()
+        try:
+            if self.backend == "tflite":
+                model, feature_scaler, target_scaler = self._load_lite(timings)
+            else:
+                model, feature_scaler, target_scaler = self._load_keras(timings)
+
+            from forecasting import TrajectoryCache, get_forecaster
+            from inference_scheduler import InferenceScheduler
+            from history_window import HistoryWindow
+
+            step = time.perf_counter()
+            history_window = HistoryWindow(self.history_csv_path, self.sequence_length, target_scaler,
+                                           ingest_log=self.ingest_log, building=self.history_building)
+            history_window.get()
+            timings["history_window_s"] = time.perf_counter() - step
+
+            # Trace the inference graph now rather than on the first request
+            step = time.perf_counter()
+            forecaster = get_forecaster(model)
+            forecaster.step(np.zeros((1, forecaster.sequence_length, 1), dtype=np.float32),
+                            np.zeros((1, forecaster.n_features), dtype=np.float32))
+            timings["trace_s"] = time.perf_counter() - step
+
+            inference_scheduler = self.shared_scheduler
+            if inference_scheduler is None and self.max_batch > 0:
+                inference_scheduler = InferenceScheduler(forecaster, self.batch_window_ms, self.max_batch,
+                                                         max_pending=self.max_pending)
+        except Exception as e:
+            self.status = FAILED
+            self.error = str(e)
+            logger.error(f"Loading {self.backend} model failed: {e}")
+            raise
+
+        self.model = model
+        self.forecaster = forecaster
+        self.feature_scaler = feature_scaler
+        self.target_scaler = target_scaler
+        self.history_window = history_window
+        self.trajectory_cache = TrajectoryCache(self.trajectory_cache_size)
+        self.inference_scheduler = inference_scheduler
+        timings["total_s"] = time.perf_counter() - start
+        self.timings = timings
+        self.status = READY
+        logger.info(f"Loaded {self.backend} model in {timings['total_s']:.2f}s")
+
+    def _load_keras(self, timings):
+        step = time.perf_counter()
+        import joblib
+        from tensorflow.keras.models import load_model
+        timings["imports_s"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        model = load_model(self.model_path)
+        timings["load_model_s"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        feature_scaler = joblib.load(self.feature_scaler_path)
+        target_scaler = joblib.load(self.target_scaler_path)
+        timings["load_scalers_s"] = time.perf_counter() - step
+        return model, feature_scaler, target_scaler
+
+    def _load_lite(self, timings):
+        step = time.perf_counter()
+        from lite_forecaster import load_lite_bundle
+        timings["imports_s"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        model, feature_scaler, target_scaler, _ = load_lite_bundle(self.lite_bundle_dir)
+        timings["load_model_s"] = time.perf_counter() - step
+        return model, feature_scaler, target_scaler
+
+    def snapshot(self):
+        """
+        The loaded model's serving objects, read under the runtime's lock, or
+        None if it is not loaded (or is being loaded or closed right now).
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self.status != READY:
+                return None
+            return RuntimeSnapshot(self.forecaster, self.feature_scaler, self.target_scaler, self.history_window,
+                                   self.trajectory_cache, self.inference_scheduler)
+        finally:
+            self._lock.release()
+
+    def start_warmup(self):
+        """
+        Load in a daemon thread unless loaded or already loading; returns
+        immediately. After a failed load, calling it again retries.
+        """
+        if self.ready:
+            return
+        with self._warmup_lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+
+            def warm_up():
+                try:
+                    self.load()
+                except Exception:
+                    pass  # recorded in status/error; the next request retries
+
+            self._warmup_thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+            self._warmup_thread.start()
+
+    def close(self):
+        """
+        Stop the history window's watcher thread (and the runtime's own
+        inference scheduler, if it has one) and drop the model, its
+        forecaster and everything derived from them, so an evicted model is
+        freed once in-flight requests (which hold their own references) finish.
+        The runtime goes back to not loaded; loading it again starts over.
+        """
+        with self._lock:
+            if self.history_window is not None:
+                self.history_window.stop()
+            if self.inference_scheduler is not None and self.inference_scheduler is not self.shared_scheduler:
+                self.inference_scheduler.stop()
+            self.status = NOT_LOADED
+            self.model = None
+            self.forecaster = None
+            self.feature_scaler = None
+            self.target_scaler = None
+            self.history_window = None
+            self.trajectory_cache = None
+            self.inference_scheduler = None
+
+    def describe(self):
+        """Status, last error and load timing breakdown, for readiness checks."""
+        return {
+            "status": self.status,
+            "error": self.error,
+            "backend": self.backend,
+            "model_path": self.lite_bundle_dir if self.backend == "tflite" else self.model_path,
+            "timings": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+        }
@@ -0,0 +1,480 @@
+"""
+Turn the raw building exports in data/ into datasets in the format of the
+datasets/*_data.csv files served by app.py (and their columnar copies).
+
+    python prepare_data.py                       # every building, skipping unchanged inputs
+    python prepare_data.py --buildings Office    # one building
+    python prepare_data.py --force               # rebuild everything
+
+Output goes to a staging directory (datasets_staging/ by default), never
+straight over the served datasets. Each staged building is checked against
+the served one in --reference (row count, time coverage and per-column
+means over the overlapping hours) and against --max-reject-fraction and
+--max-gap-fraction; the script exits with status 1 if any check fails.
+Copy the staged *_data.csv files into datasets/ only after a clean run.
+
+Raw files are streamed in chunks with an explicit timestamp format per
+source instead of letting pandas guess per row. Each chunk is validated
+(rows without a time, unparseable times and missing or negative
+consumption are dropped and counted separately) and mapped onto the
+serving columns right away, so only those 13 columns are kept in memory. The result is de-duplicated (a later row
+for the same timestamp wins), averaged to hourly readings and reindexed to
+a gap-free hourly range. Gaps of up to MAX_GAP_HOURS are interpolated;
+hours in longer gaps are left out.
+
+A manifest in the output directory records the SHA-256 and size of every
+raw file that was processed. Unchanged inputs are skipped. If a raw file
+only grew (its old content is an unchanged prefix), only the appended rows
+are parsed and merged into the existing output. Buildings are processed in
+parallel.
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import columnar
+
+logger = logging.getLogger(__name__)
+
+RAW_DIR = "data"
+DATASETS_DIR = "datasets"
+STAGING_DIR = "datasets_staging"
+MANIFEST_FILE = ".prepare_manifest.json"
+# Bump when the output of the pipeline changes, so every building is rebuilt
+PIPELINE_VERSION = 1
+
+RAW_ENCODING = "ISO-8859-1"
+TIME_FORMAT = "%d/%m/%Y %H:%M"
+# Raw files re-saved by the old notebook normalization use ISO timestamps
+FALLBACK_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+MONTH_FIRST_TIME_FORMAT = "%m/%d/%Y %H:%M"
+CHUNK_ROWS = 100_000
+MAX_GAP_HOURS = 3
+# Quality gates: dropped raw rows / all raw rows, and hours left out / hourly range
+MAX_REJECT_FRACTION = 0.01
+MAX_GAP_FRACTION = 0.01
+# Parity with the served dataset: relative difference in row count and column means
+PARITY_TOLERANCE = 0.05
+
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+# Same columns (and order) as datasets/*_data.csv
+OUTPUT_COLUMNS = ["Time"] + SEASONS + ["Outdoor Temp (°C)", "Humidity (%)", "Cloud Cover (%)", "Occupancy",
+                                       "Special Equipment [kW]", "Lighting [kW]", "HVAC [kW]", "Use [kW]"]
+CONTINUOUS_COLUMNS = OUTPUT_COLUMNS[5:]
+TARGET_COLUMN = "Use [kW]"
+
+# Where each serving column comes from in a building's raw export. Columns a
+# building does not have are filled with 0, as the notebook did.
+# `special_equipment` columns are summed; `cloud_cover_fraction` marks exports
+# that give cloud cover as 0-1 rather than percent; `time_format` overrides
+# TIME_FORMAT.
+#
+# This mapping is provisional. The served datasets were not produced from
+# these exports by any code in the repo and their values do not match them
+# (e.g. House1 has an occupancy column there but none in its export), so the
+# occupancy and special-equipment choices below are a best guess. The parity
+# check is what decides whether a staged output can replace a served one.
+#
+# Every export except the school one and finalized_office_energy_consumption.csv
+# lost the Time of each row whose day of month is above 12 (rows 288 onwards
+# are mostly blank); the times that survived are month first.
+SOURCES = {
+    "Hospital": {
+        "file": "finalized_hospital_energy_consumption.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": "Staff Count",
+        "special_equipment": ["Medical Equipment [kW]", "Water Heating [kW]", "Refrigeration [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    "House1": {
+        "file": "finalized_house1_energy_consumption.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": None,
+        "special_equipment": ["Dishwasher [kW]", "Furnace [kW]", "Fridge [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    "House2": {
+        "file": "finalized_house_2_energy_consumption.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": None,
+        "special_equipment": ["Dishwasher [kW]", "Furnace [kW]", "Fridge [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    "House3": {
+        "file": "finalized_house_3_energy_consumption.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": None,
+        "special_equipment": ["Dishwasher [kW]", "Furnace [kW]", "Fridge [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    "Industry": {
+        "file": "finalized_industry_energy_consumption.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": "Staff Count",
+        "special_equipment": ["Machinery [kW]", "Compressor [kW]", "Refrigeration [kW]",
+                              "Computers and Electronics [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    # The office export with the Cloud Cover column added (as used by the notebook)
+    "Office": {
+        "file": "modified_office.csv",
+        "time_format": MONTH_FIRST_TIME_FORMAT,
+        "occupancy": "Employees Present",
+        "special_equipment": ["Computers [kW]"],
+        "cloud_cover_fraction": True,
+    },
+    "School": {
+        "file": "finalized_school_energy_consumption.csv",
+        "occupancy": None,
+        "special_equipment": ["Computers [kW]", "Kitchen Equipment [kW]", "Refrigeration [kW]"],
+        "cloud_cover_fraction": False,
+    },
+}
+
+
+def _canonical(name):
+    """Compare raw headers loosely: 'Outdoor Temp [Â°C]' (mis-encoded) == 'Outdoor Temp (°C)'."""
+    return name.strip().replace("Â°", "°").replace("(", "[").replace(")", "]").lower()
+
+
+def _digest(path, limit=None):
+    """SHA-256 of a file, or of its first `limit` bytes."""
+    digest = hashlib.sha256()
+    remaining = os.path.getsize(path) if limit is None else limit
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def parse_times(values, time_format=TIME_FORMAT):
+    """Vectorized timestamp parsing: `time_format` first, FALLBACK_TIME_FORMAT for the rest."""
+    values = values.astype(str).str.strip()
+    times = pd.to_datetime(values, format=time_format, errors="coerce")
+    failed = times.isna()
+    if failed.any():
+        times[failed] = pd.to_datetime(values[failed], format=FALLBACK_TIME_FORMAT, errors="coerce")
+    return times
+
+
+def _seasons(raw, times):
+    """Season index 0-3 per row from the raw Season column (names or 1-4), else from the month."""
+    from_month = (times.dt.month.fillna(1).to_numpy(dtype=np.int64) % 12) // 3
+    if raw is None:
+        return from_month
+    text = raw.astype(str).str.strip().str.lower()
+    names = {name.lower(): i for i, name in enumerate(SEASONS)}
+    numbers = {str(i + 1): i for i in range(len(SEASONS))}
+    index = text.map({**names, **numbers}).to_numpy(dtype=np.float64)
+    return np.where(np.isnan(index), from_month, index).astype(np.int64)
+
+
+def map_chunk(chunk, spec, stats):
+    """
+    Validate one chunk of raw rows and map it onto OUTPUT_COLUMNS.
+    Rejected rows are counted in `stats`.
+    """
+    columns = {_canonical(name): name for name in chunk.columns}
+
+    def numeric(name):
+        column = columns.get(_canonical(name)) if name else None
+        if column is None:
+            return pd.Series(0.0, index=chunk.index)
+        return pd.to_numeric(chunk[column], errors="coerce")
+
+    if _canonical("Time") not in columns or _canonical(TARGET_COLUMN) not in columns:
+        raise ValueError(f"Raw file must have 'Time' and '{TARGET_COLUMN}' columns, got {list(chunk.columns)}")
+
+    raw_times = chunk[columns[_canonical("Time")]]
+    missing_time = raw_times.isna() | (raw_times.astype(str).str.strip() == "")
+    times = parse_times(raw_times, spec.get("time_format", TIME_FORMAT))
+    bad_time = ~missing_time & times.isna()
+    use = numeric(TARGET_COLUMN)
+    bad_use = ~missing_time & ~bad_time & (use.isna() | (use < 0))
+    stats["rows"] += len(chunk)
+    stats["missing_time"] += int(missing_time.sum())
+    stats["bad_time"] += int(bad_time.sum())
+    stats["bad_use"] += int(bad_use.sum())
+    keep = ~(missing_time | bad_time | bad_use)
+
+    cloud_cover = numeric("Cloud Cover [%]")
+    if spec["cloud_cover_fraction"]:
+        cloud_cover = cloud_cover * 100.0
+    special_equipment = sum((numeric(name).fillna(0.0) for name in spec["special_equipment"]),
+                            pd.Series(0.0, index=chunk.index))
+    season = _seasons(chunk[columns[_canonical("Season")]] if _canonical("Season") in columns else None, times)
+
+    out = pd.DataFrame({"Time": times}, index=chunk.index)
+    for i, name in enumerate(SEASONS):
+        out[name] = (season == i).astype(np.int64)
+    out["Outdoor Temp (°C)"] = numeric("Outdoor Temp [°C]")
+    out["Humidity (%)"] = numeric("Humidity [%]")
+    out["Cloud Cover (%)"] = cloud_cover
+    out["Occupancy"] = numeric(spec["occupancy"])
+    out["Special Equipment [kW]"] = special_equipment
+    out["Lighting [kW]"] = numeric("Lighting [kW]")
+    out["HVAC [kW]"] = numeric("HVAC [kW]")
+    out[TARGET_COLUMN] = use
+    return out[keep]
+
+
+def read_raw(path, spec, stats, offset=0, header=None):
+    """
+    Stream a raw export in CHUNK_ROWS chunks and return the mapped rows.
+    With `offset`, parsing starts at that byte (the start of a line) and
+    `header` gives the column names.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        options = {"header": None, "names": header} if offset else {}
+        chunks = [map_chunk(chunk, spec, stats)
+                  for chunk in pd.read_csv(f, encoding=RAW_ENCODING, chunksize=CHUNK_ROWS, **options)]
+    if not chunks:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def to_hourly(frame, stats):
+    """De-duplicate, average to hourly readings and fill short gaps on a gap-free hourly index."""
+    frame = frame.sort_values("Time", kind="mergesort")
+    duplicated = frame.duplicated("Time", keep="last")
+    stats["duplicates"] += int(duplicated.sum())
+    frame = frame[~duplicated]
+    if frame.empty:
+        return frame.reset_index(drop=True)
+
+    hours = frame["Time"].dt.floor("h")
+    aggregations = {**{name: "last" for name in SEASONS}, **{name: "mean" for name in CONTINUOUS_COLUMNS}}
+    hourly = frame.drop(columns="Time").groupby(hours.values).agg(aggregations)
+    hourly = hourly.reindex(pd.date_range(hourly.index[0], hourly.index[-1], freq="h"))
+
+    hourly[TARGET_COLUMN] = hourly[TARGET_COLUMN].interpolate(limit=MAX_GAP_HOURS, limit_area="inside")
+    exogenous = [name for name in CONTINUOUS_COLUMNS if name != TARGET_COLUMN]
+    hourly[exogenous] = hourly[exogenous].interpolate(limit_area="inside").ffill().bfill().fillna(0.0)
+    hourly[SEASONS] = hourly[SEASONS].ffill().bfill().astype(np.int64)
+    missing = hourly[TARGET_COLUMN].isna()
+    stats["gap_hours"] += int(missing.sum())
+
+    hourly = hourly[~missing]
+    hourly.index.name = "Time"
+    return hourly.reset_index()[OUTPUT_COLUMNS]
+
+
+def _existing_output(out_path):
+    # Time comes back as datetime64 from either the columnar copy or the CSV
+    return columnar.load_frame(out_path)
+
+
+def write_output(frame, out_path):
+    """Write the serving CSV atomically, then its columnar copy."""
+    tmp_path = f"{out_path}.tmp-{os.getpid()}"
+    frame.to_csv(tmp_path, index=False, date_format=FALLBACK_TIME_FORMAT)
+    os.replace(tmp_path, out_path)
+    columnar.convert_csv(out_path)
+
+
+def prepare_building(building, raw_path, out_path, previous=None, force=False):
+    """
+    Build one building's dataset. `previous` is its manifest entry from the
+    last run. Returns the new manifest entry (with "action" and the row
+    statistics of this run).
+    """
+    spec = SOURCES[building]
+    size = os.path.getsize(raw_path)
+    stats = {"rows": 0, "missing_time": 0, "bad_time": 0, "bad_use": 0, "duplicates": 0, "gap_hours": 0}
+    entry = {"source": os.path.basename(raw_path), "size": size, "pipeline_version": PIPELINE_VERSION}
+    start = time.perf_counter()
+
+    usable = (not force and previous is not None and previous.get("pipeline_version") == PIPELINE_VERSION
+              and os.path.exists(out_path))
+    if usable and previous["size"] == size and _digest(raw_path) == previous["sha256"]:
+        return {**previous, "action": "unchanged"}
+
+    appended = False
+    if usable and size > previous["size"] and _digest(raw_path, previous["size"]) == previous["sha256"]:
+        with open(raw_path, "rb") as f:
+            header_line = f.readline()
+            f.seek(previous["size"] - 1)
+            appended = f.read(1) == b"\n"
+        if appended:
+            header = pd.read_csv(io.BytesIO(header_line), encoding=RAW_ENCODING, nrows=0).columns.tolist()
+            new_rows = read_raw(raw_path, spec, stats, offset=previous["size"], header=header)
+            frame = _existing_output(out_path)
+            if not new_rows.empty:
+                frame = to_hourly(pd.concat([frame, new_rows], ignore_index=True), stats)
+
+    if not appended:
+        frame = to_hourly(read_raw(raw_path, spec, stats), stats)
+    if frame.empty:
+        raise ValueError(f"No valid rows in {raw_path}")
+    write_output(frame, out_path)
+
+    entry.update({
+        "sha256": _digest(raw_path),
+        "action": "appended" if appended else "rebuilt",
+        "output_rows": len(frame),
+        "stats": stats,
+        "seconds": round(time.perf_counter() - start, 3),
+    })
+    return entry
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def prepare_all(buildings=None, raw_dir=RAW_DIR, out_dir=STAGING_DIR, workers=None, force=False):
+    """Prepare the given buildings (default: all in SOURCES) in parallel; returns {building: manifest entry}."""
+    buildings = buildings or sorted(SOURCES)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    jobs = {}
+    for building in buildings:
+        raw_path = os.path.join(raw_dir, SOURCES[building]["file"])
+        if not os.path.exists(raw_path):
+            logger.warning(f"Skipping {building}: {raw_path} not found")
+            continue
+        out_path = os.path.join(out_dir, f"{building}_data.csv")
+        jobs[building] = (building, raw_path, out_path, manifest.get(building), force)
+
+    results = {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {building: pool.submit(prepare_building, *job) for building, job in jobs.items()}
+        for building, future in futures.items():
+            try:
+                results[building] = future.result()
+            except Exception as e:
+                logger.error(f"Preparing {building} failed: {e}")
+                continue
+            manifest[building] = {key: value for key, value in results[building].items() if key != "action"}
+            logger.info(f"{building}: {results[building]['action']}")
+    save_manifest(out_dir, manifest)
+    return results
+
+
+def quality_problems(entry, max_reject_fraction=MAX_REJECT_FRACTION, max_gap_fraction=MAX_GAP_FRACTION):
+    """Reasons a building's run fails the reject and gap thresholds (empty if it passes)."""
+    stats = entry["stats"]
+    problems = []
+    rejected = stats.get("missing_time", 0) + stats["bad_time"] + stats["bad_use"]
+    if stats["rows"] and rejected / stats["rows"] > max_reject_fraction:
+        problems.append(f"{rejected} of {stats['rows']} raw rows rejected ({stats.get('missing_time', 0)} without "
+                        f"a time, {stats['bad_time']} with an unparseable time, {stats['bad_use']} without "
+                        f"valid consumption), above {max_reject_fraction:.1%}")
+    hours = entry["output_rows"] + stats["gap_hours"]
+    if hours and stats["gap_hours"] / hours > max_gap_fraction:
+        problems.append(f"{stats['gap_hours']} of {hours} hours left out in gaps longer than {MAX_GAP_HOURS} "
+                        f"hours, above {max_gap_fraction:.1%}")
+    return problems
+
+
+def _relative_difference(value, reference):
+    if reference == value:
+        return 0.0
+    return abs(value - reference) / max(abs(reference), 1e-9)
+
+
+def parity_problems(out_path, reference_path, tolerance=PARITY_TOLERANCE):
+    """
+    Differences between a staged dataset and the served one it would replace
+    (empty if they agree within `tolerance`). The staged dataset may extend
+    the served time range but must cover it; column means are compared over
+    the hours both have.
+    """
+    staged = columnar.load_frame(out_path)
+    reference = columnar.load_frame(reference_path)
+    problems = []
+    if _relative_difference(len(staged), len(reference)) > tolerance and len(staged) < len(reference):
+        problems.append(f"{len(staged)} rows, served dataset has {len(reference)}")
+    if staged["Time"].iloc[0] > reference["Time"].iloc[0] or staged["Time"].iloc[-1] < reference["Time"].iloc[-1]:
+        problems.append(f"covers {staged['Time'].iloc[0]} to {staged['Time'].iloc[-1]}, served dataset "
+                        f"{reference['Time'].iloc[0]} to {reference['Time'].iloc[-1]}")
+
+    overlap = staged.merge(reference, on="Time", suffixes=("", " (served)"))
+    if overlap.empty:
+        problems.append("no hours in common with the served dataset")
+        return problems
+    for name in OUTPUT_COLUMNS[1:]:
+        if name not in reference.columns:
+            continue
+        mean, served_mean = overlap[name].mean(), overlap[f"{name} (served)"].mean()
+        if _relative_difference(mean, served_mean) > tolerance:
+            problems.append(f"mean {name} {mean:.4g}, served dataset {served_mean:.4g}")
+    return problems
+
+
+def check_outputs(results, out_dir, reference_dir, max_reject_fraction=MAX_REJECT_FRACTION,
+                  max_gap_fraction=MAX_GAP_FRACTION, tolerance=PARITY_TOLERANCE):
+    """{building: [problem, ...]} for the prepared buildings that fail a check."""
+    compare = os.path.realpath(out_dir) != os.path.realpath(reference_dir)
+    if not compare:
+        logger.warning(f"Output directory is the reference {reference_dir}; skipping the parity check")
+    report = {}
+    for building, entry in results.items():
+        problems = quality_problems(entry, max_reject_fraction, max_gap_fraction)
+        reference_path = os.path.join(reference_dir, f"{building}_data.csv")
+        if compare and os.path.exists(reference_path):
+            problems += parity_problems(os.path.join(out_dir, f"{building}_data.csv"), reference_path, tolerance)
+        elif compare:
+            logger.warning(f"{building}: no served dataset at {reference_path} to compare with")
+        if problems:
+            report[building] = problems
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare the served building datasets from the raw exports.")
+    parser.add_argument("--buildings", nargs="*", choices=sorted(SOURCES), help="only these buildings")
+    parser.add_argument("--raw-dir", default=RAW_DIR, help="raw exports (default: %(default)s)")
+    parser.add_argument("--out", default=STAGING_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--reference", default=DATASETS_DIR,
+                        help="served datasets to check the output against (default: %(default)s)")
+    parser.add_argument("--max-reject-fraction", type=float, default=MAX_REJECT_FRACTION,
+                        help="fail when more raw rows are dropped (default: %(default)s)")
+    parser.add_argument("--max-gap-fraction", type=float, default=MAX_GAP_FRACTION,
+                        help="fail when more hours are left out in gaps (default: %(default)s)")
+    parser.add_argument("--parity-tolerance", type=float, default=PARITY_TOLERANCE,
+                        help="relative difference from the served datasets allowed (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="parallel buildings (default: CPUs)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the raw file is unchanged")
+    args = parser.parse_args()
+
+    results = prepare_all(args.buildings, args.raw_dir, args.out, args.workers, args.force)
+    print(json.dumps(results, indent=2))
+    report = check_outputs(results, args.out, args.reference, args.max_reject_fraction, args.max_gap_fraction,
+                           args.parity_tolerance)
+    for building, problems in report.items():
+        for problem in problems:
+            logger.error(f"{building}: {problem}")
+    if report:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; we fall back to gzip
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def format_timestamps(timestamps):
+    """
+    Format a datetime64 array as ISO-8601 strings in one vectorized call.
+    Matches Timestamp.isoformat() for naive timestamps.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+    whole_seconds = not (timestamps.astype(np.int64) % 1_000_000_000).any()
+    return np.datetime_as_string(timestamps, unit="s" if whole_seconds else "us").tolist()
+
+
+def format_floats(values):
+    """
+    Format a float array as JSON number literals. Non-finite values (which
+    JSON cannot represent) become null.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    literals = list(map(float.__repr__, values.tolist()))
+    if not np.isfinite(values).all():
+        for i in np.flatnonzero(~np.isfinite(values)).tolist():
+            literals[i] = "null"
+    return literals
+
+
+def consumption_rows_json(timestamps, values):
+    """
+    Serialize to the row-of-objects shape used by /consumption:
+    [{"timestamp": "...", "consumption": ...}, ...]
+    """
+    rows = map(
+        '{"timestamp":"%s","consumption":%s}'.__mod__,
+        zip(format_timestamps(timestamps), format_floats(values)),
+    )
+    return "[" + ",".join(rows) + "]"
+
+
+def consumption_columnar_json(timestamps, values):
+    """
+    Serialize to the compact columnar shape:
+    {"timestamps": [...], "consumption": [...]}
+    """
+    return (
+        '{"timestamps":' + json.dumps(format_timestamps(timestamps), separators=(",", ":"))
+        + ',"consumption":[' + ",".join(format_floats(values)) + "]}"
+    )
+
+
+def _accepted_encodings(accept_encoding):
+    """Parse an Accept-Encoding header into the set of codings with q > 0."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def encode_body(body, accept_encoding):
+    """
+    Compress a response body according to the client's Accept-Encoding.
+    Prefers br (when the brotli package is installed) over gzip.
+    Returns (bytes, content_encoding or None).
+    """
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if len(data) < MIN_COMPRESS_SIZE:
+        return data, None
+
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return brotli.compress(data, quality=BROTLI_QUALITY), "br"
+    if "gzip" in accepted or "*" in accepted:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL), "gzip"
+    return data, None
@@ -58,7 +58,7 @@
 #     }
 
 # # Step 4: Prepare input data for prediction
-# def prepare_input_data(hours_ahead, user_inputs):
+# def prepare_input_data(hours_ahead, user_inputs, lag_features):
 #     future_time_features = get_future_time_features(hours_ahead)
 #     input_data = {**future_time_features, **user_inputs}
 #     input_df = pd.DataFrame([input_data])
@@ -92,11 +92,17 @@ import numpy as np
 from tensorflow.keras.models import load_model
 import joblib
 from datetime import datetime, timedelta
+from columnar import load_frame
+from feature_store import FEATURE_COLUMNS, RollingFeatures
 
 # Step 1: Load the trained LSTM model and scaler
 model = load_model("energy_consumption_lstm_model.keras")
 scaler = joblib.load("scaler_lstm.pkl")
 
+# Lag and rolling feature state after the latest reading in the training history
+history = load_frame("community_consumption.csv")
+history_features = RollingFeatures.from_history(history['Use [kW]'].to_numpy())
+
 # Step 2: Define a function to calculate future time features
 def get_future_time_features(hours_ahead):
     current_time = datetime.now()
@@ -140,7 +146,7 @@ def get_user_inputs():
     }
 
 # Step 4: Prepare input data for prediction
-def prepare_input_data(hours_ahead, user_inputs):
+def prepare_input_data(hours_ahead, user_inputs, lag_features):
     future_time_features = get_future_time_features(hours_ahead)
     input_data = {**future_time_features, **user_inputs}
 
@@ -150,11 +156,8 @@ def prepare_input_data(hours_ahead, user_inputs):
                 "IsWeekend", "IsHoliday", "Use_lag1", "Use_lag24", "Use_rolling_mean_24", "Use_rolling_std_24"]
     input_df = pd.DataFrame([input_data], columns=features)
 
-    # Add lagged and rolling features (use dummy values for testing)
-    input_df['Use_lag1'] = 0  # Replace with actual lagged value if available
-    input_df['Use_lag24'] = 0  # Replace with actual lagged value if available
-    input_df['Use_rolling_mean_24'] = 0  # Replace with actual rolling mean if available
-    input_df['Use_rolling_std_24'] = 0  # Replace with actual rolling std if available
+    # Add the lagged and rolling features of the preceding hour, as computed for training
+    input_df[FEATURE_COLUMNS] = lag_features
 
     # Normalize the input data
     input_df = scaler.transform(input_df)
@@ -168,10 +171,23 @@ def predict_consumption(model, input_df):
     predicted_consumption = model.predict(input_df)[0][0]
     return predicted_consumption
 
-# Step 6: Main workflow for testing
+# Step 6: Predict hour by hour up to the horizon. There are no readings after
+# the history, so each later hour's lag/rolling features are projected from
+# the predictions so far instead of reusing the latest reading's features.
+def forecast_consumption(model, hours_ahead, user_inputs):
+    predictions = []
+    for step in range(1, hours_ahead + 1):
+        if predictions:
+            lag_features = history_features.project(predictions)[-1]
+        else:
+            lag_features = history_features.current()
+        input_df = prepare_input_data(step, user_inputs, lag_features)
+        predictions.append(predict_consumption(model, input_df))
+    return predictions[-1]
+
+# Step 7: Main workflow for testing
 if __name__ == "__main__":
     hours_ahead = int(input("Enter the number of hours ahead to predict (e.g., 12): "))
     user_inputs = get_user_inputs()
-    input_df = prepare_input_data(hours_ahead, user_inputs)
-    predicted_consumption = predict_consumption(model, input_df)
+    predicted_consumption = forecast_consumption(model, hours_ahead, user_inputs)
     print(f"Predicted energy consumption {hours_ahead} hours from now: {predicted_consumption:.2f} kW")
\ No newline at end of file
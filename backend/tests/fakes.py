@@ -0,0 +1,60 @@
+import threading
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from model_runtime import ModelRuntime
+
+
+class FakeForecaster:
+    """
+    Deterministic stand-in for forecasting.Forecaster (TensorFlow is not
+    needed): the next value is the mean of the window plus the sum of exo.
+    """
+
+    def __init__(self, sequence_length=4, n_features=2, fail_on=None, delay=None):
+        self.sequence_length = sequence_length
+        self.n_features = n_features
+        self.fail_on = fail_on  # raise when exo[:, 0] contains this value
+        self.delay = delay      # threading.Event the first step waits for
+        self.step_sizes = []
+        self._lock = threading.Lock()
+
+    def step(self, sequences, exo):
+        sequences = np.asarray(sequences, dtype=np.float32)
+        exo = np.asarray(exo, dtype=np.float32)
+        if self.delay is not None:
+            self.delay.wait(5)
+        with self._lock:
+            self.step_sizes.append(len(sequences))
+        if self.fail_on is not None and np.any(exo[:, 0] == self.fail_on):
+            raise RuntimeError("forward pass failed")
+        return (sequences.mean(axis=(1, 2)) + exo.sum(axis=1)).reshape(-1, 1).astype(np.float32)
+
+    def rollout(self, initial_sequences, exo, forecast_horizon):
+        initial_sequences = np.asarray(initial_sequences, dtype=np.float32)
+        exo = np.asarray(exo, dtype=np.float32)
+        n = max(initial_sequences.shape[0], exo.shape[0])
+        length = self.sequence_length
+        buffer = np.empty((n, length + forecast_horizon, 1), dtype=np.float32)
+        buffer[:, :length, :] = initial_sequences
+        for i in range(forecast_horizon):
+            buffer[:, length + i, 0] = self.step(buffer[:, i:i + length, :], exo)[:, 0]
+        return buffer[:, length:, 0].copy()
+
+
+class FakeRuntime(ModelRuntime):
+    """
+    ModelRuntime whose "keras" loader returns a FakeForecaster and identity-like
+    scalers instead of importing TensorFlow. Set `FakeRuntime.load_gate` to an
+    Event to hold loads until it is set.
+    """
+
+    load_gate = None
+
+    def _load_keras(self, timings):
+        if self.load_gate is not None:
+            self.load_gate.wait(5)
+        feature_scaler = MinMaxScaler().fit(np.array([[0.0] * 11, [1.0] * 11]))
+        target_scaler = MinMaxScaler().fit(np.array([[0.0], [100.0]]))
+        return FakeForecaster(sequence_length=self.sequence_length, n_features=11), feature_scaler, target_scaler
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from federated.asynchronous import AsyncServer, ClientProfile, _Run, _run_async
+from federated.compression import make_compressor
+
+
+def update(compressor, weights, n=1):
+    payload, _ = compressor.encode([np.array(weights, dtype=np.float32)])
+    return {"payload": payload, "n": n}
+
+
+def test_staleness_weight():
+    server = AsyncServer([np.zeros(1, dtype=np.float32)], make_compressor("none"), staleness_exponent=0.5)
+    assert server.staleness_weight(0) == 1.0
+    assert server.staleness_weight(3) == pytest.approx(0.5)
+
+
+def test_fedasync_mixes_each_update_scaled_by_staleness():
+    compressor = make_compressor("none")
+    base = [np.zeros(2, dtype=np.float32)]
+    server = AsyncServer(base, compressor, "fedasync", alpha=0.5, staleness_exponent=1.0)
+
+    assert server.receive(update(compressor, [2.0, 4.0]), base, 0)
+    np.testing.assert_allclose(server.weights[0], [1.0, 2.0])
+    # One version stale: s = 1/2, so the mix is 0.25 towards base + delta = [4, 4]
+    assert server.receive(update(compressor, [4.0, 4.0]), base, 0)
+    np.testing.assert_allclose(server.weights[0], [1.75, 2.5])
+    assert server.version == 2 and server.staleness == [0, 1]
+    assert server.weights[0].dtype == np.float32
+
+
+def test_fedbuff_applies_the_weighted_buffer_every_buffer_size_updates():
+    compressor = make_compressor("none")
+    base = [np.zeros(1, dtype=np.float32)]
+    server = AsyncServer(base, compressor, "fedbuff", staleness_exponent=1.0, buffer_size=2,
+                         server_learning_rate=1.0)
+
+    assert not server.receive(update(compressor, [3.0], n=1), base, 0)
+    np.testing.assert_array_equal(server.weights[0], [0.0])
+    assert server.version == 0
+
+    assert server.receive(update(compressor, [6.0], n=2), base, 0)
+    # 1/3 * 1 * 3 + 2/3 * 1 * 6
+    np.testing.assert_allclose(server.weights[0], [5.0])
+    assert server.version == 1
+
+    # The next buffer starts empty; a stale update (s = 1/2) alone does not flush
+    assert not server.receive(update(compressor, [1.0], n=1), base, 0)
+    assert server.receive(update(compressor, [1.0], n=1), base, 0)
+    np.testing.assert_allclose(server.weights[0], [5.5])
+
+
+def test_delta_payloads_are_applied_as_deltas():
+    compressor = make_compressor("delta")
+    base = [np.ones(1, dtype=np.float32)]
+    server = AsyncServer(base, compressor, "fedasync", alpha=1.0)
+    server.receive(update(compressor, [2.0]), base, 0)
+    np.testing.assert_allclose(server.weights[0], [3.0])
+
+
+class FailingPool:
+    def submit(self, *args, **kwargs):
+        future = Future()
+        future.set_exception(RuntimeError("local update failed"))
+        return future
+
+
+def test_async_run_ends_when_every_client_fails(tmp_path):
+    clients = {"Office": "office.csv", "School": "school.csv"}
+    compressor = make_compressor("none")
+
+    async def main():
+        run = _Run(clients, str(tmp_path), FailingPool(), None, None, None, None, None, None)
+        server = AsyncServer([np.zeros(1, dtype=np.float32)], compressor)
+        profiles = {name: ClientProfile() for name in clients}
+        await asyncio.wait_for(_run_async(run, server, profiles, {}, (1, 32, 1e-3)), timeout=5)
+
+    with pytest.raises(RuntimeError, match="local update failed"):
+        asyncio.run(main())
@@ -0,0 +1,136 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+import backtest
+from backtest import backtest_shard, plan_shards, summarize
+from fakes import FakeForecaster
+
+LENGTH = 4
+HORIZON = 3
+
+
+def write_dataset(path, n):
+    pd.DataFrame({"Time": pd.date_range("2023-01-01", periods=n, freq="h"),
+                  "Use [kW]": np.arange(n, dtype=float)}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_origins_run_from_the_sequence_length_to_the_last_full_horizon(tmp_path):
+    path = write_dataset(tmp_path / "Office_data.csv", 30)
+    shards = plan_shards({"Office": path}, HORIZON, stride=1, shard_size=10, sequence_length=LENGTH)
+    origins = np.concatenate([origins for _, _, origins in shards])
+    assert origins[0] == LENGTH
+    assert origins[-1] == 30 - HORIZON
+    np.testing.assert_array_equal(origins, np.arange(LENGTH, 30 - HORIZON + 1))
+    assert [len(origins) for _, _, origins in shards] == [10, 10, 4]
+    assert {(building, shard_path) for building, shard_path, _ in shards} == {("Office", path)}
+
+
+def test_stride_and_too_short_datasets(tmp_path):
+    datasets = {"Office": write_dataset(tmp_path / "Office_data.csv", 30),
+                "School": write_dataset(tmp_path / "School_data.csv", LENGTH + HORIZON - 1)}
+    shards = plan_shards(datasets, HORIZON, stride=5, shard_size=100, sequence_length=LENGTH)
+    assert [(building, origins.tolist()) for building, _, origins in shards] == [("Office", [4, 9, 14, 19, 24])]
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """A pool worker holding a FakeForecaster, identity scalers and one dataset."""
+    identity = MinMaxScaler().fit(np.array([[0.0], [1.0]]))
+    state = {"forecaster": FakeForecaster(sequence_length=LENGTH, n_features=2),
+             "feature_scaler": identity, "target_scaler": identity, "data": {}}
+    monkeypatch.setattr(backtest, "_worker", state)
+
+    def load(target, exo=None):
+        target = np.asarray(target, dtype=np.float64)
+        if exo is None:
+            exo = np.zeros((len(target), 2))
+        state["data"]["data.csv"] = (exo.astype(np.float32), target.astype(np.float32), target)
+
+    return load
+
+
+def expected_sums(target, exo, origins):
+    """Error sums from one FakeForecaster rollout per origin."""
+    forecaster = FakeForecaster(sequence_length=LENGTH, n_features=2)
+    errors = []
+    for origin in origins:
+        predicted = np.empty(HORIZON)
+        window = list(target[origin - LENGTH:origin])
+        for i in range(HORIZON):
+            value = forecaster.step(np.array(window[-LENGTH:]).reshape(1, LENGTH, 1), exo[[origin + i]])[0, 0]
+            window.append(value)
+            predicted[i] = value
+        errors.append(predicted - target[origin:origin + HORIZON])
+    errors = np.array(errors)
+    return np.abs(errors).sum(axis=0), (errors ** 2).sum(axis=0)
+
+
+def test_shard_matches_per_origin_rollouts(worker):
+    rng = np.random.default_rng(0)
+    target = rng.uniform(1, 10, 40)
+    exo = rng.uniform(0, 1, (40, 2))
+    worker(target, exo)
+    origins = np.arange(LENGTH, 40 - HORIZON + 1, 3)
+
+    result = backtest_shard("Office", "data.csv", origins, HORIZON)
+    abs_sum, sq_sum = expected_sums(target, exo.astype(np.float32), origins)
+    assert result["origins"] == len(origins) and result["skipped"] == 0
+    np.testing.assert_array_equal(result["count"], [len(origins)] * HORIZON)
+    np.testing.assert_allclose(result["abs_sum"], abs_sum, rtol=1e-5)
+    np.testing.assert_allclose(result["sq_sum"], sq_sum, rtol=1e-5)
+
+
+def test_missing_readings_do_not_poison_the_sums(worker):
+    target = np.full(20, 2.0)
+    target[6] = np.nan
+    worker(target)
+    origins = np.arange(LENGTH, 20 - HORIZON + 1)
+
+    result = backtest_shard("Office", "data.csv", origins, HORIZON)
+    # Origins 7-10 have the gap in their history, and origins 4-6 each have
+    # one step that predicts hour 6 and has no actual to compare with
+    assert result["skipped"] == 4
+    np.testing.assert_array_equal(result["count"], [len(origins) - 5] * HORIZON)
+    # A constant history is forecast exactly
+    np.testing.assert_array_equal(result["abs_sum"], [0.0] * HORIZON)
+    np.testing.assert_array_equal(result["sq_sum"], [0.0] * HORIZON)
+    assert np.isfinite(result["ape_sum"]).all()
+
+
+def test_origins_without_enough_history_are_rejected(worker):
+    worker(np.ones(20))
+    with pytest.raises(ValueError, match="hours of history"):
+        backtest_shard("Office", "data.csv", [LENGTH - 1, LENGTH], HORIZON)
+
+
+def test_summarize():
+    totals = {
+        "origins": 5, "skipped": 1,
+        "count": np.array([4, 2]),
+        "abs_sum": np.array([8.0, 6.0]),
+        "sq_sum": np.array([36.0, 32.0]),
+        "ape_sum": np.array([1.0, 0.0]),
+        "ape_count": np.array([4, 0]),
+    }
+    summary = summarize(totals)
+    assert summary["origins"] == 5 and summary["skipped"] == 1
+    assert summary["per_horizon"] == [
+        {"horizon": 1, "mae": 2.0, "rmse": 3.0, "mape": 25.0},
+        {"horizon": 2, "mae": 3.0, "rmse": 4.0, "mape": None},
+    ]
+    overall = summary["overall"]
+    assert overall["mae"] == pytest.approx(14 / 6)
+    assert overall["rmse"] == pytest.approx(math.sqrt(68 / 6))
+    assert overall["mape"] == pytest.approx(25.0)
+
+
+def test_summarize_without_valid_steps():
+    zeros = np.zeros(1)
+    summary = summarize({"origins": 1, "skipped": 1, "count": zeros, "abs_sum": zeros, "sq_sum": zeros,
+                         "ape_sum": zeros, "ape_count": zeros})
+    assert summary["overall"] == {"mae": None, "rmse": None, "mape": None}
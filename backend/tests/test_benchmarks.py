@@ -0,0 +1,131 @@
+"""
+pytest-benchmark cases for the /predict stages and the data hot paths.
+
+Skipped unless pytest-benchmark is installed:
+    pip install pytest-benchmark
+    python -m pytest tests/test_benchmarks.py --benchmark-only
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave --benchmark-compare
+
+The model is a FakeForecaster, so the forecast stages measure the scheduler,
+cache and rollout plumbing rather than TensorFlow.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import app as app_module
+from building_store import BuildingData
+from fakes import FakeForecaster, FakeRuntime
+from forecasting import TrajectoryCache, forecast_trajectory
+from inference_scheduler import InferenceScheduler
+from model_registry import ModelEntry
+from serialization import consumption_rows_json
+
+BUILDING = "BenchTest"
+HORIZON = 24
+SEQUENCE_LENGTH = 24
+ROWS = 100_000
+USER_INPUTS = {name: 0.5 for name in app_module.EXOGENOUS_FEATURES}
+
+
+@pytest.fixture(scope="module")
+def history_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "history.csv"
+    times = pd.date_range("2023-01-01", periods=500, freq="h")
+    pd.DataFrame({"Time": times.strftime("%Y-%m-%d %H:%M:%S"), "Use [kW]": np.arange(500) % 50}).to_csv(
+        path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def runtime(history_csv):
+    runtime = FakeRuntime(None, None, None, history_csv, sequence_length=SEQUENCE_LENGTH, max_batch=0).load()
+    yield runtime
+    runtime.close()
+
+
+@pytest.fixture(scope="module")
+def exo_scaled(runtime):
+    return runtime.feature_scaler.transform(app_module.get_exogenous_input_from_request(USER_INPUTS))
+
+
+@pytest.fixture(scope="module")
+def data():
+    times = pd.date_range("2000-01-01", periods=ROWS, freq="h").to_numpy()
+    rng = np.random.default_rng(0)
+    columns = {"Use [kW]": rng.uniform(50, 300, ROWS)}
+    return BuildingData("bench", "bench.csv", None, times, columns, "Time", "Use [kW]")
+
+
+def test_predict_scale_inputs(benchmark, runtime):
+    benchmark(lambda: runtime.feature_scaler.transform(app_module.get_exogenous_input_from_request(USER_INPUTS)))
+
+
+def test_predict_history_window(benchmark, runtime):
+    assert benchmark(runtime.history_window.get).shape == (1, SEQUENCE_LENGTH, 1)
+
+
+def test_predict_cached_trajectory(benchmark, runtime, exo_scaled):
+    cache = TrajectoryCache()
+    initial_sequence = runtime.history_window.get()
+    forecast_trajectory(runtime.forecaster, initial_sequence, exo_scaled, HORIZON, cache=cache)
+    trajectory = benchmark(forecast_trajectory, runtime.forecaster, initial_sequence, exo_scaled, HORIZON,
+                           cache=cache)
+    assert len(trajectory) == HORIZON
+
+
+def test_predict_scheduled_rollout(benchmark, runtime, exo_scaled):
+    scheduler = InferenceScheduler(FakeForecaster(sequence_length=SEQUENCE_LENGTH, n_features=11),
+                                   batch_window_ms=0)
+    initial_sequence = runtime.history_window.get()
+    trajectory = benchmark(scheduler.forecast, initial_sequence, exo_scaled, HORIZON, timeout=5)
+    assert len(trajectory) == HORIZON
+
+
+def test_predict_inverse_transform_and_serialize(benchmark, runtime):
+    trajectory_scaled = np.linspace(0, 1, HORIZON, dtype=np.float32)
+
+    def finish():
+        trajectory = runtime.target_scaler.inverse_transform(trajectory_scaled.reshape(-1, 1))[:, 0]
+        with app_module.app.app_context():
+            return app_module.jsonify({"predicted_consumption": float(trajectory[-1]),
+                                       "trajectory": app_module.format_trajectory(trajectory)})
+
+    assert benchmark(finish).status_code == 200
+
+
+def test_predict_endpoint(benchmark, history_csv, monkeypatch):
+    monkeypatch.setattr("model_registry.ModelRuntime", FakeRuntime)
+    registry = app_module.model_registry
+    registry.register(ModelEntry(BUILDING, "v1", model_path="unused", history_csv_path=history_csv))
+    try:
+        registry.runtime(BUILDING).load()
+        client = app_module.app.test_client()
+        payload = {"hours_ahead": HORIZON, "user_inputs": USER_INPUTS, "return_trajectory": True}
+        response = benchmark(client.post, f"/predict?building={BUILDING}", json=payload)
+        assert response.status_code == 200
+    finally:
+        registry._registered.pop((BUILDING, "v1"))
+        runtime = registry._resident.pop((BUILDING, "v1"), None)
+        if runtime is not None:
+            runtime.close()
+
+
+def test_metrics_query(benchmark, data):
+    lo, hi = data.row_bounds(data.timestamps[ROWS // 4], data.timestamps[3 * ROWS // 4])
+    benchmark(lambda: (data.total(lo, hi), data.peak(lo, hi), data.hourly_means(lo, hi)))
+
+
+def test_consumption_rows_json(benchmark, data):
+    benchmark(consumption_rows_json, data.timestamps[:24 * 30], data.energy[:24 * 30])
+
+
+def test_build_rollups(benchmark, data):
+    benchmark(BuildingData, "bench", "bench.csv", None, data.timestamps, data.columns, "Time", "Use [kW]")
+
+
+def test_append_reading(benchmark, data):
+    timestamp = data.timestamps[-1:] + np.timedelta64(1, "h")
+    benchmark(data.append, (1, 1), timestamp, {"Use [kW]": np.array([100.0])})
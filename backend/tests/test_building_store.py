@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from building_store import BuildingData, BuildingDataStore, _merge_readings
+from ingest_log import IngestLog, parse_readings
+
+ENERGY = "Use [kW]"
+
+
+def make_data(n_rows, start="2023-01-01", freq="h", seed=0, missing=0.05):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(start, periods=n_rows, freq=freq).values.astype("datetime64[ns]")
+    energy = rng.uniform(50, 300, n_rows)
+    energy[rng.random(n_rows) < missing] = np.nan
+    columns = {"Occupancy": rng.integers(0, 100, n_rows).astype(np.float64), ENERGY: energy}
+    return BuildingData("Test", None, None, times, columns, "Time", ENERGY)
+
+
+def frame_of(data):
+    return pd.Series(np.asarray(data.energy), index=pd.DatetimeIndex(np.asarray(data.timestamps)))
+
+
+def assert_matches_pandas(data, start, end):
+    series = frame_of(data)
+    window = series[(series.index >= start) & (series.index < end)]
+    lo, hi = data.row_bounds(np.datetime64(start, "ns"), np.datetime64(end, "ns"))
+
+    assert hi - lo == len(window)
+    assert data.total(lo, hi) == pytest.approx(window.sum())
+    assert data.count(lo, hi) == window.count()
+    if window.count():
+        assert data.peak(lo, hi) == pytest.approx(window.max())
+
+    expected_hourly = window.groupby(window.index.hour).mean().reindex(range(24))
+    np.testing.assert_allclose(data.hourly_means(lo, hi), expected_hourly.to_numpy(), rtol=1e-9)
+
+    days, means = data.daily_means(np.datetime64(start, "ns"), np.datetime64(end, "ns"))
+    expected_daily = series.resample("D").mean()
+    expected_daily = expected_daily[(expected_daily.index >= start) & (expected_daily.index < end)]
+    np.testing.assert_array_equal(days, expected_daily.index.values)
+    np.testing.assert_allclose(means, expected_daily.to_numpy(), rtol=1e-9)
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2023-01-01", "2024-01-01"),
+    ("2023-02-10", "2023-03-12"),
+    ("2023-05-05 07:00", "2023-05-05 19:00"),
+    ("2030-01-01", "2030-02-01"),
+])
+def test_range_rollups_match_pandas(start, end):
+    assert_matches_pandas(make_data(24 * 200), start, end)
+
+
+def test_append_matches_full_rebuild():
+    full = make_data(24 * 30 + 7)
+    split = 24 * 12 + 5
+    data = BuildingData("Test", None, None, full.timestamps[:split],
+                        {column: values[:split] for column, values in full.columns.items()}, "Time", ENERGY)
+    for lo, hi in [(split, split + 1), (split + 1, split + 40), (split + 40, len(full))]:
+        data = data.append(None, full.timestamps[lo:hi], {column: values[lo:hi] for column, values in full.columns.items()})
+
+    np.testing.assert_array_equal(data.timestamps, full.timestamps)
+    np.testing.assert_array_equal(data._cumsum, full._cumsum)
+    np.testing.assert_array_equal(data.day_starts, full.day_starts)
+    np.testing.assert_allclose(data.day_means, full.day_means, rtol=1e-12)
+    for hour in range(24):
+        np.testing.assert_array_equal(data._hour_rows[hour], full._hour_rows[hour])
+        np.testing.assert_array_equal(data._hour_cumsum[hour], full._hour_cumsum[hour])
+    assert_matches_pandas(data, "2023-01-05 03:00", "2023-01-29")
+
+
+def test_append_leaves_earlier_snapshots_unchanged():
+    base = make_data(48)
+    more = make_data(24, start="2023-01-03", seed=1)
+    first = base.append(None, more.timestamps[:12], {c: v[:12] for c, v in more.columns.items()})
+    snapshot = np.array(first.energy)
+    # Branching from the same snapshot twice must not overwrite the first branch
+    second = first.append(None, more.timestamps[12:], {c: v[12:] for c, v in more.columns.items()})
+    other = first.append(None, more.timestamps[12:13], {c: v[12:13] + 1.0 for c, v in more.columns.items()})
+
+    np.testing.assert_array_equal(first.energy, snapshot)
+    assert len(second) == 72 and len(other) == 61
+    np.testing.assert_array_equal(second.energy[60:], more.energy[12:])
+    with pytest.raises(ValueError):
+        first.append(None, base.timestamps[-1:], {c: v[-1:] for c, v in base.columns.items()})
+
+
+def test_merge_readings_keeps_last_per_timestamp():
+    data = make_data(5, missing=0)
+    records = parse_readings([
+        {"Time": "2023-01-01 02:00:00", "Use [kW]": 1.0},
+        {"Time": "2022-12-31 23:00:00", "Use [kW]": 2.0},
+        {"Time": "2023-01-01 02:00:00", "Use [kW]": 3.0},
+    ])
+    timestamps, columns = _merge_readings(data.timestamps, data.columns, records, ENERGY)
+    assert len(timestamps) == 6
+    assert np.all(np.diff(timestamps) > np.timedelta64(0))
+    assert columns[ENERGY][0] == 2.0 and columns[ENERGY][3] == 3.0
+    assert np.isnan(columns["Occupancy"][0])
+
+
+def write_dataset(path, data):
+    frame = pd.DataFrame({"Time": pd.DatetimeIndex(data.timestamps).strftime("%Y-%m-%d %H:%M:%S")})
+    for column, values in data.columns.items():
+        frame[column] = values
+    frame.to_csv(path, index=False)
+
+
+def test_store_ingest_matches_full_merge(tmp_path):
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    write_dataset(datasets / "Test_data.csv", make_data(72, missing=0))
+    store = BuildingDataStore(str(datasets), IngestLog(str(tmp_path / "log")))
+    before = store.get("Test")
+
+    batches = [
+        [{"Time": "2023-01-04 00:00:00", "Use [kW]": 10.0}, {"Time": "2023-01-04 01:00:00", "Use [kW]": 11.0}],
+        [{"Time": "2023-01-04 03:00:00", "Use [kW]": 13.0}, {"Time": "2023-01-04 02:00:00", "Use [kW]": 12.0}],
+        # Replaces an existing reading, so this one takes the full merge path
+        [{"Time": "2023-01-02 05:00:00", "Use [kW]": 99.0}],
+        [{"Time": "2023-01-04 04:00:00", "Use [kW]": 14.0}],
+    ]
+    for batch in batches:
+        store.ingest_log.append("Test", parse_readings(batch))
+        data = store.get("Test")
+        expected = BuildingDataStore(str(datasets), store.ingest_log).get("Test")
+        np.testing.assert_array_equal(data.timestamps, expected.timestamps)
+        np.testing.assert_array_equal(data.energy, expected.energy)
+        np.testing.assert_allclose(data.hourly_means(0, len(data)), expected.hourly_means(0, len(expected)))
+        np.testing.assert_allclose(data.day_means, expected.day_means)
+
+    assert len(before) == 72
+    assert len(data) == 77
+    assert data.energy[29] == 99.0
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import columnar
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "Test_data.csv"
+    pd.DataFrame({
+        "Time": ["2023-01-01 02:00:00", "2023-01-01 00:00:00", "2023-01-01 01:00:00"],
+        "Occupancy": [3, 1, 2],
+        "Label": ["c", "a", "b"],
+        "Use [kW]": [30.5, 10.5, np.nan],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_round_trip(csv_path):
+    directory = columnar.convert_csv(csv_path)
+    assert columnar.is_fresh(csv_path)
+    timestamps, columns, meta = columnar.load_columns(directory)
+
+    assert meta["rows"] == 3 and meta["time_column"] == "Time"
+    assert list(columns) == ["Occupancy", "Use [kW]"]  # non-numeric columns are skipped
+    np.testing.assert_array_equal(timestamps, pd.date_range("2023-01-01", periods=3, freq="h").values)
+    np.testing.assert_array_equal(columns["Occupancy"], [1, 2, 3])
+    np.testing.assert_array_equal(columns["Use [kW]"], [10.5, np.nan, 30.5])
+    assert not columns["Occupancy"].flags.writeable
+
+
+def test_load_frame_is_the_same_from_csv_and_columnar_copy(csv_path):
+    from_csv = columnar.load_frame(csv_path)
+    columnar.convert_csv(csv_path)
+    from_copy = columnar.load_frame(csv_path)
+
+    assert from_csv["Time"].dtype == "datetime64[ns]"
+    pdt.assert_frame_equal(from_csv, from_copy)
+
+
+def test_changed_source_is_not_fresh(csv_path):
+    columnar.convert_csv(csv_path)
+    os.utime(csv_path, ns=(0, 0))
+    assert columnar.is_fresh(csv_path)  # touched but unchanged
+    with open(csv_path, "a") as f:
+        f.write("2023-01-01 03:00:00,4,d,40.5\n")
+    assert not columnar.is_fresh(csv_path)
+    assert len(columnar.load_frame(csv_path)) == 4
+
+
+def test_missing_source_is_not_fresh_but_still_loads(csv_path, caplog):
+    columnar.convert_csv(csv_path)
+    os.remove(csv_path)
+    assert not columnar.is_fresh(csv_path)
+    assert columnar.is_orphaned(csv_path)
+    assert len(columnar.load_frame(csv_path)) == 3
+    assert "may be stale" in caplog.text
+
+
+def test_store_serves_orphaned_copy(csv_path, tmp_path):
+    from building_store import BuildingDataStore
+
+    columnar.convert_csv(csv_path)
+    os.remove(csv_path)
+    data = BuildingDataStore(str(tmp_path)).get("Test")
+    np.testing.assert_array_equal(data.energy, [10.5, np.nan, 30.5])
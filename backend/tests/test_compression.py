@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from federated.compression import UpdateCompressor, make_compressor
+
+def tensors(seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(0, 0.1, (8, 4)).astype(np.float32), rng.normal(0, 0.1, 5).astype(np.float32),
+            np.zeros((2, 3), dtype=np.float32)]
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        UpdateCompressor()
+
+
+@pytest.mark.parametrize("spec, atol", [("none", 0), ("delta", 0), ("fp16", 1e-3), ("int8", 0.4 / 127), ("topk:1", 0)])
+def test_round_trip(spec, atol):
+    compressor = make_compressor(spec)
+    original = tensors()
+    payload, residual = compressor.encode(original)
+    decoded = compressor.decode(payload)
+    assert [d.shape for d in decoded] == [t.shape for t in original]
+    for d, t in zip(decoded, original):
+        assert d.dtype == np.float32
+        np.testing.assert_allclose(d, t, atol=atol)
+    assert UpdateCompressor.payload_nbytes(payload) > 0
+
+
+@pytest.mark.parametrize("spec, ratio", [("fp16", 2), ("int8", 3.5), ("topk:0.25", 1.5)])
+def test_lossy_payloads_are_smaller(spec, ratio):
+    original = tensors()
+    payload, _ = make_compressor(spec).encode(original)
+    assert UpdateCompressor.payload_nbytes(payload) * ratio <= sum(t.nbytes for t in original)
+
+
+def test_topk_keeps_largest_entries_and_feeds_back_the_rest():
+    compressor = make_compressor("topk:0.25")
+    delta = [np.array([[0.1, -4.0], [0.2, 3.0]], dtype=np.float32)]
+    payload, residual = compressor.encode(delta)
+    sent = compressor.decode(payload)[0]
+    np.testing.assert_array_equal(sent, [[0.0, -4.0], [0.0, 0.0]])
+    # Nothing is lost: what was sent plus what is carried over is the delta
+    np.testing.assert_array_equal(sent + residual[0], delta[0])
+
+    payload, residual = compressor.encode([np.zeros((2, 2), dtype=np.float32)], residual)
+    np.testing.assert_array_equal(compressor.decode(payload)[0], [[0.0, 0.0], [0.0, 3.0]])
+    np.testing.assert_array_equal(residual[0], np.array([[0.1, 0.0], [0.2, 0.0]], dtype=np.float32))
+
+
+@pytest.mark.parametrize("spec", ["gzip", "topk:0", "topk:2"])
+def test_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        make_compressor(spec)
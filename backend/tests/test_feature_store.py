@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import feature_store
+from feature_store import FEATURE_COLUMNS, RollingFeatures, lag_rolling_features
+
+
+def pandas_features(values):
+    """The columns train.py used to engineer with shift/rolling."""
+    use = pd.Series(values, dtype=float)
+    return np.column_stack([use.shift(1), use.shift(24), use.rolling(24).mean(), use.rolling(24).std()])
+
+
+def series(n, seed=0):
+    return np.random.default_rng(seed).uniform(50, 300, n)
+
+
+def test_matches_pandas_shift_and_rolling():
+    values = series(200)
+    np.testing.assert_allclose(lag_rolling_features(values), pandas_features(values), rtol=1e-9, equal_nan=True)
+
+
+def test_missing_readings_blank_their_windows_like_pandas():
+    values = series(120)
+    values[[10, 60, 61]] = np.nan
+    np.testing.assert_allclose(lag_rolling_features(values), pandas_features(values), rtol=1e-9, equal_nan=True)
+
+
+def test_resync_keeps_long_series_exact(monkeypatch):
+    monkeypatch.setattr(feature_store, "RESYNC_EVERY", 50)
+    values = series(500) * 1e6
+    np.testing.assert_allclose(lag_rolling_features(values), pandas_features(values), rtol=1e-9, equal_nan=True)
+
+
+def test_from_history_matches_the_last_row():
+    values = series(300)
+    expected = pandas_features(values)[-1]
+    np.testing.assert_allclose(RollingFeatures.from_history(values).current(), expected, rtol=1e-9)
+
+
+def test_short_history_has_no_rolling_features():
+    row = RollingFeatures.from_history([1.0, 2.0]).current()
+    assert row[0] == 1.0
+    assert all(math.isnan(value) for value in row[1:])
+
+
+def test_project_continues_the_series_without_changing_state():
+    values = series(100)
+    future = series(30, seed=1)
+    state = RollingFeatures.from_history(values)
+    before = state.current()
+
+    projected = state.project(future)
+    expected = pandas_features(np.concatenate([values, future]))[-len(future):]
+    np.testing.assert_allclose(projected, expected, rtol=1e-9)
+    assert state.current() == before
+    assert projected.shape == (len(future), len(FEATURE_COLUMNS))
+
+
+def test_project_step_features_depend_on_the_trajectory():
+    state = RollingFeatures.from_history(series(100))
+    low, high = state.project([0.0, 0.0, 5.0]), state.project([0.0, 1000.0, 5.0])
+    # Each row only sees the projected values up to its own
+    np.testing.assert_array_equal(low[0], high[0])
+    assert high[1][2] > low[1][2]
+    assert high[2][0] == 1000.0 and low[2][0] == 0.0
+
+
+@pytest.mark.parametrize("n", [0, 1, 24, 25])
+def test_extend_returns_one_row_per_reading(n):
+    assert lag_rolling_features(series(n)).shape == (n, len(FEATURE_COLUMNS))
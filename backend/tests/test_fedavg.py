@@ -0,0 +1,40 @@
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from federated.fedavg import client_seed, fit_global_scalers, weighted_average
+
+
+def test_weighted_average_weights_by_sample_count():
+    client_a = [np.array([[1.0, 2.0]], dtype=np.float32), np.array([0.0], dtype=np.float32)]
+    client_b = [np.array([[4.0, 8.0]], dtype=np.float32), np.array([3.0], dtype=np.float32)]
+    average = weighted_average([client_a, client_b], [1, 2])
+    np.testing.assert_allclose(average[0], [[3.0, 6.0]])
+    np.testing.assert_allclose(average[1], [2.0])
+    assert [tensor.dtype for tensor in average] == [np.float32, np.float32]
+
+
+def test_weighted_average_of_one_client_is_its_weights():
+    weights = [np.arange(6, dtype=np.float32).reshape(2, 3)]
+    np.testing.assert_array_equal(weighted_average([weights], [7])[0], weights[0])
+
+
+def client_statistics(exo, target):
+    return {"exo_min": exo.min(axis=0), "exo_max": exo.max(axis=0),
+            "target_min": float(target.min()), "target_max": float(target.max())}
+
+
+def test_global_scalers_equal_fitting_on_pooled_data():
+    rng = np.random.default_rng(0)
+    clients = [(rng.normal(loc, 5, (50, 11)), rng.uniform(0, loc, 50)) for loc in (10, 100, 1000)]
+    feature_scaler, target_scaler = fit_global_scalers([client_statistics(*client) for client in clients])
+
+    pooled_exo = np.vstack([exo for exo, _ in clients])
+    pooled_target = np.concatenate([target for _, target in clients]).reshape(-1, 1)
+    np.testing.assert_allclose(feature_scaler.transform(pooled_exo), MinMaxScaler().fit_transform(pooled_exo))
+    np.testing.assert_allclose(target_scaler.transform(pooled_target), MinMaxScaler().fit_transform(pooled_target))
+
+
+def test_client_seeds_are_reproducible_and_distinct():
+    assert client_seed(0, 1, 2) == client_seed(0, 1, 2)
+    seeds = {client_seed(seed, index, step) for seed in (0, 1) for index in range(3) for step in range(1, 4)}
+    assert len(seeds) == 18
@@ -0,0 +1,55 @@
+import threading
+
+import numpy as np
+
+from fakes import FakeForecaster
+from forecasting import TrajectoryCache, forecast_trajectories, forecast_trajectory
+
+WINDOW = np.arange(4, dtype=np.float32).reshape(1, 4, 1)
+
+
+def test_cache_is_lru():
+    cache = TrajectoryCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a").tolist() == [1.0] and cache.get("c").tolist() == [3.0]
+
+
+def test_cache_keeps_longest_trajectory():
+    cache = TrajectoryCache()
+    cache.put("a", [1.0, 2.0, 3.0])
+    cache.put("a", [1.0])
+    assert cache.get("a").tolist() == [1.0, 2.0, 3.0]
+    assert not cache.get("a").flags.writeable
+
+
+def test_forecast_reuses_and_extends_cached_trajectory():
+    model = FakeForecaster()
+    cache = TrajectoryCache()
+    exo = np.array([[0.5, 0.25]], dtype=np.float32)
+    expected = model.rollout(WINDOW, exo, 6)[0]
+
+    np.testing.assert_allclose(forecast_trajectory(model, WINDOW, exo, 3, cache=cache), expected[:3])
+    np.testing.assert_allclose(forecast_trajectory(model, WINDOW, exo, 2, cache=cache), expected[:2])
+    # A longer horizon continues from the cached steps
+    np.testing.assert_allclose(forecast_trajectory(model, WINDOW, exo, 6, cache=cache), expected, rtol=1e-6)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    exo_inputs = np.array([[0.5, 0.25], [1.0, 0.0]], dtype=np.float32)
+    trajectories = forecast_trajectories(model, WINDOW, exo_inputs, 6, cache=cache)
+    np.testing.assert_allclose(trajectories, model.rollout(WINDOW, exo_inputs, 6), rtol=1e-6)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_hit_and_miss_counts_are_exact_under_concurrency():
+    cache = TrajectoryCache()
+    cache.put("a", [1.0, 2.0])
+    threads = [threading.Thread(target=lambda: [cache.get(key, 2) for key in ("a", "b") * 500]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (4000, 4000)
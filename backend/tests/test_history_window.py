@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from building_store import BuildingDataStore
+from history_window import HistoryWindow
+from ingest_log import IngestLog, parse_readings
+
+SEQUENCE_LENGTH = 6
+
+
+@pytest.fixture
+def setup(tmp_path):
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    path = datasets / "Test_data.csv"
+    times = pd.date_range("2023-01-01", periods=24, freq="h")
+    pd.DataFrame({"Time": times.strftime("%Y-%m-%d %H:%M:%S"), "Use [kW]": np.arange(24.0)}).to_csv(path, index=False)
+    log = IngestLog(str(tmp_path / "log"))
+    scaler = MinMaxScaler().fit(np.array([[0.0], [1000.0]]))
+    window = HistoryWindow(str(path), SEQUENCE_LENGTH, scaler, check_interval=0, ingest_log=log, building="Test")
+    store = BuildingDataStore(str(datasets), log)
+    return window, store, log, scaler
+
+
+def unscaled(window, scaler):
+    return scaler.inverse_transform(window.get().reshape(-1, 1))[:, 0]
+
+
+def test_window_matches_store_after_out_of_order_and_duplicate_ingests(setup):
+    window, store, log, scaler = setup
+    np.testing.assert_allclose(unscaled(window, scaler), np.arange(18.0, 24.0))
+
+    batches = [
+        [{"Time": "2023-01-02 01:00:00", "Use [kW]": 101.0}, {"Time": "2023-01-02 00:00:00", "Use [kW]": 100.0}],
+        [{"Time": "2023-01-01 22:00:00", "Use [kW]": 522.0}],  # replaces a reading inside the window
+        [{"Time": "2023-01-02 01:00:00", "Use [kW]": 201.0},   # duplicate: the later one wins
+         {"Time": "2023-01-01 03:00:00", "Use [kW]": 503.0}],  # older than the window
+    ]
+    for batch in batches:
+        log.append("Test", parse_readings(batch))
+        window.refresh()
+        np.testing.assert_allclose(unscaled(window, scaler), store.get("Test").energy[-SEQUENCE_LENGTH:])
+
+    np.testing.assert_allclose(unscaled(window, scaler), [20.0, 21.0, 522.0, 23.0, 100.0, 201.0])
+
+
+def test_append_merges_by_timestamp(setup):
+    window, _, _, scaler = setup
+    window.append(["2023-01-01 20:00:00", "2023-01-02 00:00:00"], [320.0, 400.0])
+    np.testing.assert_allclose(unscaled(window, scaler), [19.0, 320.0, 21.0, 22.0, 23.0, 400.0])
+
+
+def test_not_enough_history(tmp_path):
+    path = tmp_path / "short.csv"
+    pd.DataFrame({"Time": ["2023-01-01 00:00:00"] * 8, "Use [kW]": np.arange(8.0)}).to_csv(path, index=False)
+    window = HistoryWindow(str(path), SEQUENCE_LENGTH, MinMaxScaler().fit([[0.0], [10.0]]), check_interval=0)
+    # Eight readings for one timestamp are a single reading once merged
+    with pytest.raises(ValueError, match="Not enough historical data"):
+        window.get()
@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+from fakes import FakeForecaster
+from inference_executor import InferenceBusy
+from inference_scheduler import InferenceScheduler
+
+WINDOW = np.arange(4, dtype=np.float32)
+
+
+def wait_idle(scheduler, timeout=5.0):
+    deadline = time.time() + timeout
+    while scheduler.stats()["in_flight"] and time.time() < deadline:
+        time.sleep(0.01)
+    return scheduler.stats()
+
+
+def test_concurrent_requests_share_forward_passes():
+    release = threading.Event()
+    forecaster = FakeForecaster(delay=release)
+    scheduler = InferenceScheduler(forecaster, batch_window_ms=50)
+    exos = [np.array([i, 0.5], dtype=np.float32) for i in range(8)]
+    futures = [scheduler.submit(WINDOW, exo, 3 + i % 2) for i, exo in enumerate(exos)]
+    release.set()
+
+    for i, (future, exo) in enumerate(zip(futures, exos)):
+        expected = forecaster.rollout(WINDOW.reshape(1, -1, 1), exo.reshape(1, -1), 3 + i % 2)[0]
+        np.testing.assert_allclose(future.result(timeout=5), expected, rtol=1e-6)
+    stats = wait_idle(scheduler)
+    assert stats["requests"] == 8
+    assert stats["max_batch_size"] == 8
+    assert stats["avg_batch_size"] > 1.0
+    assert stats["in_flight"] == 0
+
+
+def test_forward_pass_error_fails_only_that_batch():
+    scheduler = InferenceScheduler(FakeForecaster(fail_on=-1.0), batch_window_ms=1)
+    with pytest.raises(RuntimeError, match="forward pass failed"):
+        scheduler.forecast(WINDOW, [-1.0, 0.0], 2, timeout=5)
+    assert len(scheduler.forecast(WINDOW, [1.0, 0.0], 2, timeout=5)) == 2
+
+
+def test_unexpected_error_fails_futures_and_keeps_worker_alive():
+    scheduler = InferenceScheduler(FakeForecaster(), batch_window_ms=1)
+    # An exo vector of the wrong width breaks batch assembly, outside forecaster.step
+    with pytest.raises(ValueError):
+        scheduler.forecast(WINDOW, [1.0, 2.0, 3.0], 2, timeout=5)
+    assert len(scheduler.forecast(WINDOW, [1.0, 0.0], 2, timeout=5)) == 2
+    assert wait_idle(scheduler)["in_flight"] == 0
+
+
+def test_submit_without_forecaster():
+    with pytest.raises(ValueError):
+        InferenceScheduler().submit(WINDOW, [0.0, 0.0], 1)
+
+
+def test_backpressure_on_pending_requests():
+    release = threading.Event()
+    scheduler = InferenceScheduler(FakeForecaster(delay=release), batch_window_ms=1, max_pending=2)
+    futures = [scheduler.submit(WINDOW, [0.0, 0.0], 2) for _ in range(2)]
+    with pytest.raises(InferenceBusy):
+        scheduler.submit(WINDOW, [0.0, 0.0], 2)
+    assert scheduler.stats()["rejected"] == 1
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert scheduler.stats()["pending"] == 0
+    assert len(scheduler.forecast(WINDOW, [0.0, 0.0], 2, timeout=5)) == 2
+
+
+def test_timed_out_request_is_cancelled_and_frees_its_slot():
+    release = threading.Event()
+    scheduler = InferenceScheduler(FakeForecaster(delay=release), batch_window_ms=1, max_pending=1)
+    with pytest.raises(FutureTimeoutError):
+        scheduler.forecast(WINDOW, [0.0, 0.0], 50, timeout=0.05)
+    assert scheduler.stats()["pending"] == 0
+    release.set()
+    assert len(scheduler.forecast(WINDOW, [0.0, 0.0], 2, timeout=5)) == 2
+    assert wait_idle(scheduler)["in_flight"] == 0
+
+
+def test_stop_fails_queued_requests_and_rejects_new_ones():
+    release = threading.Event()
+    scheduler = InferenceScheduler(FakeForecaster(delay=release), batch_window_ms=0, max_batch=1)
+    running = scheduler.submit(WINDOW, np.zeros(2), 3)
+    queued = scheduler.submit(WINDOW, np.zeros(2), 3)
+    worker = scheduler._thread
+
+    scheduler.stop()
+    release.set()
+    worker.join(5)
+    assert not worker.is_alive()
+    for future in (running, queued):
+        with pytest.raises(InferenceBusy):
+            future.result(timeout=5)
+    with pytest.raises(InferenceBusy):
+        scheduler.submit(WINDOW, np.zeros(2), 3)
+    assert scheduler.stats()["pending"] == 0
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from ingest_log import RECORD_DTYPE, IngestLog, parse_readings
+
+
+def readings(start_hour, count):
+    return [{"Time": f"2023-01-01 {hour:02d}:00:00", "Use [kW]": float(hour), "Occupancy": hour * 10}
+            for hour in range(start_hour, start_hour + count)]
+
+
+def test_parse_readings_fills_missing_columns():
+    records = parse_readings(readings(0, 2))
+    assert records.dtype == RECORD_DTYPE
+    assert records["Time"][1] - records["Time"][0] == 3600 * 10**9
+    assert records["Occupancy"].tolist() == [0.0, 10.0]
+    assert np.isnan(records["HVAC [kW]"]).all()
+
+
+@pytest.mark.parametrize("payload", [[], [{"Use [kW]": 1.0}], [{"Time": "2023-01-01", "Use [kW]": 1.0, "Extra": 2}],
+                                     [{"Time": "2023-01-01", "Use [kW]": "high"}]])
+def test_parse_readings_rejects_invalid(payload):
+    with pytest.raises(ValueError):
+        parse_readings(payload)
+
+
+def test_append_and_replay_across_chunks(tmp_path):
+    log = IngestLog(str(tmp_path), chunk_records=4)
+    assert log.record_count("Office") == 0
+    assert len(log.read("Office")) == 0
+
+    assert log.append("Office", parse_readings(readings(0, 3))) == 3
+    assert log.append("Office", parse_readings(readings(3, 6))) == 9
+    assert log.record_count("Office") == 9
+
+    replayed = log.read("Office")
+    assert replayed["Use [kW]"].tolist() == [float(hour) for hour in range(9)]
+    # Reading from an offset only returns the records after it, as the store's incremental merge does
+    assert log.read("Office", start=7)["Use [kW]"].tolist() == [7.0, 8.0]
+    # A fresh log over the same directory replays the same records
+    assert IngestLog(str(tmp_path), chunk_records=4).read("Office").tobytes() == replayed.tobytes()
+    assert log.record_count("School") == 0
+
+
+def test_record_count_does_not_rescan_chunks(tmp_path, monkeypatch):
+    log = IngestLog(str(tmp_path), chunk_records=4)
+    log.append("Office", parse_readings(readings(0, 10)))
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or real_scandir(path))
+
+    assert log.record_count("Office") == 10
+    assert log.append("Office", parse_readings(readings(10, 1))) == 11
+    assert log.record_count("Office") == 11
+    # Only the append lists the chunks; counting stats the directory and the last chunk
+    assert len(scans) == 1
+
+
+def test_record_count_sees_appends_from_another_writer(tmp_path):
+    log, other = IngestLog(str(tmp_path), chunk_records=4), IngestLog(str(tmp_path), chunk_records=4)
+    log.append("Office", parse_readings(readings(0, 3)))
+    assert log.record_count("Office") == 3
+    other.append("Office", parse_readings(readings(3, 1)))
+    assert log.record_count("Office") == 4
+    # Starting a new chunk changes the directory mtime, so the chunk list is re-scanned
+    other.append("Office", parse_readings(readings(4, 6)))
+    os.utime(tmp_path / "Office", ns=(0, 0))  # mtime granularity can hide a quick change
+    assert log.record_count("Office") == 10
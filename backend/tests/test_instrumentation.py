@@ -0,0 +1,37 @@
+import threading
+import time
+
+from instrumentation import RequestProfiler, metrics
+
+
+def spin_in_worker_thread(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_includes_work_on_other_threads(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), interval=0.001)
+    capture = profiler.start()
+    assert capture is not None
+    assert profiler.start() is None  # one capture at a time
+
+    worker = threading.Thread(target=spin_in_worker_thread, args=(0.2,), name="inference-test")
+    worker.start()
+    worker.join()
+    path = profiler.stop(capture, "test")
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    worker_samples = sum(int(line.rsplit(" ", 1)[1]) for line in lines
+                         if line.startswith("inference-test;") and "spin_in_worker_thread" in line)
+    assert worker_samples > 0
+    assert any(line.startswith("request;") for line in lines)
+    assert profiler.start() is not None
+
+
+def test_stage_timer_records_histograms():
+    timer = metrics.stage_timer("/test-route")
+    timer.mark("first")
+    text = metrics.render()
+    assert 'route="/test-route",stage="first"' in text
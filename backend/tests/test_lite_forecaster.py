@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+from lite_forecaster import AffineScaler
+
+
+def data():
+    rng = np.random.default_rng(0)
+    return rng.normal([5.0, -20.0, 300.0], [1.0, 10.0, 50.0], (200, 3))
+
+
+@pytest.mark.parametrize("scaler", [MinMaxScaler(), MinMaxScaler(feature_range=(-1, 1)), StandardScaler(),
+                                    StandardScaler(with_std=False)])
+def test_matches_the_sklearn_scaler(scaler):
+    X = data()
+    scaler.fit(X)
+    affine = AffineScaler.from_sklearn(scaler)
+    X_new = data()[:20] * 1.5
+    np.testing.assert_allclose(affine.transform(X_new), scaler.transform(X_new), rtol=1e-12, atol=1e-12)
+    scaled = scaler.transform(X_new)
+    np.testing.assert_allclose(affine.inverse_transform(scaled), scaler.inverse_transform(scaled), rtol=1e-12)
+
+
+def test_round_trips_through_to_dict():
+    scaler = MinMaxScaler().fit(data())
+    restored = AffineScaler(**AffineScaler.from_sklearn(scaler).to_dict())
+    np.testing.assert_allclose(restored.transform(data()), scaler.transform(data()))
+
+
+def test_rejects_other_scalers():
+    with pytest.raises(TypeError):
+        AffineScaler.from_sklearn(RobustScaler().fit(data()))
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from model_registry import MODEL_FILE_STEM, ModelRegistry, publish_model, version_sort_key
+
+
+@pytest.fixture
+def exported(tmp_path):
+    out_dir = tmp_path / "federated_out"
+    out_dir.mkdir()
+    for suffix in (".h5", "_feature.save", "_target.save"):
+        (out_dir / f"{MODEL_FILE_STEM}{suffix}").write_bytes(b"model")
+    return str(out_dir)
+
+
+def test_published_model_is_served_from_registry(exported, tmp_path):
+    registry_dir = str(tmp_path / "registry")
+    publish_model(exported, registry_dir, ["Hospital", "School"], version="20260101-000000")
+    publish_model(exported, registry_dir, ["Hospital"], version="20260201-000000")
+    registry = ModelRegistry(registry_dir, history_path_for=lambda building: f"datasets/{building}_data.csv")
+
+    assert registry.buildings() == ["Hospital", "School"]
+    assert registry.resolve("Hospital") == ("Hospital", "20260201-000000")
+    entry = registry._entry("School", "20260101-000000")
+    assert entry.backend == "keras"
+    for path in (entry.model_path, entry.feature_scaler_path, entry.target_scaler_path):
+        assert os.path.isfile(path)
+    assert not [name for name in os.listdir(os.path.join(registry_dir, "Hospital")) if name.startswith(".")]
+
+
+def test_versions_being_published_are_hidden(exported, tmp_path):
+    os.makedirs(tmp_path / "Office" / ".20260301-000000.tmp")
+    publish_model(exported, str(tmp_path), ["Office"], version="20260101-000000")
+    assert ModelRegistry(str(tmp_path)).versions("Office") == ["20260101-000000"]
+
+
+def test_publish_refuses_to_overwrite_a_version(exported, tmp_path):
+    publish_model(exported, str(tmp_path), ["Office"], version="v1")
+    with pytest.raises(FileExistsError):
+        publish_model(exported, str(tmp_path), ["Office"], version="v1")
+
+
+def test_latest_version_uses_natural_order(exported, tmp_path):
+    for version in ["v9", "v10", "v2"]:
+        publish_model(exported, str(tmp_path), ["Office"], version=version)
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.versions("Office") == ["v2", "v9", "v10"]
+    assert registry.resolve("Office") == ("Office", "v10")
+    assert sorted(["2026-12", "2026-2", "2026-10-b", "2026-10-a"], key=version_sort_key) == [
+        "2026-2", "2026-10-a", "2026-10-b", "2026-12"]
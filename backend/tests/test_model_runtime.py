@@ -0,0 +1,68 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from fakes import FakeForecaster, FakeRuntime
+from inference_executor import InferenceBusy
+from inference_scheduler import InferenceScheduler
+from forecasting import get_forecaster
+from model_registry import ModelEntry, ModelRegistry
+from model_runtime import NOT_LOADED, READY
+
+
+def make_history(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("Time,Use [kW]\n" + "".join(f"2023-01-01 {h:02d}:00:00,{h}\n" for h in range(10)))
+    return str(path)
+
+
+def test_forecaster_lives_on_the_runtime_and_is_freed_on_close(tmp_path):
+    runtime = FakeRuntime(None, None, None, make_history(tmp_path), sequence_length=4, max_batch=0).load()
+    assert runtime.status == READY
+    assert get_forecaster(runtime.model) is runtime.forecaster
+    model = weakref.ref(runtime.model)
+
+    runtime.close()
+    gc.collect()
+    assert model() is None
+    assert runtime.status == NOT_LOADED and runtime.forecaster is None
+
+
+def test_evicted_models_are_collected(tmp_path, monkeypatch):
+    monkeypatch.setattr("model_registry.ModelRuntime", FakeRuntime)
+    history = make_history(tmp_path)
+    registry = ModelRegistry(str(tmp_path / "registry"), max_resident=1, runtime_options={"sequence_length": 4})
+    for building in ("Office", "School"):
+        registry.register(ModelEntry(building, "v1", model_path="unused", history_csv_path=history))
+
+    model = weakref.ref(registry.get("Office").model)
+    registry.get("School")
+    gc.collect()
+    assert registry.evictions == 1
+    assert model() is None
+
+
+def test_close_stops_the_runtimes_own_scheduler(tmp_path):
+    runtime = FakeRuntime(None, None, None, make_history(tmp_path), sequence_length=4, max_batch=8,
+                          max_pending=2).load()
+    scheduler = runtime.inference_scheduler
+    assert scheduler.max_pending == 2
+    scheduler.forecast(np.zeros(4), np.zeros(11), 2, timeout=5)
+    worker = scheduler._thread
+
+    runtime.close()
+    worker.join(5)
+    assert not worker.is_alive()
+    with pytest.raises(InferenceBusy):
+        scheduler.submit(np.zeros(4), np.zeros(11), 2)
+
+
+def test_close_leaves_a_shared_scheduler_running(tmp_path):
+    shared = InferenceScheduler(None)
+    runtime = FakeRuntime(None, None, None, make_history(tmp_path), sequence_length=4,
+                          inference_scheduler=shared).load()
+    runtime.close()
+    trajectory = shared.forecast(np.zeros(4), np.zeros(11), 2, timeout=5, forecaster=FakeForecaster(n_features=11))
+    assert trajectory.shape == (2,)
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from fakes import FakeRuntime
+from inference_executor import RequestSlots
+from model_registry import ModelEntry
+
+BUILDING = "PredictTest"
+USER_INPUTS = {name: 0.5 for name in app_module.EXOGENOUS_FEATURES}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    history = tmp_path / "history.csv"
+    history.write_text("Time,Use [kW]\n" + "".join(
+        f"2023-01-{1 + hour // 24:02d} {hour % 24:02d}:00:00,{hour % 50}\n" for hour in range(100)))
+    monkeypatch.setattr("model_registry.ModelRuntime", FakeRuntime)
+    registry = app_module.model_registry
+    registry.register(ModelEntry(BUILDING, "v1", model_path="unused", history_csv_path=str(history)))
+    yield registry
+    FakeRuntime.load_gate = None
+    registry._registered.pop((BUILDING, "v1"))
+    runtime = registry._resident.pop((BUILDING, "v1"), None)
+    if runtime is not None:
+        runtime.close()
+
+
+def predict(client, occupancy=0.5, hours_ahead=24):
+    return client.post(f"/predict?building={BUILDING}", json={
+        "hours_ahead": hours_ahead, "user_inputs": {**USER_INPUTS, "Occupancy": occupancy}})
+
+
+def wait_ready(registry):
+    runtime = registry.runtime(BUILDING)
+    deadline = time.time() + 5
+    while not runtime.ready and time.time() < deadline:
+        time.sleep(0.01)
+    return runtime
+
+
+def test_model_loads_in_the_background(registry):
+    FakeRuntime.load_gate = threading.Event()
+    client = app_module.app.test_client()
+    started = time.perf_counter()
+    response = predict(client)
+    # The request thread does not wait for the load
+    assert time.perf_counter() - started < 2
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["error"] == "Model is loading"
+
+    FakeRuntime.load_gate.set()
+    assert wait_ready(registry).ready
+    response = predict(client)
+    assert response.status_code == 200
+    assert isinstance(response.get_json()["predicted_consumption"], float)
+
+
+@pytest.mark.skipif(app_module.inference_scheduler is None, reason="micro-batching disabled")
+def test_concurrent_predicts_share_the_scheduler(registry, monkeypatch):
+    client = app_module.app.test_client()
+    predict(client)
+    wait_ready(registry)
+    before = app_module.inference_scheduler.stats()
+
+    n = 3 * (app_module.INFERENCE_MAX_PENDING + 1)
+    # As if the server ran enough threads for all of them
+    monkeypatch.setattr(app_module, "forecast_slots", RequestSlots(n))
+    statuses = []
+    barrier = threading.Barrier(n)
+
+    def request(i):
+        barrier.wait()
+        statuses.append(predict(app_module.app.test_client(), occupancy=i / n).status_code)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # More concurrent requests than the executor would admit, and none is turned away
+    assert statuses == [200] * n
+    stats = app_module.inference_scheduler.stats()
+    assert stats["requests"] - before["requests"] == n
+    assert stats["max_batch_size"] > 1
+
+
+def test_predict_uses_the_executor_when_batching_is_disabled(registry, monkeypatch):
+    # What app.py sets up with INFERENCE_MAX_BATCH=0
+    monkeypatch.setattr(registry, "inference_scheduler", None)
+    monkeypatch.setattr(registry, "runtime_options", {**registry.runtime_options, "max_batch": 0})
+    client = app_module.app.test_client()
+    predict(client)
+    runtime = wait_ready(registry)
+    assert runtime.inference_scheduler is None
+
+    before = app_module.inference_executor.stats()["submitted"]
+    response = predict(client)
+    assert response.status_code == 200
+    assert app_module.inference_executor.stats()["submitted"] == before + 1
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict", {"hours_ahead": 3, "user_inputs": USER_INPUTS}),
+    ("/predict/batch", {"hours_ahead": 3, "scenarios": [USER_INPUTS]}),
+])
+def test_runtime_evicted_during_a_request_returns_503(registry, monkeypatch, path, body):
+    client = app_module.app.test_client()
+    predict(client)
+    runtime = wait_ready(registry)
+    load_model_runtime = app_module.load_model_runtime
+
+    def load_then_evict(data=None):
+        found, error_response = load_model_runtime(data)
+        runtime.close()  # what an LRU eviction by a concurrent request does
+        return found, error_response
+
+    monkeypatch.setattr(app_module, "load_model_runtime", load_then_evict)
+    response = client.post(f"{path}?building={BUILDING}", json=body)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["error"] == "Model was unloaded"
+
+
+def test_data_routes_answer_while_every_forecast_slot_is_taken(registry, monkeypatch):
+    client = app_module.app.test_client()
+    predict(client)
+    runtime = wait_ready(registry)
+    slots = RequestSlots(2)
+    monkeypatch.setattr(app_module, "forecast_slots", slots)
+    release = threading.Event()
+    runtime.forecaster.delay = release  # forecasts wait until released
+
+    statuses = []
+    threads = [threading.Thread(target=lambda i=i: statuses.append(predict(app_module.app.test_client(),
+                                                                           occupancy=0.1 * i).status_code))
+               for i in range(2)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 5
+    while slots.stats()["in_use"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    try:
+        assert slots.stats()["in_use"] == 2
+        # A third forecast is turned away instead of taking another server thread...
+        response = predict(client, occupancy=0.9)
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+        # ...and data routes still answer
+        building = app_module.building_store.buildings()[0]
+        response = client.get(f"/consumption?building={building}&start_date=2023-01-01&end_date=2023-01-02")
+        assert response.status_code == 200
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join(5)
+    assert statuses == [200, 200]
+    assert slots.stats() == {"limit": 2, "in_use": 0, "rejected": 1}
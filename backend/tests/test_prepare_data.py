@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+import prepare_data
+from prepare_data import OUTPUT_COLUMNS, check_outputs, parity_problems, prepare_building, quality_problems
+
+HEADER = "Time,Use [kW],HVAC [kW],Lighting [kW],Outdoor Temp [°C],Humidity [%],Cloud Cover [%],Season,Staff Count\n"
+SPEC = {"file": "raw.csv", "occupancy": "Staff Count", "special_equipment": [], "cloud_cover_fraction": False}
+
+
+@pytest.fixture
+def building(monkeypatch):
+    monkeypatch.setitem(prepare_data.SOURCES, "Test", dict(SPEC))
+    return "Test"
+
+
+def raw_rows(hours, time_format="%d/%m/%Y %H:%M"):
+    times = pd.date_range("2023-01-01", periods=hours, freq="h")
+    return "".join(f"{time.strftime(time_format)},{10 + i % 5},3,1,12,60,40,Winter,{i % 7}\n"
+                   for i, time in enumerate(times))
+
+
+def write_raw(path, body):
+    path.write_text(HEADER + body, encoding=prepare_data.RAW_ENCODING)
+    return str(path)
+
+
+def test_rows_without_a_time_are_counted_apart_from_bad_times(tmp_path, building):
+    body = raw_rows(6) + "".join(f"{time},11,3,1,12,60,40,Winter,2\n" for time in ("", " ", "not a time"))
+    raw = write_raw(tmp_path / "raw.csv", body)
+    entry = prepare_building(building, raw, str(tmp_path / "Test_data.csv"))
+    assert entry["stats"]["missing_time"] == 2
+    assert entry["stats"]["bad_time"] == 1
+    assert entry["output_rows"] == 6
+
+
+def test_source_time_format(tmp_path, building):
+    prepare_data.SOURCES[building]["time_format"] = prepare_data.MONTH_FIRST_TIME_FORMAT
+    raw = write_raw(tmp_path / "raw.csv", raw_rows(48, time_format="%m/%d/%Y %H:%M"))
+    prepare_building(building, raw, str(tmp_path / "Test_data.csv"))
+    frame = pd.read_csv(tmp_path / "Test_data.csv", parse_dates=["Time"])
+    assert frame["Time"].iloc[-1] == pd.Timestamp("2023-01-02 23:00")
+    assert list(frame.columns) == OUTPUT_COLUMNS
+
+
+def test_quality_thresholds():
+    entry = {"output_rows": 90, "stats": {"rows": 100, "missing_time": 1, "bad_time": 1, "bad_use": 0,
+                                          "duplicates": 0, "gap_hours": 10}}
+    assert quality_problems(entry, max_reject_fraction=0.05, max_gap_fraction=0.2) == []
+    problems = quality_problems(entry, max_reject_fraction=0.01, max_gap_fraction=0.05)
+    assert len(problems) == 2
+    assert "2 of 100 raw rows rejected (1 without a time" in problems[0]
+    assert "10 of 100 hours" in problems[1]
+
+
+def staged_and_reference(tmp_path, building, reference_body):
+    out_dir, reference_dir = tmp_path / "staging", tmp_path / "datasets"
+    out_dir.mkdir()
+    reference_dir.mkdir()
+    raw = write_raw(tmp_path / "raw.csv", raw_rows(48))
+    prepare_building(building, raw, str(out_dir / "Test_data.csv"))
+    reference = write_raw(tmp_path / "reference_raw.csv", reference_body)
+    prepare_building(building, reference, str(reference_dir / "Test_data.csv"))
+    return str(out_dir / "Test_data.csv"), str(reference_dir / "Test_data.csv")
+
+
+def test_parity_allows_extending_the_served_dataset(tmp_path, building):
+    staged, reference = staged_and_reference(tmp_path, building, raw_rows(24))
+    assert parity_problems(staged, reference) == []
+
+
+def test_parity_flags_lost_coverage_and_different_values(tmp_path, building):
+    body = raw_rows(72).replace(",3,1,12,", ",9,1,12,")
+    staged, reference = staged_and_reference(tmp_path, building, body)
+    problems = parity_problems(staged, reference)
+    assert any("48 rows, served dataset has 72" in problem for problem in problems)
+    assert any(problem.startswith("covers ") for problem in problems)
+    assert any(problem.startswith("mean HVAC [kW]") for problem in problems)
+
+
+def test_check_outputs_skips_parity_against_itself(tmp_path, building):
+    raw = write_raw(tmp_path / "raw.csv", raw_rows(48))
+    entry = prepare_building(building, raw, str(tmp_path / "Test_data.csv"))
+    assert check_outputs({building: entry}, str(tmp_path), str(tmp_path)) == {}
+
+
+def test_main_writes_to_staging_and_fails_on_rejects(tmp_path, building, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "datasets").mkdir()
+    write_raw(tmp_path / "data" / "raw.csv", raw_rows(48) + ",11,3,1,12,60,40,Winter,2\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["prepare_data.py", "--buildings", building, "--workers", "1"])
+    with pytest.raises(SystemExit) as exit_info:
+        prepare_data.main()
+    assert exit_info.value.code == 1
+    assert os.path.exists(tmp_path / prepare_data.STAGING_DIR / "Test_data.csv")
+    assert os.listdir(tmp_path / "datasets") == []
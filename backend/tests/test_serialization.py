@@ -0,0 +1,41 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+import serialization
+from serialization import consumption_columnar_json, consumption_rows_json, encode_body, format_timestamps
+
+TIMESTAMPS = pd.date_range("2023-01-01", periods=4, freq="h").values
+VALUES = np.array([1.5, np.nan, 1e-7, 250.0])
+
+
+def test_rows_round_trip_matches_json_dumps():
+    expected = [{"timestamp": pd.Timestamp(t).isoformat(), "consumption": None if np.isnan(v) else float(v)}
+                for t, v in zip(TIMESTAMPS, VALUES)]
+    assert json.loads(consumption_rows_json(TIMESTAMPS, VALUES)) == expected
+
+
+def test_columnar_round_trip():
+    decoded = json.loads(consumption_columnar_json(TIMESTAMPS, VALUES))
+    assert decoded["timestamps"] == [pd.Timestamp(t).isoformat() for t in TIMESTAMPS]
+    assert decoded["consumption"] == [1.5, None, 1e-7, 250.0]
+
+
+def test_sub_second_timestamps_keep_microseconds():
+    timestamps = np.array(["2023-01-01T00:00:00.250"], dtype="datetime64[ns]")
+    assert format_timestamps(timestamps) == [pd.Timestamp(timestamps[0]).isoformat()]
+
+
+def test_encode_body_negotiates_encoding():
+    body = consumption_rows_json(pd.date_range("2023-01-01", periods=200, freq="h").values, np.arange(200.0))
+    data, encoding = encode_body(body, "gzip;q=1.0, identity;q=0.5")
+    assert encoding == "gzip"
+    assert gzip.decompress(data).decode("utf-8") == body
+
+    assert encode_body(body, "gzip;q=0") == (body.encode("utf-8"), None)
+    assert encode_body("[]", "gzip") == (b"[]", None)  # too small to be worth compressing
+    if serialization.brotli is not None:
+        data, encoding = encode_body(body, "br, gzip")
+        assert encoding == "br" and serialization.brotli.decompress(data).decode("utf-8") == body
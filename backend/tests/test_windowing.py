@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from windowing import WindowBatches, sliding_windows
+
+TIMESTEPS = 5
+
+
+def series(n=40, features=3):
+    X = np.arange(n * features, dtype=np.float32).reshape(n, features)
+    return X, np.arange(n, dtype=np.float32) * 10
+
+
+def test_window_shape():
+    X, y = series()
+    assert sliding_windows(X, TIMESTEPS).shape == (len(X) - TIMESTEPS, TIMESTEPS, X.shape[1])
+    assert sliding_windows(y, TIMESTEPS).shape == (len(y) - TIMESTEPS, TIMESTEPS)
+
+
+def test_windows_are_aligned_with_their_targets():
+    X, y = series()
+    batches = WindowBatches(X, y, TIMESTEPS, batch_size=len(X))
+    windows, targets = batches[0]
+    for i in range(len(windows)):
+        np.testing.assert_array_equal(windows[i], X[i:i + TIMESTEPS])
+        assert targets[i] == y[i + TIMESTEPS]
+
+
+def test_windows_are_read_only_views():
+    X, _ = series()
+    windows = sliding_windows(X, TIMESTEPS)
+    assert np.shares_memory(windows, X)
+    with pytest.raises(ValueError):
+        windows[0, 0, 0] = 1.0
+
+
+def covered(batches):
+    windows, targets = zip(*(batches[i] for i in range(len(batches))))
+    return np.concatenate(windows), np.concatenate(targets)
+
+
+def test_contiguous_batches_cover_the_range_in_order():
+    X, y = series()
+    batches = WindowBatches(X, y, TIMESTEPS, batch_size=8, start=3, stop=30)
+    assert len(batches) == 4  # 27 windows in batches of 8
+    windows, targets = covered(batches)
+    np.testing.assert_array_equal(targets, y[3 + TIMESTEPS:30 + TIMESTEPS])
+    np.testing.assert_array_equal(windows[0], X[3:3 + TIMESTEPS])
+
+
+def test_shuffled_batches_cover_the_range_once_per_epoch():
+    X, y = series()
+    batches = WindowBatches(X, y, TIMESTEPS, batch_size=8, start=3, stop=30, shuffle=True, seed=0)
+    first_windows, first = covered(batches)
+    assert sorted(first.tolist()) == y[3 + TIMESTEPS:30 + TIMESTEPS].tolist()
+    assert first.tolist() != sorted(first.tolist())
+    # Windows stay aligned with their targets after shuffling
+    for window, target in zip(first_windows, first):
+        i = int(target / 10) - TIMESTEPS
+        np.testing.assert_array_equal(window, X[i:i + TIMESTEPS])
+
+    batches.on_epoch_end()
+    _, second = covered(batches)
+    assert sorted(second.tolist()) == sorted(first.tolist())
+    assert second.tolist() != first.tolist()
@@ -51,18 +51,18 @@ from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 import joblib
+from columnar import load_frame
+from windowing import sliding_windows
+from window_sequence import WindowSequence
+from feature_store import FEATURE_COLUMNS, lag_rolling_features
 
-# Step 1: Load the dataset
-data = pd.read_csv("community_consumption.csv")
+# Step 1: Load the dataset (memory-mapped columnar copy if `python columnar.py` has converted it)
+data = load_frame("community_consumption.csv")
 
 # Step 2: Feature Engineering
-# Create lagged features
-data['Use_lag1'] = data['Use [kW]'].shift(1)  # Lag by 1 hour
-data['Use_lag24'] = data['Use [kW]'].shift(24)  # Lag by 24 hours
-
-# Create rolling features
-data['Use_rolling_mean_24'] = data['Use [kW]'].rolling(window=24).mean()
-data['Use_rolling_std_24'] = data['Use [kW]'].rolling(window=24).std()
+# Lagged (1h, 24h) and 24h rolling mean/std features, computed by the same
+# incremental engine that serves them at inference time (feature_store.py)
+data[FEATURE_COLUMNS] = lag_rolling_features(data['Use [kW]'].to_numpy())
 
 # Drop rows with NaN values (created by lagging and rolling)
 data = data.dropna()
@@ -84,21 +84,23 @@ X = scaler.fit_transform(X)
 joblib.dump(scaler, "scaler_lstm.pkl")
 
 # Step 3: Create sequences for LSTM
-def create_sequences(X, y, timesteps):
-    X_seq, y_seq = [], []
-    for i in range(len(X) - timesteps):
-        X_seq.append(X[i:i+timesteps])
-        y_seq.append(y[i+timesteps])
-    return np.array(X_seq), np.array(y_seq)
-
+# Windows are zero-copy views over X (window i = X[i:i+timesteps], target y[i+timesteps]);
+# batches are only materialized by WindowSequence while training.
 timesteps = 24  # Use the past 24 hours to predict the next hour
-X_seq, y_seq = create_sequences(X, y, timesteps)
+X = X.astype(np.float32)
+y = y.to_numpy(dtype=np.float32)
+X_seq, y_seq = sliding_windows(X, timesteps), y[timesteps:]
 
 # Step 4: Split the data into training and testing sets based on time
 train_size = int(0.8 * len(X_seq))  # Train on 80% of the data
 X_train, X_test = X_seq[:train_size], X_seq[train_size:]
 y_train, y_test = y_seq[:train_size], y_seq[train_size:]
 
+# Hold out the last 20% of the training windows for validation (as validation_split=0.2 did)
+fit_size = int(np.ceil(train_size * 0.8))
+train_batches = WindowSequence(X, y, timesteps, batch_size=32, start=0, stop=fit_size, shuffle=True)
+val_batches = WindowSequence(X, y, timesteps, batch_size=32, start=fit_size, stop=train_size)
+
 # Step 5: Define and train the LSTM model
 def create_lstm_model(input_shape):
     model = Sequential([
@@ -110,7 +112,7 @@ def create_lstm_model(input_shape):
     return model
 
 model = create_lstm_model(input_shape=(X_train.shape[1], X_train.shape[2]))
-model.fit(X_train, y_train, epochs=50, batch_size=32, validation_split=0.2)
+model.fit(train_batches, epochs=50, validation_data=val_batches)
 
 # Save the model with a valid extension
 model.save("energy_consumption_lstm_model.keras")  # Use .keras for the native Keras format
@@ -0,0 +1,7 @@
+from tensorflow.keras.utils import Sequence
+
+from windowing import WindowBatches
+
+
+class WindowSequence(WindowBatches, Sequence):
+    """Keras Sequence over WindowBatches, for model.fit; kept apart so windowing.py imports without TensorFlow."""
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(X, timesteps):
+    """
+    Zero-copy sliding windows over the rows of X.
+
+    Returns a read-only view of shape (len(X) - timesteps, timesteps, features)
+    (or (len(X) - timesteps, timesteps) for 1-D input) whose window i is
+    X[i:i+timesteps], i.e. the history used to predict row i + timesteps.
+    """
+    X = np.asarray(X)
+    windows = sliding_window_view(X, timesteps, axis=0)  # (n - timesteps + 1, ..., timesteps)
+    if X.ndim > 1:
+        windows = np.moveaxis(windows, -1, 1)
+    return windows[:len(X) - timesteps]
+
+
+class WindowBatches:
+    """
+    (windows, targets) batches over a range of window indices, materializing
+    one batch at a time instead of the whole (samples, timesteps, features)
+    array. window_sequence.WindowSequence makes it a Keras Sequence; this
+    class does not need TensorFlow.
+
+    Window i is X[i:i+timesteps] and its target is y[i+timesteps]; only
+    windows with start <= i < stop are used, so train/validation/test splits
+    share the same underlying arrays.
+    """
+
+    def __init__(self, X, y, timesteps, batch_size=32, start=0, stop=None, shuffle=False, seed=None, **kwargs):
+        super().__init__(**kwargs)
+        self.windows = sliding_windows(np.asarray(X, dtype=np.float32), timesteps)
+        self.targets = np.asarray(y, dtype=np.float32)[timesteps:]
+        stop = len(self.windows) if stop is None else min(stop, len(self.windows))
+        self.indices = np.arange(start, stop)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        if shuffle:
+            self._rng.shuffle(self.indices)
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, batch):
+        idx = self.indices[batch * self.batch_size:(batch + 1) * self.batch_size]
+        if not self.shuffle:
+            # Contiguous range: slice the view and copy once
+            return np.array(self.windows[idx[0]:idx[-1] + 1]), self.targets[idx[0]:idx[-1] + 1]
+        return self.windows[idx], self.targets[idx]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self.indices)
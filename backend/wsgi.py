@@ -0,0 +1,11 @@
+"""
+Production entry point. Run from the backend directory with
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+(the gthread worker settings live in gunicorn.conf.py). `python app.py`
+still starts the Flask development server.
+"""
+from app import app
+
+__all__ = ["app"]